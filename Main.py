@@ -1,13 +1,28 @@
 from __future__ import annotations
 
+import queue
+import random
+import subprocess
+import threading
+import time
 import tkinter as tk
 from pathlib import Path
+from typing import Callable, List, Optional
 from tkinter import filedialog, messagebox, ttk
 
+from ytpplus.AssetIndex import AssetIndex
+from ytpplus.BatchVariants import VariantResult, plan_variants
+from ytpplus.BeatAnalysis import BeatCache
+from ytpplus.FFmpegRunner import FFmpegRunner
+from ytpplus.JobQueue import JobQueue, run_queue
+from ytpplus.MediaProbe import MetadataCache
+from ytpplus.ProxyMedia import ProxyManager
 from ytpplus.Utilities import (
     ASSET_FOLDERS,
     DEFAULT_EFFECTS,
+    ENCODER_PROFILES,
     PROJECT_TYPES,
+    RENDER_ENGINES,
     ProjectSettings,
     RenderJob,
     SourceLibrary,
@@ -15,7 +30,8 @@ from ytpplus.Utilities import (
     ensure_directories,
     load_default_effects,
 )
-from ytpplus.YTPGenerator import YTPGenerator
+from ytpplus.Workspace import WorkspaceManager
+from ytpplus.YTPGenerator import SegmentResult, YTPGenerator
 
 
 class YTPPlusDeluxeApp(tk.Tk):
@@ -28,9 +44,25 @@ class YTPPlusDeluxeApp(tk.Tk):
         self.effects = load_default_effects()
         self.sources = SourceLibrary()
         self.tools = ToolPaths()
+        self._ui_queue: queue.Queue = queue.Queue()
+        self._render_thread: Optional[threading.Thread] = None
+        self._runner: Optional[FFmpegRunner] = None
+        # Background proxy builds and beat analysis; cancelled when the window closes.
+        self._background_runner = FFmpegRunner()
+        self._plan_seed = random.randrange(2**32)
 
         ensure_directories(self.settings)
+        WorkspaceManager.for_settings(self.settings).cleanup_orphans()
         self._build_ui()
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        self.after(100, self._poll_ui_queue)
+
+    def _close(self) -> None:
+        """Stop background proxy builds, analysis and any running render, then close the window."""
+        self._background_runner.cancel()
+        if self._runner is not None:
+            self._runner.cancel()
+        self.destroy()
 
     def _build_ui(self) -> None:
         notebook = ttk.Notebook(self)
@@ -116,6 +148,24 @@ class YTPPlusDeluxeApp(tk.Tk):
         for path in paths:
             storage.append(Path(path))
             listbox.insert(tk.END, path)
+        build_proxies = self.settings.use_proxies and attr in {"videos", "transitions", "spadinner_videos"}
+        threading.Thread(
+            target=self._warm_metadata,
+            args=([Path(path) for path in paths], build_proxies, attr == "audio"),
+            daemon=True,
+        ).start()
+
+    def _warm_metadata(self, paths: List[Path], build_proxies: bool = False, analyze_beats: bool = False) -> None:
+        cache = MetadataCache.for_settings(self.settings.temp_dir, self.tools.ffprobe)
+        cache.probe_all(paths)
+        cache.save()
+        if build_proxies:
+            job = RenderJob(Path(), self.sources, self.settings, self.effects, self.tools)
+            proxies = ProxyManager.for_job(job, self._background_runner)
+            proxies.build_all(paths)
+            proxies.shutdown()
+        if analyze_beats:
+            BeatCache.for_settings(self.settings.temp_dir, self.tools.ffmpeg, self._background_runner).build_all(paths)
 
     def _remove_selected(self, attr: str) -> None:
         listbox = getattr(self, f"{attr}_listbox")
@@ -146,9 +196,21 @@ class YTPPlusDeluxeApp(tk.Tk):
             self.sources.urls.pop(index)
 
     def _refresh_assets_box(self) -> None:
+        """Show the folders with the counts from the last scan, then rescan them in the background."""
+        index = AssetIndex.for_settings(self.settings, self.tools.ffprobe)
+        self._show_asset_counts(index.counts())
+
+        def scan() -> None:
+            index.refresh()
+            self._ui_queue.put(("assets", index.counts()))
+
+        threading.Thread(target=scan, daemon=True).start()
+
+    def _show_asset_counts(self, counts: dict) -> None:
         self.assets_box.delete("1.0", tk.END)
         for key, value in ASSET_FOLDERS.items():
-            self.assets_box.insert(tk.END, f"{key}: {Path(self.settings.resources_dir) / value}\n")
+            path = Path(self.settings.resources_dir) / value
+            self.assets_box.insert(tk.END, f"{key}: {path} ({counts.get(key, 0)} files)\n")
 
     def _build_effects_tab(self) -> None:
         canvas = tk.Canvas(self.effects_frame)
@@ -195,6 +257,8 @@ class YTPPlusDeluxeApp(tk.Tk):
             ("Clip Count", "clip_count"),
             ("Width", "width"),
             ("Height", "height"),
+            ("FPS", "fps"),
+            ("Sample Rate", "sample_rate"),
             ("Min Stream Duration", "min_stream_duration"),
             ("Max Stream Duration", "max_stream_duration"),
             ("Min Clip Duration", "min_clip_duration"),
@@ -205,6 +269,10 @@ class YTPPlusDeluxeApp(tk.Tk):
             ("Recall Number", "recall_number"),
             ("Remixes Number", "remixes_number"),
             ("AutoYTP Number", "autoytp_number"),
+            ("Render Workers", "render_workers"),
+            ("Render Cache MB", "render_cache_mb"),
+            ("Proxy Scale", "proxy_scale"),
+            ("Workspace MB", "workspace_mb"),
         ]
         self.setting_vars = {}
         for label, attr in setting_fields:
@@ -216,11 +284,15 @@ class YTPPlusDeluxeApp(tk.Tk):
                 "clip_count",
                 "width",
                 "height",
+                "sample_rate",
                 "effects_per_clip",
                 "temp_number",
                 "recall_number",
                 "remixes_number",
                 "autoytp_number",
+                "render_workers",
+                "render_cache_mb",
+                "workspace_mb",
             }:
                 var = tk.IntVar(value=getattr(self.settings, attr))
             self.setting_vars[attr] = var
@@ -243,6 +315,8 @@ class YTPPlusDeluxeApp(tk.Tk):
         self.cut_audio_var = tk.BooleanVar(value=self.settings.cut_audio)
         self.sound_sync_var = tk.BooleanVar(value=self.settings.sound_sync_mode)
         self.insert_spadinner_var = tk.BooleanVar(value=self.settings.insert_spadinner)
+        self.use_proxies_var = tk.BooleanVar(value=self.settings.use_proxies)
+        self.normalize_sources_var = tk.BooleanVar(value=self.settings.normalize_sources)
         ttk.Checkbutton(toggle_frame, text="Insert Transitions", variable=self.insert_transitions_var).pack(side=tk.LEFT)
         ttk.Checkbutton(toggle_frame, text="Insert Intro", variable=self.insert_intro_var).pack(side=tk.LEFT)
         ttk.Checkbutton(toggle_frame, text="Insert Outro", variable=self.insert_outro_var).pack(side=tk.LEFT)
@@ -254,6 +328,10 @@ class YTPPlusDeluxeApp(tk.Tk):
         ttk.Checkbutton(toggle_frame, text="Insert Spadinner Clips", variable=self.insert_spadinner_var).pack(
             side=tk.LEFT
         )
+        ttk.Checkbutton(toggle_frame, text="Use Proxies", variable=self.use_proxies_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(toggle_frame, text="Normalize Sources", variable=self.normalize_sources_var).pack(
+            side=tk.LEFT
+        )
 
         intro_row = ttk.Frame(frame)
         intro_row.pack(fill=tk.X, padx=10, pady=5)
@@ -269,9 +347,16 @@ class YTPPlusDeluxeApp(tk.Tk):
         ttk.Entry(outro_row, textvariable=self.outro_var, width=60).pack(side=tk.LEFT)
         ttk.Button(outro_row, text="Browse", command=self._browse_outro).pack(side=tk.LEFT, padx=4)
 
+        metrics_row = ttk.Frame(frame)
+        metrics_row.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(metrics_row, text="Metrics File (.prom)", width=22).pack(side=tk.LEFT)
+        self.metrics_path_var = tk.StringVar(value=self.settings.metrics_path)
+        ttk.Entry(metrics_row, textvariable=self.metrics_path_var, width=60).pack(side=tk.LEFT)
+
         path_fields = [
             ("Sources Dir", "source_dir"),
             ("Temp Dir", "temp_dir"),
+            ("Workspace Dir", "workspace_dir"),
             ("Sounds Dir", "sounds_dir"),
             ("Music Dir", "music_dir"),
             ("Resources Dir", "resources_dir"),
@@ -308,6 +393,14 @@ class YTPPlusDeluxeApp(tk.Tk):
         self.project_type_var = tk.StringVar(value=self.settings.project_type)
         ttk.Combobox(project_row, values=PROJECT_TYPES, textvariable=self.project_type_var, width=20).pack(side=tk.LEFT)
 
+        engine_row = ttk.Frame(frame)
+        engine_row.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(engine_row, text="Render Engine", width=22).pack(side=tk.LEFT)
+        self.render_engine_var = tk.StringVar(value=self.settings.render_engine)
+        ttk.Combobox(
+            engine_row, values=RENDER_ENGINES, textvariable=self.render_engine_var, width=20, state="readonly"
+        ).pack(side=tk.LEFT)
+
         ttk.Button(frame, text="Reset to Defaults", command=self._reset_defaults).pack(pady=10)
 
     def _build_render_tab(self) -> None:
@@ -323,6 +416,21 @@ class YTPPlusDeluxeApp(tk.Tk):
         self.render_log = tk.Text(frame, height=18)
         self.render_log.pack(fill=tk.BOTH, expand=True, padx=10)
 
+        progress_row = ttk.Frame(frame)
+        progress_row.pack(fill=tk.X, padx=10, pady=(5, 0))
+        self.progress_var = tk.StringVar(value="Idle")
+        ttk.Label(progress_row, textvariable=self.progress_var).pack(side=tk.LEFT)
+        ttk.Button(progress_row, text="Cancel Render", command=self._cancel_render).pack(side=tk.RIGHT)
+        self.draft_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(progress_row, text="Draft (Proxies)", variable=self.draft_var).pack(side=tk.RIGHT, padx=8)
+        self.profile_var = tk.StringVar(value="final")
+        ttk.Combobox(
+            progress_row, values=list(ENCODER_PROFILES), textvariable=self.profile_var, width=12, state="readonly"
+        ).pack(side=tk.RIGHT)
+        ttk.Label(progress_row, text="Profile").pack(side=tk.RIGHT, padx=4)
+        self.keep_plan_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(progress_row, text="Keep Plan", variable=self.keep_plan_var).pack(side=tk.RIGHT, padx=8)
+
         action_frame = ttk.Frame(frame)
         action_frame.pack(fill=tk.X, pady=10)
         ttk.Button(action_frame, text="Preview First Video", command=self._preview_first).pack(side=tk.LEFT, padx=4)
@@ -330,6 +438,10 @@ class YTPPlusDeluxeApp(tk.Tk):
         ttk.Button(action_frame, text="Render (Stub)", command=self._render_stub).pack(side=tk.LEFT, padx=4)
         ttk.Button(action_frame, text="Create Video", command=self._create_video).pack(side=tk.LEFT, padx=4)
         ttk.Button(action_frame, text="Render 2 (Concat)", command=self._render_v2).pack(side=tk.LEFT, padx=4)
+        ttk.Button(action_frame, text="Render 3 (Timeline)", command=self._render_timeline).pack(side=tk.LEFT, padx=4)
+        ttk.Button(action_frame, text="Render Batch", command=self._render_batch).pack(side=tk.LEFT, padx=4)
+        ttk.Button(action_frame, text="Queue Render", command=self._queue_render).pack(side=tk.LEFT, padx=4)
+        ttk.Button(action_frame, text="Run Queue", command=self._run_queue).pack(side=tk.LEFT, padx=4)
         ttk.Button(action_frame, text="Render Preview", command=self._render_preview).pack(side=tk.LEFT, padx=4)
 
     def _browse_intro(self) -> None:
@@ -366,14 +478,18 @@ class YTPPlusDeluxeApp(tk.Tk):
         self.cut_audio_var.set(self.settings.cut_audio)
         self.sound_sync_var.set(self.settings.sound_sync_mode)
         self.insert_spadinner_var.set(self.settings.insert_spadinner)
+        self.use_proxies_var.set(self.settings.use_proxies)
+        self.normalize_sources_var.set(self.settings.normalize_sources)
         self.ytp_effects_name_var.set(self.settings.ytp_effects_name)
         self.intro_var.set(self.settings.intro_path)
+        self.metrics_path_var.set(self.settings.metrics_path)
         self.outro_var.set(self.settings.outro_path)
         for attr, var in self.path_vars.items():
             var.set(getattr(self.settings, attr))
         for attr, var in self.tool_vars.items():
             var.set(getattr(self.tools, attr))
         self.project_type_var.set(self.settings.project_type)
+        self.render_engine_var.set(self.settings.render_engine)
         self._refresh_assets_box()
         for key, config in DEFAULT_EFFECTS.items():
             self.effect_vars[key].set(config.enabled)
@@ -396,10 +512,14 @@ class YTPPlusDeluxeApp(tk.Tk):
         self.settings.cut_audio = self.cut_audio_var.get()
         self.settings.sound_sync_mode = self.sound_sync_var.get()
         self.settings.insert_spadinner = self.insert_spadinner_var.get()
+        self.settings.use_proxies = self.use_proxies_var.get()
+        self.settings.normalize_sources = self.normalize_sources_var.get()
         self.settings.ytp_effects_name = self.ytp_effects_name_var.get()
         self.settings.intro_path = self.intro_var.get()
         self.settings.outro_path = self.outro_var.get()
+        self.settings.metrics_path = self.metrics_path_var.get()
         self.settings.project_type = self.project_type_var.get()
+        self.settings.render_engine = self.render_engine_var.get()
 
         for attr, var in self.path_vars.items():
             setattr(self.settings, attr, var.get())
@@ -415,6 +535,9 @@ class YTPPlusDeluxeApp(tk.Tk):
     def _build_job(self) -> RenderJob:
         self._sync_models()
         ensure_directories(self.settings)
+        if not self.keep_plan_var.get():
+            # A kept plan reuses the last seed so re-renders only redo what changed.
+            self._plan_seed = random.randrange(2**32)
         return RenderJob(
             output_path=Path(self.settings.temp_dir) / "tempoutput.mp4",
             sources=self.sources,
@@ -422,6 +545,9 @@ class YTPPlusDeluxeApp(tk.Tk):
             effects=self.effects,
             tool_paths=self.tools,
             notes="Generated via Tkinter GUI",
+            seed=self._plan_seed,
+            draft=self.draft_var.get(),
+            profile=self.profile_var.get(),
         )
 
     def _preview_first(self) -> None:
@@ -444,71 +570,226 @@ class YTPPlusDeluxeApp(tk.Tk):
         generator.export_plan(output_path)
         self._log(f"Plan exported to {output_path}")
 
-    def _render_stub(self) -> None:
-        job = self._build_job()
-        generator = YTPGenerator(job)
-        if not self.sources.videos:
-            messagebox.showwarning("Render", "Add at least one video source to render.")
+    def _make_runner(self) -> FFmpegRunner:
+        return FFmpegRunner(on_progress=lambda progress: self._ui_queue.put(("progress", progress)))
+
+    def _make_generator(self, job: RenderJob) -> YTPGenerator:
+        return YTPGenerator(job, self._make_runner())
+
+    def _run_in_background(
+        self,
+        title: str,
+        work: Callable[[], None],
+        generator: Optional[YTPGenerator] = None,
+        runner: Optional[FFmpegRunner] = None,
+    ) -> None:
+        """Run ``work`` on the render thread; Cancel Render then stops ``runner`` (default: the generator's)."""
+        if self._render_thread is not None and self._render_thread.is_alive():
+            # Keep self._runner pointing at the running render so it can still be cancelled.
+            messagebox.showwarning(title, "A render is already running.")
+            if generator is not None:
+                generator.close()
             return
-        if len(self.sources.videos) > 1:
-            result = generator.render_concat(self.sources.videos, job.output_path)
-        else:
-            result = generator.render(self.sources.videos[0], job.output_path)
-        self._log(f"FFmpeg exit code: {result.returncode}")
+
+        def target() -> None:
+            try:
+                work()
+            except Exception as exc:
+                self._log(f"{title} failed: {exc}")
+            finally:
+                if generator is not None:
+                    generator.close()
+                self._ui_queue.put(("done", title))
+
+        self.progress_var.set(f"{title} running...")
+        self._runner = runner or (generator.runner if generator is not None else None)
+        self._render_thread = threading.Thread(target=target, daemon=True)
+        self._render_thread.start()
+
+    def _cancel_render(self) -> None:
+        if self._render_thread is None or not self._render_thread.is_alive() or self._runner is None:
+            return
+        self._runner.cancel()
+        self._log("Cancelling render...")
+
+    def _poll_ui_queue(self) -> None:
+        try:
+            while True:
+                kind, payload = self._ui_queue.get_nowait()
+                if kind == "log":
+                    self._log(payload)
+                elif kind == "progress":
+                    self.progress_var.set(payload.summary())
+                elif kind == "done":
+                    self.progress_var.set(f"{payload} finished.")
+                elif kind == "assets":
+                    self._show_asset_counts(payload)
+        except queue.Empty:
+            pass
+        self.after(100, self._poll_ui_queue)
+
+    def _log_result(self, result: subprocess.CompletedProcess) -> None:
         if result.stdout:
             self._log(result.stdout)
         if result.stderr:
             self._log(result.stderr)
 
+    def _render_stub(self) -> None:
+        job = self._build_job()
+        generator = self._make_generator(job)
+        if not self.sources.videos:
+            messagebox.showwarning("Render", "Add at least one video source to render.")
+            return
+        videos = list(self.sources.videos)
+
+        def work() -> None:
+            if len(videos) > 1:
+                result = generator.render_concat(videos, job.output_path)
+            else:
+                result = generator.render(videos[0], job.output_path)
+            self._log(f"FFmpeg exit code: {result.returncode}")
+            self._log_notes(generator)
+            self._log_result(result)
+
+        self._run_in_background("Render", work, generator)
+
     def _create_video(self) -> None:
         job = self._build_job()
-        generator = YTPGenerator(job)
+        generator = self._make_generator(job)
         if not self.sources.videos:
             messagebox.showwarning("Create Video", "Add at least one video source to render.")
             return
         output_path = Path(self.settings.temp_dir) / "ytp_output.mp4"
-        if len(self.sources.videos) > 1:
-            result = generator.render_concat(self.sources.videos, output_path)
-        else:
-            result = generator.render(self.sources.videos[0], output_path)
-        self._log(f"Create video exit code: {result.returncode}")
-        self._log(f"Output: {output_path}")
-        if result.stdout:
-            self._log(result.stdout)
-        if result.stderr:
-            self._log(result.stderr)
+        videos = list(self.sources.videos)
+
+        def work() -> None:
+            if len(videos) > 1:
+                result = generator.render_concat(videos, output_path)
+            else:
+                result = generator.render(videos[0], output_path)
+            self._log(f"Create video exit code: {result.returncode}")
+            self._log_notes(generator)
+            self._log(f"Output: {output_path}")
+            self._log_result(result)
+
+        self._run_in_background("Create Video", work, generator)
 
     def _render_v2(self) -> None:
         job = self._build_job()
-        generator = YTPGenerator(job)
+        generator = self._make_generator(job)
         if not self.sources.videos:
             messagebox.showwarning("Render 2", "Add at least one video source to render.")
             return
         output_path = Path(self.settings.temp_dir) / "ytp_output_v2.mp4"
-        result = generator.render_v2(self.sources.videos, output_path)
-        self._log(f"Render 2 exit code: {result.returncode}")
-        self._log(f"Output: {output_path}")
-        if result.stdout:
-            self._log(result.stdout)
-        if result.stderr:
-            self._log(result.stderr)
+        videos = list(self.sources.videos)
+
+        def work() -> None:
+            result = generator.render_v2(videos, output_path)
+            self._log(f"Render 2 exit code: {result.returncode}")
+            self._log_notes(generator)
+            self._log(f"Output: {output_path}")
+            self._log_result(result)
+
+        self._run_in_background("Render 2", work, generator)
+
+    def _render_timeline(self) -> None:
+        job = self._build_job()
+        generator = self._make_generator(job)
+        if not self.sources.videos:
+            messagebox.showwarning("Render 3", "Add at least one video source to render.")
+            return
+        engine = self.settings.render_engine
+        output_path = Path(self.settings.temp_dir) / f"ytp_output_{engine}.mp4"
+
+        def work() -> None:
+            result = generator.render_timeline(output_path, engine, on_segment=self._log_segment)
+            self._log(f"Render 3 ({engine}) exit code: {result.returncode}")
+            self._log_notes(generator)
+            self._log(f"Output: {output_path}")
+            if result.stderr:
+                self._log(result.stderr)
+
+        self._run_in_background("Render 3", work, generator)
+
+    def _render_batch(self) -> None:
+        job = self._build_job()
+        generator = self._make_generator(job)
+        if not self.sources.videos:
+            messagebox.showwarning("Render Batch", "Add at least one video source to render.")
+            return
+        if self.settings.autoytp_number <= 0 and self.settings.remixes_number <= 0:
+            messagebox.showwarning("Render Batch", "Set AutoYTP Number or Remixes Number on the Settings tab.")
+            return
+        output_path = Path(self.settings.temp_dir) / "ytp_batch.mp4"
+
+        def work() -> None:
+            variants = plan_variants(generator, output_path)
+            generator.render_variants(variants, on_segment=self._log_segment, on_variant=self._log_variant)
+            self._log_notes(generator)
+
+        self._run_in_background("Render Batch", work, generator)
+
+    def _queue_render(self) -> None:
+        if not self.sources.videos:
+            messagebox.showwarning("Queue Render", "Add at least one video source to render.")
+            return
+        job = self._build_job()
+        job.output_path = Path(self.settings.temp_dir) / f"ytp_output_{time.strftime('%Y%m%d_%H%M%S')}.mp4"
+        job_id = JobQueue.for_settings(self.settings).enqueue(job)
+        self._log(f"Queued job #{job_id}: {job.output_path}")
+
+    def _run_queue(self) -> None:
+        self._sync_models()
+        job_queue = JobQueue.for_settings(self.settings)
+        runner = self._make_runner()
+
+        def work() -> None:
+            finished = run_queue(job_queue, runner, self._log_segment, self._log)
+            self._log(f"Queue: {finished} jobs finished.")
+            for queued in job_queue.jobs(("queued", "running", "failed")):
+                self._log(queued.summary())
+
+        self._run_in_background("Run Queue", work, runner=runner)
+
+    def _log_variant(self, result: VariantResult) -> None:
+        if result.skipped:
+            self._log(f"{result.variant.name}: up to date ({result.variant.output_path})")
+            return
+        code = result.render.returncode if result.render is not None else "none"
+        failed = len(result.failed)
+        self._log(f"{result.variant.name}: exit {code}, {failed} failed segments ({result.variant.output_path})")
+
+    def _log_segment(self, result: SegmentResult) -> None:
+        status = "cached" if result.cached else "ok" if result.ok else f"failed (exit {result.returncode})"
+        self._log(f"Segment {result.segment.index}: {status} in {result.elapsed:.1f}s")
+        if not result.ok and result.stderr:
+            self._log(result.stderr.strip().splitlines()[-1])
 
     def _render_preview(self) -> None:
         job = self._build_job()
-        generator = YTPGenerator(job)
+        generator = self._make_generator(job)
         if not self.sources.videos:
             messagebox.showwarning("Render Preview", "Add at least one video source to render.")
             return
-        result = generator.render_preview(self.sources.videos[0])
-        preview_path = Path(self.settings.temp_dir) / "preview.mp4"
-        self._log(f"Render preview exit code: {result.returncode}")
-        self._log(f"Preview output: {preview_path}")
-        if result.stdout:
-            self._log(result.stdout)
-        if result.stderr:
-            self._log(result.stderr)
+        source = self.sources.videos[0]
+
+        def work() -> None:
+            preview_path = generator.workspace.file("preview.mp4")
+            result = generator.render_preview(source, output_path=preview_path)
+            self._log(f"Render preview exit code: {result.returncode}")
+            self._log(f"Preview output: {preview_path}")
+            self._log_result(result)
+
+        self._run_in_background("Render Preview", work, generator)
+
+    def _log_notes(self, generator: YTPGenerator) -> None:
+        for note in generator.render_notes:
+            self._log(note)
 
     def _log(self, message: str) -> None:
+        if threading.current_thread() is not threading.main_thread():
+            self._ui_queue.put(("log", message))
+            return
         self.render_log.insert(tk.END, f"{message}\n")
         self.render_log.see(tk.END)
 
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from Main import YTPPlusDeluxeApp
+import sys
 
 
 def main() -> None:
+    # Any command-line arguments select the headless CLI; tkinter is only
+    # imported when the GUI is actually launched.
+    if len(sys.argv) > 1:
+        from ytpplus.CommandLine import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from Main import YTPPlusDeluxeApp
+
     app = YTPPlusDeluxeApp()
     app.mainloop()
 
@@ -0,0 +1,281 @@
+"""Reproducible benchmarks for planning, command building and rendering.
+
+Run from the repository root:
+
+    python benchmarks/bench_ytpplus.py                 # full suite
+    python benchmarks/bench_ytpplus.py --quick         # smaller sizes
+    python benchmarks/bench_ytpplus.py --compare old.json new.json
+
+Synthetic sources are generated with ffmpeg lavfi (testsrc + sine). When
+ffmpeg is not installed, a fake ffmpeg/ffprobe stand-in is used so the
+Python side of the render path can still be timed. Results are written as
+JSON (default: benchmarks/results/<commit>.json).
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from ytpplus.EffectsFactory import EffectsFactory
+from ytpplus.Utilities import (
+    DEFAULT_EFFECTS,
+    ProjectSettings,
+    RenderJob,
+    SourceLibrary,
+    ToolPaths,
+    load_default_effects,
+)
+from ytpplus.YTPGenerator import YTPGenerator
+
+FAKE_TOOL = '''
+import json, sys
+tool, args = sys.argv[1], sys.argv[2:]
+if tool == "ffprobe":
+    print(json.dumps({
+        "streams": [
+            {"codec_type": "video", "codec_name": "h264", "width": 320, "height": 240,
+             "pix_fmt": "yuv420p", "time_base": "1/12800", "r_frame_rate": "25/1"},
+            {"codec_type": "audio", "codec_name": "aac", "sample_rate": "48000",
+             "channels": 2, "channel_layout": "stereo", "time_base": "1/48000"},
+        ],
+        "format": {"duration": "5.0", "format_name": "mov,mp4,m4a,3gp,3g2,mj2"},
+        "packets": [],
+    }))
+    sys.exit(0)
+if "-progress" in args:
+    print("frame=1\\nfps=0.0\\nspeed=1.0x\\nout_time_us=0\\nprogress=end", flush=True)
+output = args[-1]
+if output not in ("-", "pipe:1") and not output.startswith("-"):
+    with open(output, "wb") as handle:
+        handle.write(b"fake")
+'''
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=False, capture_output=True, text=True
+        )
+    except OSError:
+        return "unknown"
+    return result.stdout.strip() or "unknown"
+
+
+def install_fake_tools(folder: Path) -> ToolPaths:
+    script = folder / "fake_tool.py"
+    script.write_text(FAKE_TOOL, encoding="utf-8")
+    tools = {}
+    for name in ("ffmpeg", "ffprobe"):
+        if sys.platform == "win32":
+            wrapper = folder / f"{name}.cmd"
+            wrapper.write_text(f'@"{sys.executable}" "{script}" {name} %*\n', encoding="utf-8")
+        else:
+            wrapper = folder / name
+            wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" {name} "$@"\n', encoding="utf-8")
+            wrapper.chmod(0o755)
+        tools[name] = str(wrapper)
+    return ToolPaths(ffmpeg=tools["ffmpeg"], ffprobe=tools["ffprobe"])
+
+
+def make_sources(folder: Path, count: int, tools: ToolPaths, real: bool) -> List[Path]:
+    sources = []
+    for index in range(count):
+        path = folder / f"source_{index:03d}.mp4"
+        if real:
+            subprocess.run(
+                [
+                    tools.ffmpeg, "-v", "error", "-y",
+                    "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25:duration=5",
+                    "-f", "lavfi", "-i", f"sine=frequency={220 + 40 * index}:duration=5",
+                    "-shortest", "-pix_fmt", "yuv420p", str(path),
+                ],
+                check=True,
+            )
+        else:
+            path.write_bytes(b"fake")
+        sources.append(path)
+    return sources
+
+
+def effects_with(count: int) -> dict:
+    effects = load_default_effects()
+    for index, config in enumerate(effects.values()):
+        config.enabled = index < count
+    return effects
+
+
+def make_job(
+    work: Path, sources: List[Path], tools: ToolPaths, clips: int, effect_count: int, force: bool = True
+) -> RenderJob:
+    # Forced by default so repeats render instead of hitting the incremental skip.
+    settings = ProjectSettings(clip_count=clips, temp_dir=str(work / "temp"), render_cache_mb=0)
+    return RenderJob(
+        output_path=work / "out.mp4",
+        sources=SourceLibrary(videos=list(sources)),
+        settings=settings,
+        effects=effects_with(effect_count),
+        tool_paths=tools,
+        seed=1234,
+        force=force,
+    )
+
+
+class Suite:
+    def __init__(self, repeat: int) -> None:
+        self.repeat = repeat
+        self.results: List[dict] = []
+
+    def time(
+        self, name: str, params: Dict[str, object], func: Callable[[], object], repeat: Optional[int] = None
+    ) -> None:
+        samples = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+        record = {
+            "name": name,
+            "params": params,
+            "repeat": len(samples),
+            "min_s": min(samples),
+            "median_s": statistics.median(samples),
+            "mean_s": statistics.fmean(samples),
+        }
+        self.results.append(record)
+        label = ", ".join(f"{key}={value}" for key, value in params.items())
+        print(f"{name:<22} {label:<32} median {record['median_s'] * 1000:10.2f} ms", flush=True)
+
+
+def run_suite(args: argparse.Namespace) -> dict:
+    real = shutil.which("ffmpeg") is not None and not args.fake_ffmpeg
+    clip_counts = [20, 200] if args.quick else [20, 200, 2000, 20000]
+    effect_counts = [0, 10, len(DEFAULT_EFFECTS)]
+    render_clips = [2, 5] if args.quick else [2, 5, 10, 20]
+    suite = Suite(args.repeat)
+
+    with tempfile.TemporaryDirectory(prefix="ytpplus-bench-") as tmp:
+        work = Path(tmp)
+        tools = ToolPaths() if real else install_fake_tools(work)
+        sources = make_sources(work, max(render_clips), tools, real)
+
+        for effect_count in effect_counts:
+            factory = EffectsFactory(effects_with(effect_count))
+            suite.time("effects_build", {"effects": effect_count}, factory.build)
+            for clips in clip_counts:
+                suite.time(
+                    "effects_select_batch",
+                    {"effects": effect_count, "clips": clips},
+                    functools.partial(factory.select_batch, clips, seed=1, effects_per_clip=2),
+                )
+
+        for clips in clip_counts:
+            for effect_count in effect_counts:
+                generator = YTPGenerator(make_job(work, sources[:3], tools, clips, effect_count))
+                generator.plan_timeline()  # warm the probe cache
+                params = {"clips": clips, "effects": effect_count}
+                suite.time("generate_plan", params, generator.generate_plan)
+                suite.time("export_plan", params, functools.partial(generator.export_plan, work / "plan.json"))
+
+        for clips in clip_counts:
+            generator = YTPGenerator(make_job(work, sources, tools, clips, 0))
+            inputs = [sources[index % len(sources)] for index in range(clips)]
+            suite.time(
+                "write_concat_file",
+                {"inputs": clips},
+                functools.partial(generator._write_concat_file, inputs, work / "concat.txt"),
+            )
+
+        for clips in render_clips:
+            for effect_count in (0, 10):
+                generator = YTPGenerator(make_job(work, sources[:clips], tools, clips, effect_count))
+                params = {"inputs": clips, "effects": effect_count}
+                suite.time(
+                    "render_v2",
+                    params,
+                    functools.partial(generator.render_v2, sources[:clips], work / "render_v2.mp4"),
+                    repeat=args.render_repeat,
+                )
+                # The output is now up to date, so this times only the incremental check.
+                generator = YTPGenerator(make_job(work, sources[:clips], tools, clips, effect_count, force=False))
+                suite.time(
+                    "render_v2_noop",
+                    params,
+                    functools.partial(generator.render_v2, sources[:clips], work / "render_v2.mp4"),
+                    repeat=args.render_repeat,
+                )
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+            "ffmpeg": "real" if real else "fake",
+        },
+        "results": suite.results,
+    }
+
+
+def compare(old_path: Path, new_path: Path, threshold: float) -> int:
+    """Print median ratios between two result files; exit 1 on regressions."""
+    old = json.loads(old_path.read_text(encoding="utf-8"))
+    new = json.loads(new_path.read_text(encoding="utf-8"))
+
+    def key(record: dict) -> tuple:
+        return record["name"], json.dumps(record["params"], sort_keys=True)
+
+    baseline = {key(record): record for record in old["results"]}
+    regressions = 0
+    for record in new["results"]:
+        before = baseline.get(key(record))
+        if before is None or before["median_s"] <= 0:
+            continue
+        ratio = record["median_s"] / before["median_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{record['name']:<22} {key(record)[1]:<40} {ratio:6.2f}x {flag}")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Use smaller sizes.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per micro-benchmark.")
+    parser.add_argument("--render-repeat", type=int, default=2, help="Repetitions per render benchmark.")
+    parser.add_argument("--fake-ffmpeg", action="store_true", help="Use the stand-in even if ffmpeg exists.")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/<commit>.json).")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"), help="Compare two result files.")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    report = run_suite(args)
+    output = args.output or ROOT / "benchmarks" / "results" / f"{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
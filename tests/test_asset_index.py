@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import numpy as np
+
+from ytpplus.AssetIndex import EFFECT_ASSETS, AssetIndex
+from ytpplus.EffectsFactory import OVERLAY_SLOTS
+from ytpplus.Utilities import ASSET_FOLDERS
+
+
+def test_every_overlay_effect_has_visual_folders():
+    known = set(ASSET_FOLDERS) | {"project_sounds"}
+    for effect in OVERLAY_SLOTS:
+        assert EFFECT_ASSETS.get(effect, {}).get("visual"), effect
+        for folders in EFFECT_ASSETS[effect].values():
+            assert set(folders) <= known, effect
+
+
+def test_rainbow_picks_from_rainbow_folder(tmp_path: Path):
+    folder = tmp_path / "rainbow"
+    folder.mkdir()
+    (folder / "arc.png").write_bytes(b"png")
+    index = AssetIndex(tmp_path / "assets.json", {"rainbow": folder, "images": tmp_path / "images"})
+    index.refresh(workers=1)
+    picked = index.pick("rainbow", np.random.default_rng(0))
+    assert [asset.path.name for asset in picked] == ["arc.png"]
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .MediaProbe import probe_media
+from .Utilities import ASSET_FOLDERS, AUDIO_EXTENSIONS, VIDEO_EXTENSIONS
+
+# Bump when the manifest layout changes so old manifests are rebuilt.
+MANIFEST_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+GIF_EXTENSIONS = (".gif",)
+
+# Folders picked from by each overlay effect, per role. Every folder in a
+# role is equally likely, however many files it holds.
+EFFECT_ASSETS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "random_sound": {"audio": ("project_sounds", "sounds", "meme_sounds")},
+    "meme_injection": {"visual": ("memes",), "audio": ("meme_sounds",)},
+    "explosion_spam": {"visual": ("overlay_videos",)},
+    "overlay_plus_three": {"visual": ("images", "memes")},
+    "squidward": {"visual": ("images",)},
+    "spadinner": {"visual": ("spadinner",), "audio": ("spadinner_sounds",)},
+    "rainbow": {"visual": ("rainbow",)},
+}
+
+
+def asset_kind(name: str) -> Optional[str]:
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix in AUDIO_EXTENSIONS:
+        return "audio"
+    if suffix in VIDEO_EXTENSIONS:
+        return "video"
+    if suffix in GIF_EXTENSIONS:
+        return "gif"
+    if suffix in IMAGE_EXTENSIONS:
+        return "image"
+    return None
+
+
+@dataclass
+class Asset:
+    path: Path
+    folder: str
+    kind: str
+    size: int
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+
+
+class AliasTable:
+    """Vose alias table: O(n) to build, O(1) per weighted pick."""
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        weights = np.asarray(weights, dtype=np.float64)
+        count = len(weights)
+        total = weights.sum()
+        if count == 0 or total <= 0:
+            raise ValueError("An alias table needs at least one positive weight.")
+        scaled = weights * (count / total)
+        self.prob = np.ones(count, dtype=np.float64)
+        self.alias = np.arange(count, dtype=np.int64)
+        small = [int(index) for index in np.flatnonzero(scaled < 1.0)]
+        large = [int(index) for index in np.flatnonzero(scaled >= 1.0)]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Leftovers are 1.0 up to rounding error and keep prob 1.
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def pick(self, rng: np.random.Generator, size: Optional[int] = None):
+        """Return one index (or an array of ``size`` indexes) drawn by weight."""
+        column = rng.integers(0, len(self.prob), size)
+        keep = rng.random(size) < self.prob[column]
+        return np.where(keep, column, self.alias[column])
+
+
+class AssetPool:
+    """Assets of one effect role with an alias table over their weights."""
+
+    def __init__(self, assets: List[Asset], weights: Sequence[float]) -> None:
+        self.assets = assets
+        self.table = AliasTable(weights) if assets else None
+
+    def __len__(self) -> int:
+        return len(self.assets)
+
+    def pick(self, rng: np.random.Generator, count: int = 1) -> List[Asset]:
+        if self.table is None or count <= 0:
+            return []
+        return [self.assets[index] for index in self.table.pick(rng, count).tolist()]
+
+
+class AssetIndex:
+    """Persistent index of the resource folders in ``<temp>/cache/assets.json``.
+
+    Folders are walked concurrently with ``os.scandir``. A directory whose
+    mtime matches the manifest is not listed again, so an unchanged pack
+    costs one ``stat`` per directory. Editing a file in place does not
+    touch its directory's mtime; ``refresh(full=True)`` rescans everything.
+    Media files are probed once for duration and frame size; files ffprobe
+    cannot read stay in the manifest but are never picked.
+    """
+
+    def __init__(self, manifest_file: Path, folders: Dict[str, Path], ffprobe: str = "ffprobe") -> None:
+        self.manifest_file = manifest_file
+        self.folders = folders
+        self.ffprobe = ffprobe
+        self.errors: Dict[str, str] = {}
+        self._dirs: Dict[str, dict] = self._load()
+        self._assets: Optional[Dict[str, List[Asset]]] = None
+        self._pools: Dict[Tuple[str, str], AssetPool] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, settings, ffprobe: str = "ffprobe") -> "AssetIndex":
+        base = Path(settings.resources_dir)
+        folders = {key: base / name for key, name in ASSET_FOLDERS.items()}
+        folders["project_sounds"] = Path(settings.sounds_dir)
+        return cls(Path(settings.temp_dir) / "cache" / "assets.json", folders, ffprobe)
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            data = json.loads(self.manifest_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data.get("dirs", {}) if data.get("version") == MANIFEST_VERSION else {}
+
+    def _scan_dir(self, path: str, full: bool) -> Tuple[dict, bool]:
+        """Return the manifest entry for ``path`` and whether it was listed again."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}, True
+        previous = self._dirs.get(path)
+        if previous is not None and previous["mtime_ns"] == mtime_ns and not full:
+            return previous, False
+        old_files = previous["files"] if previous else {}
+        files: Dict[str, dict] = {}
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                        continue
+                    kind = asset_kind(entry.name)
+                    if kind is None or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    old = old_files.get(entry.name)
+                    if old is not None and (old["size"], old["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                        files[entry.name] = old
+                    else:
+                        files[entry.name] = {"kind": kind, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        except OSError as exc:
+            self.errors[path] = str(exc)
+        return {"mtime_ns": mtime_ns, "files": files, "dirs": sorted(subdirs)}, True
+
+    def refresh(self, workers: Optional[int] = None, full: bool = False, probe: bool = True) -> int:
+        """Rescan changed directories and probe new files; return how many directories were listed."""
+        workers = max(1, workers or min(32, (os.cpu_count() or 1) * 4))
+        roots = {str(folder.resolve()) for folder in self.folders.values() if folder.is_dir()}
+        scanned: Dict[str, dict] = {}
+        listed = 0
+        unprobed: List[tuple] = []
+        seen = set(roots)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(self._scan_dir, path, full): path for path in roots}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    entry, relisted = future.result()
+                    if not entry:
+                        continue
+                    scanned[path] = entry
+                    listed += relisted
+                    for name in entry["dirs"]:
+                        child = os.path.join(path, name)
+                        if child not in seen:
+                            seen.add(child)
+                            pending[pool.submit(self._scan_dir, child, full)] = child
+            if probe:
+                unprobed = [
+                    (folder, name, meta)
+                    for folder, entry in scanned.items()
+                    for name, meta in entry["files"].items()
+                    if "duration" not in meta
+                ]
+                for (folder, name, meta), info in zip(
+                    unprobed, pool.map(lambda item: self._probe(os.path.join(item[0], item[1])), unprobed)
+                ):
+                    meta.update(info)
+        changed = listed > 0 or bool(unprobed) or scanned.keys() != self._dirs.keys()
+        with self._lock:
+            self._dirs = scanned
+            self._assets = None
+            self._pools.clear()
+        if changed:
+            self.save()
+        return listed
+
+    def _probe(self, path: str) -> dict:
+        if asset_kind(path) == "image":
+            # Stills have no duration; their size is read lazily by whoever scales them.
+            return {"duration": 0.0}
+        try:
+            info = probe_media(self.ffprobe, Path(path))
+        except (OSError, RuntimeError, ValueError) as exc:
+            self.errors[path] = str(exc)
+            return {"duration": 0.0, "error": True}
+        video = info.video
+        return {
+            "duration": round(info.duration, 3),
+            "width": video.width if video else 0,
+            "height": video.height if video else 0,
+        }
+
+    def save(self) -> None:
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.manifest_file.with_name(f"{self.manifest_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        staging.write_text(json.dumps({"version": MANIFEST_VERSION, "dirs": self._dirs}), encoding="utf-8")
+        os.replace(staging, self.manifest_file)
+
+    def assets(self) -> Dict[str, List[Asset]]:
+        """Usable assets per folder key, sorted by path."""
+        with self._lock:
+            if self._assets is None:
+                roots = {key: str(folder.resolve()) for key, folder in self.folders.items()}
+                found: Dict[str, List[Asset]] = {key: [] for key in self.folders}
+                for path, entry in self._dirs.items():
+                    for key, root in roots.items():
+                        if path == root or path.startswith(root + os.sep):
+                            found[key].extend(
+                                Asset(
+                                    Path(path) / name,
+                                    key,
+                                    meta["kind"],
+                                    meta["size"],
+                                    meta.get("duration", 0.0),
+                                    meta.get("width", 0),
+                                    meta.get("height", 0),
+                                )
+                                for name, meta in entry["files"].items()
+                                if meta["size"] > 0 and not meta.get("error")
+                            )
+                for items in found.values():
+                    items.sort(key=lambda asset: str(asset.path))
+                self._assets = found
+            return self._assets
+
+    def counts(self) -> Dict[str, int]:
+        return {key: len(items) for key, items in self.assets().items()}
+
+    def pool(self, effect: str, role: str) -> AssetPool:
+        """Assets for ``effect``'s ``role``, weighted so each non-empty folder is equally likely."""
+        key = (effect, role)
+        with self._lock:
+            cached = self._pools.get(key)
+        if cached is not None:
+            return cached
+        found = self.assets()
+        members: List[Asset] = []
+        weights: List[float] = []
+        for folder in EFFECT_ASSETS.get(effect, {}).get(role, ()):
+            items = found.get(folder, [])
+            if not items:
+                continue
+            members.extend(items)
+            weights.extend([1.0 / len(items)] * len(items))
+        pool = AssetPool(members, weights)
+        with self._lock:
+            self._pools[key] = pool
+        return pool
+
+    def pick(self, effect: str, rng: np.random.Generator, visuals: int = 1) -> List[Asset]:
+        """Pick ``visuals`` visual assets and one sound for ``effect`` (roles it has no folders for are skipped)."""
+        picked: List[Asset] = []
+        for role in EFFECT_ASSETS.get(effect, {}):
+            picked += self.pool(effect, role).pick(rng, visuals if role == "visual" else 1)
+        return picked
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .Timeline import Timeline
+from .Utilities import ClipSegment
+
+VARIANT_KINDS = ("autoytp", "remix")
+
+
+@dataclass
+class Variant:
+    """One output of a batch: ``autoytp`` variants get a fresh plan, ``remix`` ones reorder the base plan."""
+
+    kind: str
+    number: int
+    seed: int
+    output_path: Path
+    segments: List[ClipSegment] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind} {self.number}"
+
+
+@dataclass
+class VariantResult:
+    variant: Variant
+    render: Optional[subprocess.CompletedProcess] = None
+    failed: List[int] = field(default_factory=list)
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.skipped or (self.render is not None and self.render.returncode == 0)
+
+
+def variant_seeds(base_seed: Optional[int], count: int) -> List[int]:
+    """Independent, reproducible 32-bit seeds for ``count`` variants of ``base_seed``."""
+    if count <= 0:
+        return []
+    children = np.random.SeedSequence(base_seed).spawn(count)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def remix_timeline(timeline: Timeline, seed: int) -> Timeline:
+    """Shuffle clip order; each clip keeps its trim, effects and following transition."""
+    order = np.random.default_rng(seed).permutation(len(timeline))
+    columns = {name: array[order] for name, array in timeline.columns.items()}
+    # The last clip never has a transition after it.
+    columns["transition"][-1:] = -1
+    return Timeline(columns)
+
+
+def variant_path(output_path: Path, kind: str, number: int) -> Path:
+    return output_path.with_name(f"{output_path.stem}_{kind}_{number:03d}{output_path.suffix}")
+
+
+def plan_variants(generator, output_path: Path) -> List[Variant]:
+    """Plan ``autoytp_number`` fresh variants and ``remixes_number`` remixes of the job's plan.
+
+    Seeds derive from the job seed, so a seeded batch is reproducible and
+    variant ``n`` keeps its plan when the counts change. ``recall_number``
+    is not a variant count: a recall re-cuts a finished output, so it cannot
+    share the batch's worker pool.
+    """
+    settings = generator.job.settings
+    base_seed = generator.job.seed
+    variants: List[Variant] = []
+    for number, seed in enumerate(variant_seeds(base_seed, settings.autoytp_number), 1):
+        segments = generator.plan_segments(generator.plan_timeline(seed=seed))
+        variants.append(Variant("autoytp", number, seed, variant_path(output_path, "autoytp", number), segments))
+    if settings.remixes_number > 0:
+        base = generator.plan_timeline()
+        # Spawned from a different key than the autoytp seeds so the two never coincide.
+        remix_seeds = variant_seeds(None if base_seed is None else [base_seed, 1], settings.remixes_number)
+        for number, seed in enumerate(remix_seeds, 1):
+            segments = generator.plan_segments(remix_timeline(base, seed))
+            variants.append(Variant("remix", number, seed, variant_path(output_path, "remix", number), segments))
+    return variants
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .FFmpegRunner import FFmpegRunner
+from .MediaStreams import ANALYSIS_RATE, iter_pcm, rms_envelope
+from .RenderCache import RenderCache, file_identity
+
+# Bump when the analysis changes so stale beat grids are rebuilt.
+BEAT_VERSION = 1
+HOP_SECONDS = 0.01
+FLOOR_DB = -60.0
+MIN_BPM = 60.0
+MAX_BPM = 200.0
+# Tempo prior: autocorrelation peaks are weighted by octave distance from this.
+PREFERRED_BPM = 120.0
+ONSET_GAP = 0.05
+
+
+def onset_strength(envelope: np.ndarray, hop_seconds: float = HOP_SECONDS) -> np.ndarray:
+    """Positive loudness flux with its one-second local mean removed."""
+    if not len(envelope):
+        return np.zeros(0)
+    level = np.maximum(20 * np.log10(envelope + 1e-10), FLOOR_DB)
+    flux = np.maximum(np.diff(level, prepend=level[0]), 0.0)
+    window = max(1, int(1.0 / hop_seconds))
+    return np.maximum(flux - np.convolve(flux, np.ones(window) / window, mode="same"), 0.0)
+
+
+def estimate_tempo(strength: np.ndarray, hop_seconds: float = HOP_SECONDS) -> Tuple[float, float]:
+    """Return ``(bpm, period_in_hops)`` from the autocorrelation of ``strength``; 0 if unknown."""
+    min_lag = int(60.0 / (MAX_BPM * hop_seconds))
+    max_lag = int(np.ceil(60.0 / (MIN_BPM * hop_seconds)))
+    if len(strength) < 2 * max_lag or not strength.any():
+        return 0.0, 0.0
+    centered = strength - strength.mean()
+    size = 1 << (2 * len(centered) - 1).bit_length()
+    spectrum = np.fft.rfft(centered, size)
+    correlation = np.fft.irfft(spectrum * np.conj(spectrum), size)[: max_lag + 2]
+    lags = np.arange(min_lag, max_lag + 1)
+    prior = np.exp(-0.5 * np.log2(60.0 / (lags * hop_seconds) / PREFERRED_BPM) ** 2)
+    best = int(lags[np.argmax(correlation[lags] * prior)])
+    before, peak, after = correlation[best - 1 : best + 2]
+    curvature = before - 2 * peak + after
+    period = best + (0.5 * (before - after) / curvature if curvature < 0 else 0.0)
+    return 60.0 / (period * hop_seconds), period
+
+
+def track_beats(strength: np.ndarray, period: float) -> np.ndarray:
+    """Place a beat grid of ``period`` hops at its best phase, then nudge each beat to its local peak."""
+    count = int((len(strength) - 1) // period) + 1
+    if period <= 0 or count < 2:
+        return np.zeros(0, dtype=np.int64)
+    steps = np.arange(count) * period
+    phases = np.arange(int(period))
+    grid = np.minimum(np.round(phases[:, None] + steps[None, :]).astype(np.int64), len(strength) - 1)
+    phase = phases[np.argmax(strength[grid].sum(axis=1))]
+    positions = np.round(phase + steps).astype(np.int64)
+    positions = positions[positions < len(strength)]
+    reach = max(1, int(period * 0.1))
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(strength, reach), 2 * reach + 1)[positions]
+    shift = np.where(windows.max(axis=1) > 0, windows.argmax(axis=1) - reach, 0)
+    return np.clip(positions + shift, 0, len(strength) - 1)
+
+
+def pick_onsets(strength: np.ndarray, hop_seconds: float = HOP_SECONDS) -> np.ndarray:
+    """Return onset times where ``strength`` peaks two deviations above its mean."""
+    if len(strength) < 3:
+        return np.zeros(0)
+    peaks = (
+        (strength > strength.mean() + 2 * strength.std())
+        & (strength >= np.roll(strength, 1))
+        & (strength >= np.roll(strength, -1))
+    )
+    kept: List[float] = []
+    for value in (np.flatnonzero(peaks) * hop_seconds).tolist():
+        if not kept or value - kept[-1] >= ONSET_GAP:
+            kept.append(value)
+    return np.asarray(kept, dtype=np.float64)
+
+
+@dataclass
+class BeatGrid:
+    """Tempo, beat times and onset times (seconds) for one track."""
+
+    bpm: float
+    beats: np.ndarray
+    onsets: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.bpm = float(self.bpm)
+        self.beats = np.asarray(self.beats, dtype=np.float64)
+        self.onsets = np.asarray(self.onsets, dtype=np.float64)
+
+    @property
+    def period(self) -> float:
+        return 60.0 / self.bpm if self.bpm else 0.0
+
+    @property
+    def first_beat(self) -> float:
+        return float(self.beats[0]) if len(self.beats) else 0.0
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        low, high = np.searchsorted(self.beats, [start, end])
+        return self.beats[low:high]
+
+    def snap(self, times) -> np.ndarray:
+        """Move each of ``times`` to its nearest beat (unchanged when there are no beats)."""
+        times = np.asarray(times, dtype=np.float64)
+        if len(self.beats) < 2:
+            return np.full_like(times, self.beats[0]) if len(self.beats) else times
+        right = np.clip(np.searchsorted(self.beats, times), 1, len(self.beats) - 1)
+        left = right - 1
+        pick_right = np.abs(self.beats[right] - times) < np.abs(times - self.beats[left])
+        return np.where(pick_right, self.beats[right], self.beats[left])
+
+    def quantize(self, durations, beats_per_step: int = 1) -> np.ndarray:
+        """Round ``durations`` to whole multiples of ``beats_per_step`` beats (at least one step)."""
+        durations = np.asarray(durations, dtype=np.float64)
+        step = self.period * beats_per_step
+        if step <= 0:
+            return durations
+        return np.maximum(np.round(durations / step), 1.0) * step
+
+    def summary(self) -> dict:
+        return {"bpm": round(self.bpm, 2), "first_beat": round(self.first_beat, 3), "beats": len(self.beats)}
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        with open(staging, "wb") as handle:
+            np.savez(handle, bpm=np.float64(self.bpm), beats=self.beats, onsets=self.onsets)
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BeatGrid":
+        with np.load(path) as data:
+            return cls(float(data["bpm"]), data["beats"], data["onsets"])
+
+
+def analyze_track(ffmpeg: str, path: Path, runner: Optional[FFmpegRunner] = None) -> BeatGrid:
+    """Stream ``path`` as low-rate PCM and estimate its tempo, beats and onsets."""
+    pcm = iter_pcm(ffmpeg, path, ANALYSIS_RATE, runner=runner)
+    envelope = rms_envelope(pcm, int(ANALYSIS_RATE * HOP_SECONDS))
+    strength = onset_strength(envelope)
+    bpm, period = estimate_tempo(strength)
+    beats = track_beats(strength, period) * HOP_SECONDS if bpm else np.zeros(0)
+    return BeatGrid(bpm, beats, pick_onsets(strength))
+
+
+class BeatCache:
+    """Per-track beat grids stored as ``<temp>/cache/beats/<hash>.npz``; decoders run through ``runner``."""
+
+    def __init__(self, cache_dir: Path, ffmpeg: str, runner: Optional[FFmpegRunner] = None) -> None:
+        self.cache_dir = cache_dir
+        self.ffmpeg = ffmpeg
+        self.runner = runner
+        self.errors: Dict[str, str] = {}
+
+    @classmethod
+    def for_settings(cls, temp_dir: str, ffmpeg: str, runner: Optional[FFmpegRunner] = None) -> "BeatCache":
+        return cls(Path(temp_dir) / "cache" / "beats", ffmpeg, runner)
+
+    def path_for(self, track: Path) -> Path:
+        key = RenderCache.key("beats", BEAT_VERSION, file_identity(track))
+        return self.cache_dir / f"{key}.npz"
+
+    def cached(self, track: Path) -> Optional[BeatGrid]:
+        try:
+            return BeatGrid.load(self.path_for(track))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, track: Path) -> BeatGrid:
+        """Return the beat grid for ``track``, analyzing it first if needed."""
+        grid = self.cached(track)
+        if grid is None:
+            grid = analyze_track(self.ffmpeg, track, self.runner)
+            grid.save(self.path_for(track))
+        return grid
+
+    def _try_get(self, track: Path):
+        try:
+            return self.get(track)
+        except (OSError, RuntimeError, ValueError) as exc:
+            return str(exc)
+
+    def build_all(self, tracks: Iterable[Path], workers: Optional[int] = None) -> Dict[Path, BeatGrid]:
+        """Analyze every track concurrently; failures are kept in ``errors``."""
+        tracks = list(dict.fromkeys(Path(track) for track in tracks))
+        results: Dict[Path, BeatGrid] = {}
+        if not tracks:
+            return results
+        workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tracks)))) as pool:
+            for track, outcome in zip(tracks, pool.map(self._try_get, tracks)):
+                if isinstance(outcome, BeatGrid):
+                    results[track] = outcome
+                else:
+                    self.errors[str(track)] = outcome
+        return results
@@ -0,0 +1,230 @@
+"""Headless command-line entry point (never imports tkinter)."""
+from __future__ import annotations
+
+import argparse
+import signal
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .AssetIndex import AssetIndex
+from .BatchVariants import VariantResult, plan_variants
+from .FFmpegRunner import FFmpegProgress, FFmpegRunner
+from .JobQueue import JobQueue, run_queue
+from .Utilities import (
+    ENCODER_PROFILES,
+    RENDER_ENGINES,
+    VIDEO_EXTENSIONS,
+    ProjectSettings,
+    RenderJob,
+    SourceLibrary,
+    ToolPaths,
+    ensure_directories,
+    list_media,
+    load_app_config,
+    load_default_effects,
+)
+from .Workspace import WorkspaceManager
+from .YTPGenerator import SegmentResult, YTPGenerator
+
+MODES = ["timeline", "concat", "preview", "plan", "proxies", "analyze", "batch", "enqueue", "queue", "assets"]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ytpplus", description="Render YTP+ Deluxe jobs without the GUI.")
+    parser.add_argument("--config", type=Path, default=Path("App.config"), help="App.config to load.")
+    parser.add_argument("--mode", choices=MODES, default="timeline", help="What to produce (default: timeline).")
+    parser.add_argument("--engine", choices=RENDER_ENGINES, help="Timeline engine (overrides render_engine).")
+    parser.add_argument("--output", type=Path, help="Output path (default: <temp>/ytp_output_cli.mp4).")
+    parser.add_argument("--video", type=Path, action="append", default=[], help="Video source; repeatable.")
+    parser.add_argument("--transition", type=Path, action="append", default=[], help="Transition clip; repeatable.")
+    parser.add_argument("--audio", type=Path, action="append", default=[], help="Audio source; repeatable.")
+    parser.add_argument("--clip-count", type=int, help="Override clip_count.")
+    parser.add_argument("--autoytp", type=int, help="Override autoytp_number (batch mode).")
+    parser.add_argument("--remixes", type=int, help="Override remixes_number (batch mode).")
+    parser.add_argument("--workers", type=int, help="Override render_workers.")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible plans.")
+    parser.add_argument("--draft", action="store_true", help="Render from proxies at proxy resolution.")
+    parser.add_argument(
+        "--profile", choices=list(ENCODER_PROFILES), default="final", help="Encoder profile (default: final)."
+    )
+    parser.add_argument("--priority", type=int, default=0, help="Queue priority for --mode enqueue (higher first).")
+    parser.add_argument("--wait", action="store_true", help="With --mode queue, wait for retries that are not due yet.")
+    parser.add_argument("--force", action="store_true", help="Re-render even if the output is up to date.")
+    parser.add_argument("--rescan", action="store_true", help="With --mode assets, relist every asset folder.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print progress.")
+    return parser
+
+
+def scan_videos(source_dir: str) -> List[Path]:
+    return list_media(source_dir, VIDEO_EXTENSIONS)
+
+
+def load_job(args: argparse.Namespace) -> RenderJob:
+    if args.config.is_file():
+        settings, tools = load_app_config(args.config)
+    else:
+        settings, tools = ProjectSettings(), ToolPaths()
+    if args.clip_count is not None:
+        settings.clip_count = args.clip_count
+    if args.workers is not None:
+        settings.render_workers = args.workers
+    if args.autoytp is not None:
+        settings.autoytp_number = args.autoytp
+    if args.remixes is not None:
+        settings.remixes_number = args.remixes
+    if args.engine:
+        settings.render_engine = args.engine
+    ensure_directories(settings)
+    sources = SourceLibrary(
+        videos=list(args.video) or scan_videos(settings.source_dir),
+        transitions=list(args.transition),
+        audio=list(args.audio),
+    )
+    return RenderJob(
+        output_path=args.output or Path(settings.temp_dir) / "ytp_output_cli.mp4",
+        sources=sources,
+        settings=settings,
+        effects=load_default_effects(),
+        tool_paths=tools,
+        notes="Generated via command line",
+        seed=args.seed,
+        draft=args.draft,
+        profile=args.profile,
+        force=args.force,
+    )
+
+
+def _print_progress(progress: FFmpegProgress) -> None:
+    print(f"\r{progress.summary()}", end="\n" if progress.finished else "", file=sys.stderr, flush=True)
+
+
+def _print_segment(result: SegmentResult) -> None:
+    status = "cached" if result.cached else "ok" if result.ok else f"failed (exit {result.returncode})"
+    print(f"Segment {result.segment.index}: {status} in {result.elapsed:.1f}s", file=sys.stderr)
+
+
+def _print_error(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def _print_variant(result: VariantResult) -> None:
+    if result.skipped:
+        status = "up to date"
+    elif result.render is None:
+        status = "no segments rendered"
+    else:
+        status = f"exit {result.render.returncode}"
+    failed = f", {len(result.failed)} failed segments" if result.failed else ""
+    print(f"{result.variant.name}: {status}{failed}: {result.variant.output_path}")
+
+
+def render_batch(args: argparse.Namespace, job: RenderJob, generator: YTPGenerator) -> int:
+    variants = plan_variants(generator, job.output_path)
+    if not variants:
+        print("Set autoytp_number or remixes_number (or --autoytp/--remixes) for batch mode.", file=sys.stderr)
+        return 2
+    results = generator.render_variants(
+        variants, on_segment=None if args.quiet else _print_segment, on_variant=_print_variant
+    )
+    for note in generator.render_notes:
+        print(note, file=sys.stderr)
+    if generator.runner.cancelled:
+        print("Render cancelled.", file=sys.stderr)
+        return 130
+    return 0 if all(result.ok and not result.failed for result in results) else 1
+
+
+def scan_assets(args: argparse.Namespace, job: RenderJob) -> int:
+    index = AssetIndex.for_settings(job.settings, job.tool_paths.ffprobe)
+    listed = index.refresh(job.settings.render_workers or None, full=args.rescan)
+    for key, count in index.counts().items():
+        print(f"{key}: {count} files in {index.folders[key]}")
+    print(f"{listed} folders relisted; manifest: {index.manifest_file}", file=sys.stderr)
+    for path, error in index.errors.items():
+        print(f"{path}: {error}", file=sys.stderr)
+    return 0
+
+
+def run_jobs(args: argparse.Namespace, job: RenderJob, runner: FFmpegRunner) -> int:
+    signal.signal(signal.SIGINT, lambda signum, frame: runner.cancel())
+    queue = JobQueue.for_settings(job.settings)
+    run_queue(queue, runner, None if args.quiet else _print_segment, _print_error, wait=args.wait)
+    if runner.cancelled:
+        print("Queue paused; run --mode queue again to resume.", file=sys.stderr)
+        return 130
+    jobs = queue.jobs()
+    for queued in jobs:
+        print(queued.summary())
+    return 1 if any(queued.state == "failed" for queued in jobs) else 0
+
+
+def render(args: argparse.Namespace, job: RenderJob, runner: FFmpegRunner, generator: YTPGenerator) -> int:
+    # Ctrl+C kills the ffmpeg process tree instead of waiting for workers.
+    signal.signal(signal.SIGINT, lambda signum, frame: runner.cancel())
+    output_path = job.output_path
+    if args.mode == "preview":
+        output_path = generator.workspace.file("preview.mp4")
+        result = generator.render_preview(job.sources.videos[0], output_path=output_path)
+    elif args.mode == "batch":
+        return render_batch(args, job, generator)
+    elif args.mode == "concat":
+        result = generator.render_v2(job.sources.videos, output_path)
+    else:
+        result = generator.render_timeline(output_path, on_segment=None if args.quiet else _print_segment)
+    for note in generator.render_notes:
+        print(note, file=sys.stderr)
+    if runner.cancelled:
+        print("Render cancelled.", file=sys.stderr)
+        return 130
+    if result.returncode != 0 and result.stderr:
+        print(result.stderr, file=sys.stderr)
+    print(f"Exit code {result.returncode}: {output_path}")
+    return result.returncode
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    job = load_job(args)
+    WorkspaceManager.for_settings(job.settings).cleanup_orphans()
+    if args.mode == "queue":
+        runner = FFmpegRunner(on_progress=None if args.quiet else _print_progress)
+        return run_jobs(args, job, runner)
+    if args.mode == "assets":
+        return scan_assets(args, job)
+    if not job.sources.videos:
+        print(f"No video sources given and none found in {job.settings.source_dir}.", file=sys.stderr)
+        return 2
+    runner = FFmpegRunner(on_progress=None if args.quiet else _print_progress)
+    generator = YTPGenerator(job, runner)
+    if args.mode == "plan":
+        plan_path = args.output or Path(job.settings.temp_dir) / "ytp_plan.json"
+        generator.export_plan(plan_path)
+        print(f"Plan exported to {plan_path}")
+        return 0
+    if args.mode == "enqueue":
+        job_id = JobQueue.for_settings(job.settings).enqueue(job, args.priority)
+        print(f"Queued job #{job_id}: {job.output_path}")
+        return 0
+    if args.mode == "proxies":
+        built = generator.proxies.build_all([*job.sources.videos, *job.sources.transitions])
+        generator.proxies.shutdown()
+        for source, proxy in built.items():
+            print(f"{source} -> {proxy or 'failed: ' + generator.proxies.errors.get(str(source), '')}")
+        return 0 if all(built.values()) else 1
+    if args.mode == "analyze":
+        workers = job.settings.render_workers
+        indexes = generator.cuts.build_all([*job.sources.videos, *job.sources.audio], workers)
+        for source, index in indexes.items():
+            print(f"{source}: {len(index.silences)} silences, {len(index.onsets)} onsets, {len(index.scenes)} scenes")
+        for track, grid in generator.beats.build_all(generator.music_tracks(), workers).items():
+            print(f"{track}: {grid.bpm:.1f} BPM, {len(grid.beats)} beats, {len(grid.onsets)} onsets")
+        errors = {**generator.cuts.errors, **generator.beats.errors}
+        for source, error in errors.items():
+            print(f"{source}: {error}", file=sys.stderr)
+        return 1 if errors else 0
+
+    try:
+        return render(args, job, runner, generator)
+    finally:
+        generator.close()
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .FFmpegRunner import FFmpegRunner
+from .MediaProbe import MetadataCache
+from .MediaStreams import ANALYSIS_RATE, iter_frames, iter_pcm, rms_envelope
+from .RenderCache import RenderCache, file_identity
+
+# Bump when the detectors change so stale indexes are rebuilt.
+ANALYSIS_VERSION = 1
+HOP_SECONDS = 0.01
+SILENCE_DB = -40.0
+MIN_SILENCE = 0.25
+ONSET_DB = 6.0
+ONSET_GAP = 0.1
+SCENE_FPS = 10.0
+SCENE_SIZE = (64, 36)
+SCENE_THRESHOLD = 0.15
+SCENE_GAP = 0.5
+CUT_KINDS = ("silence", "onset", "scene")
+
+
+def _with_gap(times: np.ndarray, gap: float) -> np.ndarray:
+    """Drop points closer than ``gap`` to the previous kept point."""
+    kept: List[float] = []
+    for value in times.tolist():
+        if not kept or value - kept[-1] >= gap:
+            kept.append(value)
+    return np.asarray(kept, dtype=np.float64)
+
+
+def detect_silences(envelope: np.ndarray, hop_seconds: float = HOP_SECONDS) -> np.ndarray:
+    """Return ``(n, 2)`` start/end times of runs below ``SILENCE_DB``."""
+    quiet = (20 * np.log10(envelope + 1e-10) < SILENCE_DB).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], quiet, [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    long_enough = (ends - starts) * hop_seconds >= MIN_SILENCE
+    return np.stack((starts[long_enough], ends[long_enough]), axis=1) * hop_seconds
+
+
+def detect_onsets(envelope: np.ndarray, hop_seconds: float = HOP_SECONDS) -> np.ndarray:
+    """Return times where loudness jumps ``ONSET_DB`` above its recent level."""
+    if len(envelope) < 3:
+        return np.zeros(0)
+    # Floor the level so the step out of digital silence is one clean jump.
+    level = np.maximum(20 * np.log10(envelope + 1e-10), SILENCE_DB - 20)
+    flux = np.maximum(np.diff(level, prepend=level[0]), 0.0)
+    window = max(1, int(0.5 / hop_seconds))
+    baseline = np.convolve(flux, np.ones(window) / window, mode="same")
+    peaks = (
+        (flux > baseline + ONSET_DB)
+        & (flux >= np.roll(flux, 1))
+        & (flux >= np.roll(flux, -1))
+        & (level > SILENCE_DB)
+    )
+    return _with_gap(np.flatnonzero(peaks) * hop_seconds, ONSET_GAP)
+
+
+def detect_scenes(batches: Iterable[np.ndarray], fps: float = SCENE_FPS) -> np.ndarray:
+    """Return times of frames whose mean difference from the last exceeds ``SCENE_THRESHOLD``."""
+    cuts: List[np.ndarray] = []
+    previous: Optional[np.ndarray] = None
+    offset = 0
+    for frames in batches:
+        frames = frames.astype(np.int16)
+        stacked = frames if previous is None else np.concatenate((previous[None], frames))
+        scores = np.abs(np.diff(stacked, axis=0)).mean(axis=(1, 2)) / 255.0
+        first = offset if previous is None else offset - 1
+        cuts.append((np.flatnonzero(scores > SCENE_THRESHOLD) + first + 1) / fps)
+        previous = frames[-1]
+        offset += len(frames)
+    times = np.concatenate(cuts) if cuts else np.zeros(0)
+    return _with_gap(times, SCENE_GAP)
+
+
+@dataclass
+class CutIndex:
+    """Sorted cut points for one source.
+
+    ``silences`` holds start/end rows of quiet runs (their midpoints are the
+    ``silence`` cut points), ``onsets`` audio attacks and ``scenes`` shot
+    changes, all in seconds. Range and nearest queries are binary searches.
+    """
+
+    silences: np.ndarray
+    onsets: np.ndarray
+    scenes: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.silences = np.asarray(self.silences, dtype=np.float64).reshape(-1, 2)
+        self.onsets = np.asarray(self.onsets, dtype=np.float64)
+        self.scenes = np.asarray(self.scenes, dtype=np.float64)
+        self._points = {
+            "silence": self.silences.mean(axis=1),
+            "onset": self.onsets,
+            "scene": self.scenes,
+        }
+
+    def points(self, kind: str) -> np.ndarray:
+        return self._points[kind]
+
+    def between(self, start: float, end: float, kinds: Sequence[str] = CUT_KINDS) -> np.ndarray:
+        """Return the sorted cut points of ``kinds`` in ``[start, end)``."""
+        found = []
+        for kind in kinds:
+            points = self._points[kind]
+            low, high = np.searchsorted(points, [start, end])
+            found.append(points[low:high])
+        return np.sort(np.concatenate(found)) if found else np.zeros(0)
+
+    def nearest(self, time: float, kinds: Sequence[str] = CUT_KINDS) -> Optional[float]:
+        """Return the cut point of ``kinds`` closest to ``time``, or None if there is none."""
+        best: Optional[float] = None
+        for kind in kinds:
+            points = self._points[kind]
+            position = int(np.searchsorted(points, time))
+            for candidate in points[max(0, position - 1) : position + 1].tolist():
+                if best is None or abs(candidate - time) < abs(best - time):
+                    best = candidate
+        return best
+
+    def silences_between(self, start: float, end: float) -> np.ndarray:
+        """Return silence runs overlapping ``[start, end)``."""
+        low = np.searchsorted(self.silences[:, 1], start, side="right")
+        high = np.searchsorted(self.silences[:, 0], end)
+        return self.silences[low:high]
+
+    def in_silence(self, time: float) -> bool:
+        position = int(np.searchsorted(self.silences[:, 0], time, side="right")) - 1
+        return position >= 0 and time < self.silences[position, 1]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        with open(staging, "wb") as handle:
+            np.savez(handle, silences=self.silences, onsets=self.onsets, scenes=self.scenes)
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CutIndex":
+        with np.load(path) as data:
+            return cls(data["silences"], data["onsets"], data["scenes"])
+
+
+def analyze_source(
+    ffmpeg: str,
+    path: Path,
+    has_audio: bool = True,
+    has_video: bool = True,
+    runner: Optional[FFmpegRunner] = None,
+) -> CutIndex:
+    """Stream ``path`` through ffmpeg once per stream type and detect cut points."""
+    silences, onsets, scenes = np.zeros((0, 2)), np.zeros(0), np.zeros(0)
+    if has_audio:
+        pcm = iter_pcm(ffmpeg, path, ANALYSIS_RATE, runner=runner)
+        envelope = rms_envelope(pcm, int(ANALYSIS_RATE * HOP_SECONDS))
+        silences, onsets = detect_silences(envelope), detect_onsets(envelope)
+    if has_video:
+        scenes = detect_scenes(iter_frames(ffmpeg, path, *SCENE_SIZE, SCENE_FPS, runner=runner))
+    return CutIndex(silences, onsets, scenes)
+
+
+class CutIndexCache:
+    """Per-source cut indexes stored as ``<temp>/cache/cuts/<hash>.npz``.
+
+    Entries are keyed by source identity (path, size, mtime) and
+    ``ANALYSIS_VERSION``, so a source is only decoded again after it changes.
+    Decoders run through ``runner``, so cancelling it stops an analysis.
+    """
+
+    def __init__(
+        self, cache_dir: Path, ffmpeg: str, metadata: MetadataCache, runner: Optional[FFmpegRunner] = None
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ffmpeg = ffmpeg
+        self.metadata = metadata
+        self.runner = runner
+        self.errors: Dict[str, str] = {}
+
+    @classmethod
+    def for_settings(
+        cls, temp_dir: str, ffmpeg: str, metadata: MetadataCache, runner: Optional[FFmpegRunner] = None
+    ) -> "CutIndexCache":
+        return cls(Path(temp_dir) / "cache" / "cuts", ffmpeg, metadata, runner)
+
+    def path_for(self, source: Path) -> Path:
+        key = RenderCache.key("cuts", ANALYSIS_VERSION, file_identity(source))
+        return self.cache_dir / f"{key}.npz"
+
+    def cached(self, source: Path) -> Optional[CutIndex]:
+        try:
+            return CutIndex.load(self.path_for(source))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, source: Path) -> CutIndex:
+        """Return the index for ``source``, analyzing it first if needed."""
+        index = self.cached(source)
+        if index is not None:
+            return index
+        info = self.metadata.get(source)
+        index = analyze_source(self.ffmpeg, source, info.audio is not None, info.video is not None, self.runner)
+        index.save(self.path_for(source))
+        return index
+
+    def _try_get(self, source: Path):
+        try:
+            return self.get(source)
+        except (OSError, RuntimeError, ValueError) as exc:
+            return str(exc)
+
+    def build_all(self, sources: Iterable[Path], workers: Optional[int] = None) -> Dict[Path, CutIndex]:
+        """Index every source concurrently; failures are kept in ``errors``."""
+        sources = list(dict.fromkeys(Path(source) for source in sources))
+        results: Dict[Path, CutIndex] = {}
+        if not sources:
+            return results
+        workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources)))) as pool:
+            for source, outcome in zip(sources, pool.map(self._try_get, sources)):
+                if isinstance(outcome, CutIndex):
+                    results[source] = outcome
+                else:
+                    self.errors[str(source)] = outcome
+        self.metadata.save()
+        return results
@@ -1,9 +1,34 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from .Utilities import EffectConfig
+import numpy as np
+
+from .Utilities import DEFAULT_EFFECTS, EffectConfig
+
+# Stable bit positions for per-clip effect masks (DEFAULT_EFFECTS order).
+EFFECT_BITS: Dict[str, int] = {key: 1 << index for index, key in enumerate(DEFAULT_EFFECTS)}
+
+# Overlay layers requested by each overlay effect.
+OVERLAY_SLOTS: Dict[str, int] = {
+    "spadinner": 1,
+    "overlay_plus_three": 3,
+    "rainbow": 1,
+    "explosion_spam": 1,
+    "meme_injection": 1,
+}
+
+
+def effect_mask(keys: Iterable[str]) -> int:
+    mask = 0
+    for key in keys:
+        mask |= EFFECT_BITS[key]
+    return mask
+
+
+def mask_keys(mask: int) -> List[str]:
+    return [key for key, bit in EFFECT_BITS.items() if mask & bit]
 
 
 @dataclass
@@ -12,6 +37,14 @@ class EffectResult:
     video_filters: List[str]
     overlays: List[str]
     notes: List[str]
+    # Frame-reordering effects (see FrameEngine); "reverse" is also a video filter for engines without it.
+    frames: List[str] = field(default_factory=list)
+
+
+@dataclass
+class EffectSelection:
+    masks: np.ndarray
+    levels: np.ndarray
 
 
 class EffectsFactory:
@@ -23,16 +56,73 @@ class EffectsFactory:
 
     def __init__(self, effects: Dict[str, EffectConfig]) -> None:
         self.effects = effects
+        self._clip_cache: Dict[Tuple[int, int], EffectResult] = {}
+
+    def enabled_mask(self) -> int:
+        return effect_mask(key for key, config in self.effects.items() if config.enabled and key in EFFECT_BITS)
+
+    def select_batch(self, count: int, seed=None, effects_per_clip: int = 1) -> EffectSelection:
+        """Assign effects to ``count`` clips in one vectorized, seeded pass.
+
+        Each enabled effect fires independently with its ``probability``; when
+        more than ``effects_per_clip`` fire, a random subset of that size is
+        kept. Each clip also gets an intensity level in ``1..max_level`` of its
+        strongest kept effect. The same seed always gives the same selection.
+        """
+        keys = [
+            key
+            for key, config in self.effects.items()
+            if config.enabled and config.probability > 0 and key in EFFECT_BITS
+        ]
+        masks = np.zeros(max(0, count), dtype=np.uint64)
+        levels = np.ones(max(0, count), dtype=np.uint8)
+        if not keys or count <= 0 or effects_per_clip <= 0:
+            return EffectSelection(masks, levels)
+        rng = np.random.default_rng(seed)
+        probabilities = np.array([min(1.0, self.effects[key].probability) for key in keys], dtype=np.float32)
+        max_levels = np.array([min(255, max(1, self.effects[key].max_level)) for key in keys], dtype=np.int32)
+        bits = np.array([EFFECT_BITS[key] for key in keys], dtype=np.uint64)
+
+        fired = rng.random((count, len(keys)), dtype=np.float32) < probabilities
+        priority = np.where(fired, rng.random((count, len(keys)), dtype=np.float32), np.float32(2.0))
+        rank = np.argsort(np.argsort(priority, axis=1), axis=1)
+        kept = fired & (rank < effects_per_clip)
 
-    def build(self) -> EffectResult:
+        masks[:] = np.bitwise_or.reduce(np.where(kept, bits, np.uint64(0)), axis=1)
+        strongest = np.max(np.where(kept, max_levels, 1), axis=1)
+        levels[:] = 1 + np.floor(rng.random(count) * strongest).astype(np.int32)
+        return EffectSelection(masks, levels)
+
+    def build_clip(self, mask: int, level: int = 1) -> EffectResult:
+        """Build (and memoize) the filter chain for one effect combination."""
+        key = (int(mask), int(level))
+        result = self._clip_cache.get(key)
+        if result is None:
+            result = self.build(mask_keys(key[0]), key[1])
+            self._clip_cache[key] = result
+        return result
+
+    def build(self, keys: Optional[Iterable[str]] = None, level: int = 1) -> EffectResult:
+        """Build one filter chain from ``keys`` (default: every enabled effect).
+
+        ``level`` scales the intensity of level-aware effects and is capped by
+        each effect's ``max_level``.
+        """
         audio_filters: List[str] = []
         video_filters: List[str] = []
         overlays: List[str] = []
         notes: List[str] = []
+        frames: List[str] = []
+        selected = set(keys) if keys is not None else None
 
         def enabled(key: str) -> bool:
+            if selected is not None:
+                return key in selected
             return self.effects.get(key, EffectConfig(key)).enabled
 
+        def strength(key: str) -> int:
+            return max(1, min(level, self.effects.get(key, EffectConfig(key)).max_level))
+
         if enabled("random_sound"):
             notes.append("Random sound overlay enabled; will mix from assets.")
         if enabled("random_clip_shuffle"):
@@ -40,18 +130,21 @@ class EffectsFactory:
         if enabled("reverse"):
             audio_filters.append("areverse")
             video_filters.append("reverse")
+            frames.append("reverse")
         if enabled("speed_up"):
-            audio_filters.append("atempo=1.25")
-            video_filters.append("setpts=PTS/1.25")
+            factor = f"{min(2.0, 1.25 ** strength('speed_up')):.4g}"
+            audio_filters.append(f"atempo={factor}")
+            video_filters.append(f"setpts=PTS/{factor}")
         if enabled("slow_down"):
-            audio_filters.append("atempo=0.8")
-            video_filters.append("setpts=PTS/0.8")
+            factor = f"{max(0.5, 0.8 ** strength('slow_down')):.4g}"
+            audio_filters.append(f"atempo={factor}")
+            video_filters.append(f"setpts=PTS/{factor}")
         if enabled("chorus"):
             audio_filters.append("aecho=0.8:0.9:1000:0.3")
         if enabled("vibrato"):
             audio_filters.append("asetrate=48000*1.02,atempo=1/1.02")
         if enabled("stutter"):
-            notes.append("Stutter effect selected; will loop short slices.")
+            frames.append("stutter")
         if enabled("random_cuts"):
             notes.append("Random cuts enabled.")
         if enabled("recall_post_render"):
@@ -59,7 +152,7 @@ class EffectsFactory:
         if enabled("get_down"):
             notes.append("Get down effect preset enabled.")
         if enabled("temporal_scramble"):
-            notes.append("Temporal scramble effect enabled.")
+            frames.append("temporal_scramble")
         if enabled("high_harmony"):
             audio_filters.append("asetrate=48000*1.15,atempo=1/1.15")
         if enabled("low_harmony"):
@@ -68,13 +161,13 @@ class EffectsFactory:
             video_filters.append("eq=contrast=1.2:brightness=-0.1")
             audio_filters.append("tremolo=f=6")
         if enabled("half_reversed"):
-            notes.append("Half-reversed effect placeholder.")
+            frames.append("half_reversed")
         if enabled("pitch_shift"):
             notes.append("Pitch shift effect placeholder.")
         if enabled("mirror_symmetry"):
             notes.append("Mirror symmetry effect placeholder.")
         if enabled("hue_rotate"):
-            video_filters.append("hue=h=90")
+            video_filters.append(f"hue=h={90 * strength('hue_rotate') % 360}")
         if enabled("spadinner"):
             overlays.append("spadinner_assets")
         if enabled("confusion"):
@@ -84,7 +177,7 @@ class EffectsFactory:
         if enabled("ytpmv_auto"):
             notes.append("YTPMV automatic effect placeholder.")
         if enabled("earrape"):
-            audio_filters.append("volume=10")
+            audio_filters.append(f"volume={10 * strength('earrape')}")
         if enabled("autotune_chaos"):
             notes.append("Auto-tune requires external tool; placeholder only.")
         if enabled("dance"):
@@ -102,7 +195,7 @@ class EffectsFactory:
         if enabled("explosion_spam"):
             overlays.append("explosion_overlays")
         if enabled("frame_shuffle"):
-            notes.append("Frame shuffle placeholder; sample implementation.")
+            frames.append("frame_shuffle")
         if enabled("meme_injection"):
             overlays.append("meme_injection")
         if enabled("sentence_mix"):
@@ -115,4 +208,5 @@ class EffectsFactory:
             video_filters=video_filters,
             overlays=overlays,
             notes=notes,
+            frames=frames,
         )
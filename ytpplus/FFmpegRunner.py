@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, List, Optional, Set
+
+
+@dataclass
+class FFmpegProgress:
+    label: str = ""
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0
+    out_time: float = 0.0
+    total_size: int = 0
+    duration: Optional[float] = None
+    finished: bool = False
+
+    @property
+    def eta(self) -> Optional[float]:
+        if not self.duration or self.speed <= 0:
+            return None
+        return max(0.0, (self.duration - self.out_time) / self.speed)
+
+    def summary(self) -> str:
+        eta = self.eta
+        parts = [
+            self.label,
+            f"frame={self.frame}",
+            f"fps={self.fps:.1f}",
+            f"speed={self.speed:.2f}x",
+            f"ETA={eta:.0f}s" if eta is not None else "ETA=?",
+        ]
+        return " ".join(part for part in parts if part)
+
+
+def _number(value: str, default: float = 0.0) -> float:
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return default
+
+
+def kill_process_tree(proc: subprocess.Popen) -> None:
+    """Kill ``proc`` and any children it spawned."""
+    if proc.poll() is not None:
+        return
+    if sys.platform == "win32":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(proc.pid)], check=False, capture_output=True
+        )
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            proc.kill()
+
+
+class FFmpegRunner:
+    """Run ffmpeg commands while streaming ``-progress`` output.
+
+    Progress snapshots go to ``on_progress`` as they arrive, and ``cancel``
+    kills every process the runner has started. ``on_exit(progress, result,
+    elapsed)`` is called when each process ends, with its last progress
+    snapshot. Safe to share between worker threads.
+    """
+
+    def __init__(
+        self,
+        on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+        on_exit: Optional[Callable[[FFmpegProgress, subprocess.CompletedProcess, float], None]] = None,
+    ) -> None:
+        self.on_progress = on_progress
+        self.on_exit = on_exit
+        self._cancel = threading.Event()
+        self._active: Set[subprocess.Popen] = set()
+        self._started: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait_cancelled(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds; return True early if the runner is cancelled."""
+        return self._cancel.wait(timeout)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        with self._lock:
+            active = list(self._active)
+        for proc in active:
+            kill_process_tree(proc)
+
+    def _popen(self, cmd: List[str], stdin=subprocess.DEVNULL) -> subprocess.Popen:
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        return subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+
+    def spawn(self, cmd: List[str], feed: Optional[Callable[[BinaryIO], None]] = None) -> subprocess.Popen:
+        """Start ``cmd`` with binary stdout/stderr pipes; ``cancel`` kills it until ``release``.
+
+        ``feed``, if given, writes the process's stdin on its own thread.
+        """
+        proc = self._popen(cmd, subprocess.PIPE if feed else subprocess.DEVNULL)
+        if feed is not None:
+            threading.Thread(target=self._feed, args=(feed, proc), daemon=True).start()
+        with self._lock:
+            self._active.add(proc)
+            self._started[proc.pid] = time.perf_counter()
+        if self.cancelled:
+            kill_process_tree(proc)
+        return proc
+
+    def release(self, proc: subprocess.Popen, label: str = "") -> None:
+        with self._lock:
+            self._active.discard(proc)
+            started = self._started.pop(proc.pid, None)
+        if self.on_exit is not None and started is not None:
+            result = subprocess.CompletedProcess(proc.args, proc.returncode, "", "")
+            self.on_exit(FFmpegProgress(label=label, finished=True), result, time.perf_counter() - started)
+
+    def run(
+        self,
+        cmd: List[str],
+        duration: Optional[float] = None,
+        label: str = "",
+        feed: Optional[Callable[[BinaryIO], None]] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run an ffmpeg command and return it like ``subprocess.run`` would.
+
+        When ``feed`` is given it runs on its own thread with the process's
+        stdin, which is closed once it returns.
+        """
+        if self.cancelled:
+            return subprocess.CompletedProcess(cmd, -1, "", "Cancelled before start.")
+        track = self.on_progress is not None or self.on_exit is not None
+        if track:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        started = time.perf_counter()
+        proc = self._popen(cmd, subprocess.PIPE if feed else subprocess.DEVNULL)
+        with self._lock:
+            self._active.add(proc)
+        if self.cancelled:
+            kill_process_tree(proc)
+        stderr_chunks: List[bytes] = []
+        threads = [threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)]
+        if feed is not None:
+            threads.append(threading.Thread(target=self._feed, args=(feed, proc), daemon=True))
+        for thread in threads:
+            thread.start()
+        stdout_lines: List[str] = []
+        progress = FFmpegProgress(label=label, duration=duration)
+        try:
+            for raw in proc.stdout:
+                line = raw.decode("utf-8", "replace")
+                if not track:
+                    stdout_lines.append(line)
+                    continue
+                key, _, value = line.strip().partition("=")
+                if key == "frame":
+                    progress.frame = int(_number(value))
+                elif key == "fps":
+                    progress.fps = _number(value)
+                elif key == "speed":
+                    progress.speed = _number(value)
+                elif key in ("out_time_us", "out_time_ms"):
+                    progress.out_time = _number(value) / 1_000_000
+                elif key == "total_size":
+                    progress.total_size = int(_number(value))
+                elif key == "progress":
+                    progress.finished = value == "end"
+                    if self.on_progress is not None:
+                        self.on_progress(FFmpegProgress(**vars(progress)))
+            proc.wait()
+        finally:
+            for thread in threads:
+                thread.join()
+            with self._lock:
+                self._active.discard(proc)
+        stderr = b"".join(stderr_chunks).decode("utf-8", "replace")
+        if self.cancelled:
+            stderr += "\nCancelled."
+        result = subprocess.CompletedProcess(cmd, proc.returncode, "".join(stdout_lines), stderr)
+        if self.on_exit is not None:
+            self.on_exit(progress, result, time.perf_counter() - started)
+        return result
+
+    @staticmethod
+    def _feed(feed: Callable[[BinaryIO], None], proc: subprocess.Popen) -> None:
+        try:
+            feed(proc.stdin)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
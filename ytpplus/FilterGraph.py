@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Collection, List, Optional, Sequence, Tuple
+
+from .EffectsFactory import EffectResult
+from .Utilities import ClipSegment
+
+AUDIO_SAMPLE_RATE = 48000
+
+
+@dataclass
+class CompiledGraph:
+    input_args: List[str] = field(default_factory=list)
+    script: str = ""
+    video_label: str = "[vout]"
+    audio_label: str = "[aout]"
+
+
+@dataclass
+class OverlayInput:
+    """One visual overlay input for a clip.
+
+    ``x``/``y`` place it as fractions of the frame space it leaves free;
+    ``scale`` fits overlay clips that were not pre-conformed.
+    """
+
+    input_args: List[str]
+    x: float = 0.5
+    y: float = 0.5
+    scale: str = ""
+
+
+def overlay_chains(base: str, overlays: Sequence[Tuple[int, OverlayInput]], label: str) -> List[str]:
+    """Chains that stack ``(input number, overlay)`` pairs onto ``base``, in order, ending at ``label``."""
+    chains: List[str] = []
+    tag = label.strip("[]")
+    current = base
+    for position, (index, overlay) in enumerate(overlays):
+        source = f"[{index}:v]"
+        if overlay.scale:
+            chains.append(f"{source}{overlay.scale}[{tag}s{position}]")
+            source = f"[{tag}s{position}]"
+        target = label if position == len(overlays) - 1 else f"[{tag}o{position}]"
+        place = f"x=(W-w)*{overlay.x:.3f}:y=(H-h)*{overlay.y:.3f}"
+        chains.append(f"{current}{source}overlay={place}:eof_action=pass{target}")
+        current = target
+    return chains
+
+
+def compile_timeline(
+    segments: Sequence[ClipSegment],
+    effects_for: Callable[[ClipSegment], EffectResult],
+    width: int,
+    height: int,
+    audio_sources: Collection[Path],
+    sound_input: Sequence[str] = (),
+    muted: Collection[int] = (),
+    overlays_for: Optional[Callable[[ClipSegment], List[OverlayInput]]] = None,
+) -> CompiledGraph:
+    """Compile a planned timeline into one ffmpeg filter graph.
+
+    Every segment gets its own seeked input (``-ss``/``-t``) so decoding stays
+    bounded; splitting one shared input across trims would make the concat
+    node buffer every frame between windows. Each segment is then trimmed,
+    re-timed with setpts, conformed to the project size, passed through the
+    chain ``effects_for`` returns for it, and fed to a single concat node.
+    Segments whose source has no audio get matching silence.
+
+    ``sound_input`` adds one more input (the mixed sound overlays of the
+    whole timeline) that is mixed over the joined audio once; segments at
+    ``muted`` positions drop their own audio under it. Visual overlays from
+    ``overlays_for`` are extra inputs stacked onto their segment's video.
+    """
+    input_args: List[str] = []
+    overlay_args: List[str] = []
+    next_input = len(segments)
+    chains: List[str] = []
+    pads: List[str] = []
+    for position, segment in enumerate(segments):
+        input_args += ["-ss", f"{segment.start:.3f}", "-t", f"{segment.duration:.3f}", "-i", str(segment.source)]
+        effects = effects_for(segment)
+        video = [
+            f"trim=duration={segment.duration:.3f}",
+            "setpts=PTS-STARTPTS",
+            f"scale={width}:{height}",
+            "setsar=1",
+        ]
+        video += effects.video_filters
+        overlays = overlays_for(segment) if overlays_for else []
+        if overlays:
+            chains.append(f"[{position}:v]{','.join(video)}[b{position}]")
+            numbered = list(zip(range(next_input, next_input + len(overlays)), overlays))
+            chains += overlay_chains(f"[b{position}]", numbered, f"[v{position}]")
+            overlay_args += [arg for overlay in overlays for arg in overlay.input_args]
+            next_input += len(overlays)
+        else:
+            chains.append(f"[{position}:v]{','.join(video)}[v{position}]")
+
+        audio = [
+            f"aresample={AUDIO_SAMPLE_RATE}",
+            "aformat=sample_fmts=fltp:channel_layouts=stereo",
+        ]
+        audio += effects.audio_filters
+        if position in muted:
+            audio.append("volume=0")
+        if segment.source in audio_sources:
+            audio = [f"atrim=duration={segment.duration:.3f}", "asetpts=PTS-STARTPTS", *audio]
+            chains.append(f"[{position}:a]{','.join(audio)}[a{position}]")
+        else:
+            silence = f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo,atrim=duration={segment.duration:.3f}"
+            chains.append(f"{silence},{','.join(audio[1:])}[a{position}]")
+        pads.append(f"[v{position}][a{position}]")
+
+    input_args += overlay_args
+    if not sound_input:
+        chains.append(f"{''.join(pads)}concat=n={len(segments)}:v=1:a=1[vout][aout]")
+        return CompiledGraph(input_args=input_args, script=";\n".join(chains))
+    input_args += sound_input
+    chains.append(f"{''.join(pads)}concat=n={len(segments)}:v=1:a=1[vout][acat]")
+    chains.append(f"[acat][{next_input}:a]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[aout]")
+    return CompiledGraph(input_args=input_args, script=";\n".join(chains))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import BinaryIO, Iterable, List
+
+import numpy as np
+
+# Bump when frame orders change so cached segments are re-rendered.
+FRAME_VERSION = 2
+# Effects applied by reordering decoded frames, in the order they compose.
+FRAME_EFFECTS = ("reverse", "half_reversed", "stutter", "frame_shuffle", "temporal_scramble")
+RAW_PIX_FMT = "yuv420p"
+# Orders that look back at most this many frames keep them in a RAM ring;
+# longer look-backs (reversals, scrambles) spill to a memory-mapped file.
+RING_FRAMES = 64
+# Times a stutter slice plays in a row.
+STUTTER_REPEATS = 3
+
+
+def frame_bytes(width: int, height: int) -> int:
+    """Size of one ``yuv420p`` frame."""
+    return width * height + 2 * ((width + 1) // 2) * ((height + 1) // 2)
+
+
+def raw_input_args(width: int, height: int, rate: float, source: str = "pipe:0") -> List[str]:
+    """FFmpeg input options for the frames ``reorder_frames`` writes."""
+    return ["-f", "rawvideo", "-pix_fmt", RAW_PIX_FMT, "-s", f"{width}x{height}", "-r", f"{rate:g}", "-i", source]
+
+
+def frame_order(effects: Iterable[str], count: int, slice_frames: int, rng: np.random.Generator) -> np.ndarray:
+    """Source frame index for each of ``count`` output frames.
+
+    Each effect reorders the result of the one before it and keeps its
+    length, so a clip keeps its planned duration. ``slice_frames`` is the
+    stutter loop, the shuffle window and the scramble chunk.
+    """
+    order = np.arange(max(0, count), dtype=np.int64)
+    size = max(1, min(slice_frames, len(order)))
+    selected = set(effects)
+    for key in FRAME_EFFECTS:
+        if key not in selected or len(order) < 2:
+            continue
+        if key == "reverse":
+            order = order[::-1]
+        elif key == "half_reversed":
+            half = len(order) // 2
+            order = np.concatenate((order[:half], order[half:][::-1]))
+        elif key == "stutter":
+            start = int(rng.integers(0, len(order) - size + 1))
+            loop = order[start : start + size]
+            order = np.concatenate((order[: start + size], np.tile(loop, STUTTER_REPEATS - 1), order[start + size :]))
+            order = order[:count]
+        elif key == "frame_shuffle":
+            positions = np.arange(len(order))
+            order = order[np.argsort(positions // size + rng.random(len(order)), kind="stable")]
+        elif key == "temporal_scramble":
+            chunks = np.array_split(order, -(-len(order) // size))
+            order = np.concatenate([chunks[index] for index in rng.permutation(len(chunks))])
+    return order
+
+
+def lookback(order: np.ndarray) -> int:
+    """Frames that must be held at once to play ``order`` from a single forward decode."""
+    if not len(order):
+        return 1
+    return int(np.max(np.maximum.accumulate(order) - order)) + 1
+
+
+def reorder_samples(pcm: np.ndarray, order: np.ndarray, frame_samples: float) -> np.ndarray:
+    """The audio under each source frame, played in ``order``.
+
+    ``pcm`` holds ``(n, channels)`` samples from the clip start, ``frame_samples``
+    of them per frame (sample rate / frame rate); frame edges are rounded to
+    whole samples, and audio missing at the end is played as silence.
+    """
+    if not len(order):
+        return pcm[:0]
+    edges = np.round(np.arange(len(order) + 1) * frame_samples).astype(np.int64)
+    if len(pcm) < edges[-1]:
+        pad = np.zeros((edges[-1] - len(pcm), *pcm.shape[1:]), dtype=pcm.dtype)
+        pcm = np.concatenate((pcm, pad))
+    starts = edges[order]
+    lengths = edges[order + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    return pcm[np.arange(int(lengths.sum())) - np.repeat(offsets - starts, lengths)]
+
+
+def _read_into(source: BinaryIO, view: memoryview) -> bool:
+    filled = 0
+    while filled < len(view):
+        read = source.readinto(view[filled:])
+        if not read:
+            return False
+        filled += read
+    return True
+
+
+def reorder_frames(source: BinaryIO, sink: BinaryIO, order: np.ndarray, size: int, spill: Path) -> int:
+    """Copy ``size``-byte frames from ``source`` to ``sink`` in ``order``; return frames written.
+
+    Frames are decoded once, front to back, into a ring of ``lookback(order)``
+    slots, or into a memory map at ``spill`` when that exceeds ``RING_FRAMES``,
+    and written straight from their slot. If the decoder stops early, every
+    later index repeats the last frame it produced.
+    """
+    if not len(order):
+        return 0
+    slots = lookback(order)
+    if slots <= RING_FRAMES:
+        store = np.empty((slots, size), dtype=np.uint8)
+    else:
+        slots = int(order.max()) + 1
+        spill.parent.mkdir(parents=True, exist_ok=True)
+        store = np.memmap(spill, dtype=np.uint8, mode="w+", shape=(slots, size))
+    decoded = 0
+    finished = False
+    written = 0
+    try:
+        for index in order.tolist():
+            while decoded <= index and not finished:
+                if _read_into(source, memoryview(store[decoded % slots])):
+                    decoded += 1
+                else:
+                    finished = True
+            if decoded == 0:
+                break
+            sink.write(memoryview(store[min(index, decoded - 1) % slots]))
+            written += 1
+    finally:
+        del store
+        spill.unlink(missing_ok=True)
+    return written
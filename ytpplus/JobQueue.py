@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .FFmpegRunner import FFmpegRunner
+from .RenderCache import file_sha256
+from .RenderGraph import GraphState
+from .Utilities import EffectConfig, ProjectSettings, RenderJob, SourceLibrary, ToolPaths
+from .Workspace import pid_alive
+
+JOB_STATES = ("queued", "running", "done", "failed")
+# Per-segment ffmpeg retries within one attempt, and the first wait between them.
+SEGMENT_RETRIES = 2
+SEGMENT_BACKOFF = 2.0
+# A failed job is queued again after JOB_BACKOFF * 2**(attempts - 1) seconds.
+JOB_BACKOFF = 30.0
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    definition TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    owner TEXT,
+    error TEXT,
+    output_hash TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    state TEXT NOT NULL,
+    output TEXT,
+    output_hash TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS jobs_pick ON jobs (state, priority DESC, id);
+"""
+
+
+def job_to_dict(job: RenderJob) -> dict:
+    data = asdict(job)
+    return json.loads(json.dumps(data, default=str))
+
+
+def job_from_dict(data: dict) -> RenderJob:
+    sources = {key: [Path(item) for item in value] for key, value in data["sources"].items() if key != "urls"}
+    return RenderJob(
+        output_path=Path(data["output_path"]),
+        sources=SourceLibrary(**sources, urls=list(data["sources"].get("urls", []))),
+        settings=ProjectSettings(**data["settings"]),
+        effects={key: EffectConfig(**value) for key, value in data["effects"].items()},
+        tool_paths=ToolPaths(**data["tool_paths"]),
+        notes=data.get("notes"),
+        seed=data.get("seed"),
+        draft=data.get("draft", False),
+        profile=data.get("profile", "final"),
+        force=data.get("force", False),
+    )
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    priority: int
+    state: str
+    attempts: int
+    max_attempts: int
+    next_attempt: float
+    error: Optional[str]
+    output_hash: Optional[str]
+    job: RenderJob
+
+    def summary(self) -> str:
+        text = f"#{self.id} [{self.state}] priority {self.priority}, attempt {self.attempts}/{self.max_attempts}"
+        text += f": {self.job.output_path}"
+        if self.state == "queued" and self.next_attempt > time.time():
+            text += f" (retry in {self.next_attempt - time.time():.0f}s)"
+        if self.error:
+            text += f" - {self.error}"
+        return text
+
+
+class JobQueue:
+    """Persistent render queue in SQLite (``<temp>/queue.sqlite3``).
+
+    Jobs are stored with a fixed seed so a resumed job plans the same
+    segments. Every finished segment is recorded with its render
+    fingerprint, output file and SHA-256, so a job interrupted by a crash
+    or kill resumes from the segments it already has. Jobs run in priority
+    order; a failed attempt is retried with exponential backoff until
+    ``max_attempts``.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @classmethod
+    def for_settings(cls, settings: ProjectSettings) -> "JobQueue":
+        return cls(Path(settings.temp_dir) / "queue.sqlite3")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation: safe across threads and processes.
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def enqueue(self, job: RenderJob, priority: int = 0, max_attempts: int = MAX_ATTEMPTS) -> int:
+        """Store ``job`` (with a fixed seed) and return its queue id."""
+        definition = job_to_dict(job)
+        if definition["seed"] is None:
+            definition["seed"] = random.randrange(2**32)
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "INSERT INTO jobs (priority, definition, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (priority, json.dumps(definition), max(1, max_attempts), now, now),
+            )
+            return int(cursor.lastrowid)
+
+    def _row(self, row: sqlite3.Row) -> QueuedJob:
+        return QueuedJob(
+            row["id"],
+            row["priority"],
+            row["state"],
+            row["attempts"],
+            row["max_attempts"],
+            row["next_attempt"],
+            row["error"],
+            row["output_hash"],
+            job_from_dict(json.loads(row["definition"])),
+        )
+
+    def jobs(self, states=JOB_STATES) -> List[QueuedJob]:
+        marks = ",".join("?" * len(states))
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT * FROM jobs WHERE state IN ({marks}) ORDER BY priority DESC, id", tuple(states)
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def get(self, job_id: int) -> Optional[QueuedJob]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def recover(self) -> int:
+        """Queue again the running jobs whose owning process on this host is gone.
+
+        A crashed attempt does not count against ``max_attempts``.
+        """
+        host = socket.gethostname()
+        with self._transaction() as db:
+            rows = db.execute("SELECT id, owner FROM jobs WHERE state = 'running'").fetchall()
+            stale = []
+            for row in rows:
+                owner_host, _, pid = (row["owner"] or "").rpartition(":")
+                if owner_host == host and not pid_alive(int(pid or 0)):
+                    stale.append(row["id"])
+            db.executemany(
+                "UPDATE jobs SET state = 'queued', owner = NULL, attempts = MAX(0, attempts - 1), updated = ? "
+                "WHERE id = ?",
+                [(time.time(), job_id) for job_id in stale],
+            )
+        return len(stale)
+
+    def claim(self) -> Optional[QueuedJob]:
+        """Mark the highest-priority due job running for this process and return it."""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE state = 'queued' AND next_attempt <= ? ORDER BY priority DESC, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET state = 'running', owner = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                (self.owner, now, row["id"]),
+            )
+        return self.get(row["id"])
+
+    def next_due(self) -> Optional[float]:
+        """Time the earliest waiting retry becomes due, or None if nothing is queued."""
+        with self._connect() as db:
+            row = db.execute("SELECT MIN(next_attempt) FROM jobs WHERE state = 'queued'").fetchone()
+        return row[0]
+
+    def completed_segments(self, job_id: int, fingerprints: Dict[int, str]) -> Dict[int, Path]:
+        """Recorded segment outputs that still match their fingerprint and hash."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT idx, fingerprint, output, output_hash FROM segments WHERE job_id = ? AND state = 'done'",
+                (job_id,),
+            ).fetchall()
+        completed: Dict[int, Path] = {}
+        for row in rows:
+            path = Path(row["output"])
+            if fingerprints.get(row["idx"]) != row["fingerprint"] or not path.is_file():
+                continue
+            try:
+                if file_sha256(path) == row["output_hash"]:
+                    completed[row["idx"]] = path
+            except OSError:
+                continue
+        return completed
+
+    def record_segment(
+        self, job_id: int, index: int, fingerprint: str, output: Optional[Path], error: str = ""
+    ) -> None:
+        """Store one segment outcome; ``output`` is None when the segment failed."""
+        output_hash = file_sha256(output) if output is not None else None
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO segments (job_id, idx, fingerprint, state, output, output_hash, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    index,
+                    fingerprint,
+                    "done" if output is not None else "failed",
+                    str(output) if output is not None else None,
+                    output_hash,
+                    error[-2000:] or None,
+                ),
+            )
+
+    def finish(self, job_id: int, output: Path) -> None:
+        output_hash = file_sha256(output)
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = 'done', owner = NULL, error = NULL, output_hash = ?, updated = ? WHERE id = ?",
+                (output_hash, time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str) -> None:
+        """Queue the job again after a backoff, or mark it failed once out of attempts."""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            exhausted = row["attempts"] >= row["max_attempts"]
+            db.execute(
+                "UPDATE jobs SET state = ?, owner = NULL, error = ?, next_attempt = ?, updated = ? WHERE id = ?",
+                (
+                    "failed" if exhausted else "queued",
+                    error[-2000:],
+                    now + JOB_BACKOFF * 2 ** (row["attempts"] - 1),
+                    now,
+                    job_id,
+                ),
+            )
+
+    def release(self, job_id: int) -> None:
+        """Put an interrupted (cancelled) job back without using up an attempt."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = 'queued', owner = NULL, attempts = MAX(0, attempts - 1), updated = ? "
+                "WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def retry(self, job_id: int) -> None:
+        """Queue a failed job again with a fresh set of attempts."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = 'queued', attempts = 0, next_attempt = 0, error = NULL, updated = ? "
+                "WHERE id = ? AND state = 'failed'",
+                (time.time(), job_id),
+            )
+
+    def remove(self, job_id: int) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM jobs WHERE id = ? AND state != 'running'", (job_id,))
+
+
+def run_job(
+    queue: JobQueue,
+    queued: QueuedJob,
+    runner: FFmpegRunner,
+    on_segment: Optional[Callable] = None,
+    log: Callable[[str], None] = print,
+) -> bool:
+    """Render one claimed job with the segments engine, resuming from its recorded segments.
+
+    Segment files live in ``<temp>/queue/job_<id>/`` (or the render cache),
+    outside the per-run workspace, so they survive the process.
+    """
+    from .YTPGenerator import YTPGenerator
+
+    job = queued.job
+    generator = YTPGenerator(job, runner)
+    try:
+        segments = generator.plan_segments()
+        graph = generator.timeline_graph(segments, "segments")
+        fingerprints = {
+            segment.index: graph.nodes[f"{segment.kind}:{segment.index}"].fingerprint for segment in segments
+        }
+        completed = queue.completed_segments(queued.id, fingerprints)
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+        if completed:
+            log(f"Job #{queued.id}: resuming with {len(completed)} of {len(segments)} segments done.")
+
+        def record(result) -> None:
+            index = result.segment.index
+            if result.ok:
+                queue.record_segment(queued.id, index, fingerprints[index], result.output_path)
+            elif not runner.cancelled:
+                queue.record_segment(queued.id, index, fingerprints[index], None, result.stderr)
+            if on_segment:
+                on_segment(result)
+
+        rendered = generator.render_segments(
+            job.output_path,
+            segments,
+            on_segment=record,
+            segment_dir=Path(job.settings.temp_dir) / "queue" / f"job_{queued.id}",
+            completed=completed,
+            retries=SEGMENT_RETRIES,
+            backoff=SEGMENT_BACKOFF,
+        )
+        for note in generator.render_notes:
+            log(note)
+        if runner.cancelled:
+            queue.release(queued.id)
+            return False
+        if rendered.failed or rendered.returncode != 0:
+            if rendered.failed:
+                failed = ", ".join(str(result.segment.index) for result in rendered.failed)
+                last_error = (rendered.failed[0].stderr.strip().splitlines() or ["unknown error"])[-1]
+                queue.fail(queued.id, f"failed segments {failed}: {last_error}")
+            else:
+                concat_error = rendered.concat.stderr.strip()[-500:] if rendered.concat is not None else ""
+                queue.fail(queued.id, concat_error or "concat failed")
+            return False
+        GraphState.for_output(job.settings.temp_dir, job.output_path).save(graph, job.output_path)
+        queue.finish(queued.id, job.output_path)
+        return True
+    except (OSError, RuntimeError, ValueError) as exc:
+        if runner.cancelled:
+            queue.release(queued.id)
+        else:
+            queue.fail(queued.id, str(exc))
+        return False
+    finally:
+        generator.close()
+
+
+def run_queue(
+    queue: JobQueue,
+    runner: FFmpegRunner,
+    on_segment: Optional[Callable] = None,
+    log: Callable[[str], None] = print,
+    wait: bool = False,
+) -> int:
+    """Run due jobs until none are left (with ``wait``, also sleep until pending retries are due).
+
+    Returns the number of jobs that finished successfully.
+    """
+    queue.recover()
+    finished = 0
+    while not runner.cancelled:
+        queued = queue.claim()
+        if queued is None:
+            due = queue.next_due()
+            if not wait or due is None or runner.wait_cancelled(max(0.0, due - time.time())):
+                break
+            continue
+        log(f"Job #{queued.id}: attempt {queued.attempts}/{queued.max_attempts} -> {queued.job.output_path}")
+        if run_job(queue, queued, runner, on_segment, log):
+            finished += 1
+            log(f"Job #{queued.id}: done.")
+        else:
+            state = queue.get(queued.id)
+            log(state.summary() if state else f"Job #{queued.id}: removed.")
+    return finished
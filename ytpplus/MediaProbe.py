@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+VIDEO_COPY_KEYS = ("codec_name", "width", "height", "pix_fmt", "time_base")
+AUDIO_COPY_KEYS = ("codec_name", "sample_rate", "channels", "channel_layout")
+
+
+@dataclass
+class StreamInfo:
+    codec_type: str
+    codec_name: str = ""
+    width: int = 0
+    height: int = 0
+    pix_fmt: str = ""
+    time_base: str = ""
+    frame_rate: str = ""
+    sample_rate: int = 0
+    channels: int = 0
+    channel_layout: str = ""
+
+
+@dataclass
+class MediaInfo:
+    path: str
+    duration: float = 0.0
+    format_name: str = ""
+    streams: List[StreamInfo] = field(default_factory=list)
+    keyframes: Optional[List[float]] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MediaInfo":
+        streams = [StreamInfo(**stream) for stream in data.get("streams", [])]
+        return cls(
+            path=data["path"],
+            duration=data.get("duration", 0.0),
+            format_name=data.get("format_name", ""),
+            streams=streams,
+            keyframes=data.get("keyframes"),
+        )
+
+    def first(self, codec_type: str) -> Optional[StreamInfo]:
+        for stream in self.streams:
+            if stream.codec_type == codec_type:
+                return stream
+        return None
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return self.first("video")
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return self.first("audio")
+
+    @property
+    def fps(self) -> float:
+        video = self.video
+        if video is None or "/" not in video.frame_rate:
+            return 0.0
+        num, den = video.frame_rate.split("/", 1)
+        return float(num) / float(den) if float(den) else 0.0
+
+
+def _probe_cmd(ffprobe: str, path: Path) -> List[str]:
+    return [
+        ffprobe,
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        str(path),
+    ]
+
+
+def _keyframe_cmd(ffprobe: str, path: Path) -> List[str]:
+    return [
+        ffprobe,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-print_format",
+        "json",
+        str(path),
+    ]
+
+
+def parse_probe(data: dict, path: Path) -> MediaInfo:
+    streams: List[StreamInfo] = []
+    for raw in data.get("streams", []):
+        streams.append(
+            StreamInfo(
+                codec_type=raw.get("codec_type", ""),
+                codec_name=raw.get("codec_name", ""),
+                width=int(raw.get("width") or 0),
+                height=int(raw.get("height") or 0),
+                pix_fmt=raw.get("pix_fmt", ""),
+                time_base=raw.get("time_base", ""),
+                frame_rate=raw.get("r_frame_rate", ""),
+                sample_rate=int(raw.get("sample_rate") or 0),
+                channels=int(raw.get("channels") or 0),
+                channel_layout=raw.get("channel_layout", ""),
+            )
+        )
+    fmt = data.get("format", {})
+    return MediaInfo(
+        path=str(path),
+        duration=float(fmt.get("duration") or 0.0),
+        format_name=fmt.get("format_name", ""),
+        streams=streams,
+    )
+
+
+def _run_probe(cmd: List[str], path: Path) -> dict:
+    result = subprocess.run(cmd, check=False, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr.strip()}")
+    return json.loads(result.stdout or "{}")
+
+
+def probe_media(ffprobe: str, path: Path, keyframes: bool = False) -> MediaInfo:
+    """Run ffprobe on ``path`` and return its parsed stream layout."""
+    info = parse_probe(_run_probe(_probe_cmd(ffprobe, path), path), path)
+    if keyframes:
+        packets = _run_probe(_keyframe_cmd(ffprobe, path), path).get("packets", [])
+        info.keyframes = [
+            float(packet["pts_time"])
+            for packet in packets
+            if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+        ]
+    return info
+
+
+class MetadataCache:
+    """On-disk ffprobe cache keyed by resolved path and validated by size/mtime.
+
+    Entries survive between renders and GUI sessions; a changed file is
+    re-probed on the next lookup and missing files are dropped by ``prune``.
+    """
+
+    def __init__(self, cache_file: Path, ffprobe: str = "ffprobe", keyframes: bool = False) -> None:
+        self.cache_file = cache_file
+        self.ffprobe = ffprobe
+        self.keyframes = keyframes
+        self.errors: Dict[str, str] = {}
+        self._entries: Dict[str, dict] = self._load()
+        self._removed: set = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, temp_dir: str, ffprobe: str, keyframes: bool = False) -> "MetadataCache":
+        return cls(Path(temp_dir) / "cache" / "media_metadata.json", ffprobe, keyframes)
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def cached(self, path: Path) -> Optional[MediaInfo]:
+        """Return the cached entry for ``path`` if it is still fresh."""
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        if entry is None or stamp is None or (entry["size"], entry["mtime_ns"]) != stamp:
+            return None
+        if self.keyframes and entry["info"].get("keyframes") is None:
+            return None
+        return MediaInfo.from_dict(entry["info"])
+
+    def get(self, path: Path) -> MediaInfo:
+        info = self.cached(path)
+        if info is not None:
+            return info
+        stamp = self._stamp(path)
+        if stamp is None:
+            raise RuntimeError(f"Media file not found: {path}")
+        info = probe_media(self.ffprobe, Path(path), self.keyframes)
+        with self._lock:
+            self._entries[self._key(path)] = {"size": stamp[0], "mtime_ns": stamp[1], "info": asdict(info)}
+            self._dirty = True
+        return info
+
+    def probe_all(self, paths: Iterable[Path], workers: Optional[int] = None) -> Dict[Path, MediaInfo]:
+        """Probe every stale path concurrently; failures are kept in ``errors``."""
+        paths = list(dict.fromkeys(Path(path) for path in paths))
+        results: Dict[Path, MediaInfo] = {}
+        stale: List[Path] = []
+        for path in paths:
+            info = self.cached(path)
+            if info is None:
+                stale.append(path)
+            else:
+                results[path] = info
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers or os.cpu_count() or 1, len(stale)))) as pool:
+                for path, outcome in zip(stale, pool.map(self._try_get, stale)):
+                    if isinstance(outcome, MediaInfo):
+                        results[path] = outcome
+                    else:
+                        self.errors[str(path)] = outcome
+        return results
+
+    def _try_get(self, path: Path):
+        try:
+            return self.get(path)
+        except (OSError, RuntimeError, ValueError) as exc:
+            return str(exc)
+
+    def prune(self) -> int:
+        """Drop entries whose files no longer exist or have changed."""
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if self._stamp(Path(key)) != (entry["size"], entry["mtime_ns"])
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._removed.update(stale)
+            self._dirty = self._dirty or bool(stale)
+        return len(stale)
+
+    def save(self) -> None:
+        """Merge with the on-disk cache and replace it atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = self._load()
+            for key in self._removed:
+                merged.pop(key, None)
+            merged.update(self._entries)
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_file.write_text(json.dumps(merged), encoding="utf-8")
+            os.replace(tmp_file, self.cache_file)
+            self._entries = merged
+            self._dirty = False
+
+
+def _mismatch(infos: Sequence[MediaInfo], codec_type: str, keys: Sequence[str]) -> Optional[str]:
+    streams = [info.first(codec_type) for info in infos]
+    present = [stream is not None for stream in streams]
+    if not any(present):
+        return None
+    if not all(present):
+        missing = infos[present.index(False)].path
+        return f"{missing} has no {codec_type} stream"
+    reference = streams[0]
+    for info, stream in zip(infos[1:], streams[1:]):
+        for key in keys:
+            if getattr(stream, key) != getattr(reference, key):
+                return (
+                    f"{codec_type} {key} differs: {infos[0].path}={getattr(reference, key)!r}, "
+                    f"{info.path}={getattr(stream, key)!r}"
+                )
+    return None
+
+
+def concat_copy_blockers(infos: Sequence[MediaInfo]) -> Dict[str, Optional[str]]:
+    """Return, per stream type, why the inputs cannot be stream-copied (or None)."""
+    return {
+        "video": _mismatch(infos, "video", VIDEO_COPY_KEYS),
+        "audio": _mismatch(infos, "audio", AUDIO_COPY_KEYS),
+    }
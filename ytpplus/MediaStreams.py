@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .FFmpegRunner import FFmpegRunner, kill_process_tree
+
+ANALYSIS_RATE = 8000
+
+
+def _iter_pipe(
+    cmd: List[str], item_bytes: int, items_per_chunk: int, runner: Optional[FFmpegRunner] = None, label: str = ""
+) -> Iterator[bytes]:
+    """Yield whole-item byte blocks from ``cmd``'s stdout until it exits.
+
+    The process is started through ``runner`` (a private one by default),
+    so cancelling the runner stops it. Stderr is drained on its own thread
+    so a source that floods decode errors cannot stall the pipe.
+    """
+    runner = runner or FFmpegRunner()
+    process = runner.spawn(cmd)
+    errors: List[bytes] = []
+    drain = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+    drain.start()
+    try:
+        pending = b""
+        while True:
+            block = process.stdout.read(item_bytes * items_per_chunk)
+            if not block:
+                break
+            pending += block
+            usable = len(pending) - len(pending) % item_bytes
+            if usable:
+                yield pending[:usable]
+                pending = pending[usable:]
+        process.wait()
+        drain.join()
+        if runner.cancelled:
+            raise RuntimeError(f"Cancelled: {cmd[cmd.index('-i') + 1]}")
+        if process.returncode != 0:
+            stderr = b"".join(errors).decode("utf-8", "replace")
+            raise RuntimeError(f"ffmpeg stream failed for {cmd[cmd.index('-i') + 1]}: {stderr.strip()[-500:]}")
+    finally:
+        if process.poll() is None:
+            kill_process_tree(process)
+            process.wait()
+        drain.join()
+        process.stdout.close()
+        process.stderr.close()
+        runner.release(process, label)
+
+
+def iter_pcm(
+    ffmpeg: str,
+    path: Path,
+    sample_rate: int = ANALYSIS_RATE,
+    chunk_seconds: float = 10.0,
+    channels: int = 1,
+    max_seconds: Optional[float] = None,
+    runner: Optional[FFmpegRunner] = None,
+    start: float = 0.0,
+) -> Iterator[np.ndarray]:
+    """Decode the first audio stream of ``path``, from ``start`` seconds, as float32 PCM chunks.
+
+    Mono chunks are flat; with ``channels > 1`` they have shape ``(n, channels)``.
+    """
+    seek = ["-ss", f"{start:.3f}"] if start else []
+    limit = ["-t", f"{max_seconds:.3f}"] if max_seconds else []
+    cmd = [
+        ffmpeg, "-v", "error", *seek, "-i", str(path), *limit,
+        "-map", "0:a:0", "-vn", "-ac", str(channels), "-ar", str(sample_rate), "-f", "f32le", "pipe:1",
+    ]
+    for block in _iter_pipe(cmd, 4 * channels, max(1, int(sample_rate * chunk_seconds)), runner, f"pcm {path.name}"):
+        samples = np.frombuffer(block, dtype=np.float32)
+        yield samples if channels == 1 else samples.reshape(-1, channels)
+
+
+def iter_frames(
+    ffmpeg: str,
+    path: Path,
+    width: int,
+    height: int,
+    fps: float,
+    batch: int = 64,
+    runner: Optional[FFmpegRunner] = None,
+) -> Iterator[np.ndarray]:
+    """Decode ``path`` as ``(n, height, width)`` uint8 grayscale batches at ``fps``."""
+    cmd = [
+        ffmpeg, "-v", "error", "-i", str(path),
+        "-map", "0:v:0", "-an", "-vf", f"fps={fps},scale={width}:{height},format=gray",
+        "-f", "rawvideo", "pipe:1",
+    ]
+    for block in _iter_pipe(cmd, width * height, batch, runner, f"frames {path.name}"):
+        yield np.frombuffer(block, dtype=np.uint8).reshape(-1, height, width)
+
+
+def rms_envelope(chunks: Iterable[np.ndarray], hop: int) -> np.ndarray:
+    """Reduce streamed PCM chunks to one RMS value per ``hop`` samples."""
+    values: List[np.ndarray] = []
+    carry = np.zeros(0, dtype=np.float32)
+    for chunk in chunks:
+        samples = np.concatenate((carry, chunk)) if carry.size else chunk
+        usable = len(samples) - len(samples) % hop
+        if usable:
+            frames = samples[:usable].reshape(-1, hop).astype(np.float64)
+            values.append(np.sqrt(np.mean(frames * frames, axis=1)))
+        carry = samples[usable:]
+    return np.concatenate(values) if values else np.zeros(0)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .FFmpegRunner import FFmpegRunner
+from .MediaProbe import MetadataCache
+from .RenderCache import RenderCache, file_identity
+from .Utilities import ENCODER_PROFILES, EncoderProfile
+
+# Bump when the conform command changes so normalized copies are rebuilt.
+NORMALIZE_VERSION = 1
+
+
+class Normalizer:
+    """Sources conformed once to the project's intermediate format.
+
+    Each video is scaled into the project size (letterboxed, square
+    pixels), resampled to the project frame rate and audio rate with a
+    stereo track (silent where the source has none), and encoded with the
+    short-GOP ``intermediate`` profile (or ``profile``, for copies that are
+    delivered as they are) into ``<temp>/cache/normalized``.
+    Copies are keyed by source identity and target format and keep the
+    source timing, so trims planned against the original apply unchanged,
+    seek to a keyframe at most one GOP away, and join with stream copy.
+    Builds run through ``runner``, so cancelling it stops them.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ffmpeg: str,
+        metadata: MetadataCache,
+        width: int,
+        height: int,
+        fps: float,
+        sample_rate: int,
+        profile: EncoderProfile = ENCODER_PROFILES["intermediate"],
+        runner: Optional[FFmpegRunner] = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ffmpeg = ffmpeg
+        self.runner = runner or FFmpegRunner()
+        self.metadata = metadata
+        self.width = max(2, int(width) // 2 * 2)
+        self.height = max(2, int(height) // 2 * 2)
+        self.fps = float(fps)
+        self.sample_rate = int(sample_rate)
+        self.profile = profile
+        self.errors: Dict[str, str] = {}
+
+    @classmethod
+    def for_job(
+        cls,
+        job,
+        metadata: MetadataCache,
+        runner: Optional[FFmpegRunner] = None,
+        profile: EncoderProfile = ENCODER_PROFILES["intermediate"],
+    ) -> "Normalizer":
+        settings = job.settings
+        return cls(
+            Path(settings.temp_dir) / "cache" / "normalized",
+            job.tool_paths.ffmpeg,
+            metadata,
+            settings.width,
+            settings.height,
+            settings.fps,
+            settings.sample_rate,
+            profile,
+            runner,
+        )
+
+    def target(self) -> list:
+        """The conformed format, for render fingerprints."""
+        return [NORMALIZE_VERSION, self.width, self.height, self.fps, self.sample_rate, self.profile.args()]
+
+    def path_for(self, source: Path) -> Path:
+        key = RenderCache.key("normalized", file_identity(source), self.target())
+        return self.cache_dir / f"{key}.mp4"
+
+    def get(self, source: Path) -> Optional[Path]:
+        """Return the finished copy of ``source``, or None if there is none yet."""
+        try:
+            path = self.path_for(source)
+        except OSError:
+            return None
+        return path if path.exists() else None
+
+    def resolve(self, source: Path) -> Path:
+        return self.get(source) or source
+
+    def _cmd(self, source: Path, target: Path, has_audio: bool, threads: int = 0) -> List[str]:
+        video = (
+            f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+            f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={self.fps:g}"
+        )
+        cmd = [self.ffmpeg, "-y", "-i", str(source)]
+        if has_audio:
+            cmd += ["-map", "0:v:0", "-map", "0:a:0"]
+        else:
+            cmd += ["-f", "lavfi", "-i", f"anullsrc=r={self.sample_rate}:cl=stereo", "-map", "0:v:0", "-map", "1:a:0"]
+            cmd += ["-shortest"]
+        cmd += ["-vf", video, "-ar", str(self.sample_rate), "-ac", "2", "-sn", "-dn"]
+        cmd += self.profile.args(threads)
+        cmd += [str(target)]
+        return cmd
+
+    def build(self, source: Path, threads: int = 0) -> Path:
+        """Conform ``source`` now (no-op if its copy already exists)."""
+        path = self.path_for(source)
+        if path.exists():
+            return path
+        info = self.metadata.get(source)
+        if info.video is None:
+            raise ValueError(f"No video stream to normalize in {source}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.mp4")
+        cmd = self._cmd(source, staging, info.audio is not None, threads)
+        result = self.runner.run(cmd, info.duration, label=f"normalize {source.name}")
+        if result.returncode != 0 or not staging.exists():
+            staging.unlink(missing_ok=True)
+            raise RuntimeError(f"Normalize failed for {source}: {result.stderr.strip()[-500:]}")
+        os.replace(staging, path)
+        return path
+
+    def _try_build(self, source: Path, threads: int):
+        try:
+            return self.build(source, threads)
+        except (OSError, RuntimeError, ValueError) as exc:
+            return str(exc)
+
+    def build_all(self, sources: Iterable[Path], workers: Optional[int] = None) -> Dict[Path, Path]:
+        """Conform every source in parallel; failures are kept in ``errors`` and left out."""
+        sources = list(dict.fromkeys(Path(source) for source in sources))
+        built: Dict[Path, Path] = {}
+        if not sources:
+            return built
+        workers = max(1, min(workers or os.cpu_count() or 1, len(sources)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for source, outcome in zip(sources, pool.map(lambda source: self._try_build(source, threads), sources)):
+                if isinstance(outcome, Path):
+                    built[source] = outcome
+                else:
+                    self.errors[str(source)] = outcome
+        return built
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .AssetIndex import asset_kind
+from .FFmpegRunner import FFmpegRunner
+from .RenderCache import RenderCache, file_identity, file_sha256
+
+# Bump when the conform commands change so cached overlays are rebuilt.
+OVERLAY_VERSION = 1
+# Overlays are fitted inside this fraction of the frame.
+OVERLAY_SCALE = 0.5
+# Image and GIF assets are rasterized; overlay videos are scaled in the render graph.
+RASTER_KINDS = ("image", "gif")
+
+
+def overlay_box(width: int, height: int) -> Tuple[int, int]:
+    return max(2, int(width * OVERLAY_SCALE) // 2 * 2), max(2, int(height * OVERLAY_SCALE) // 2 * 2)
+
+
+class OverlayCache:
+    """Image and GIF overlays rasterized once, fitted inside a target box.
+
+    Stills become RGBA PNGs and GIFs become looping QuickTime Animation
+    (ARGB) clips in ``<temp>/cache/overlays/``. Entries are keyed by the
+    asset's SHA-256 and the box, so copies of one meme share an entry and an
+    edited file gets a new one; hashes are remembered per file identity.
+    Builds run through ``runner``, so cancelling it stops them.
+    """
+
+    def __init__(self, cache_dir: Path, ffmpeg: str = "ffmpeg", runner: Optional[FFmpegRunner] = None) -> None:
+        self.cache_dir = cache_dir
+        self.ffmpeg = ffmpeg
+        self.runner = runner or FFmpegRunner()
+        self.errors: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, temp_dir: str, ffmpeg: str, runner: Optional[FFmpegRunner] = None) -> "OverlayCache":
+        return cls(Path(temp_dir) / "cache" / "overlays", ffmpeg, runner)
+
+    def _hash(self, source: Path) -> str:
+        identity = str(file_identity(source))
+        with self._lock:
+            digest = self._hashes.get(identity)
+        if digest is None:
+            digest = file_sha256(source)
+            with self._lock:
+                self._hashes[identity] = digest
+        return digest
+
+    def path_for(self, source: Path, size: Tuple[int, int]) -> Path:
+        kind = asset_kind(str(source))
+        if kind not in RASTER_KINDS:
+            raise ValueError(f"Not an image or GIF overlay: {source}")
+        key = RenderCache.key("overlay", OVERLAY_VERSION, self._hash(source), list(size))
+        return self.cache_dir / key[:2] / f"{key}{'.png' if kind == 'image' else '.mov'}"
+
+    def _cmd(self, source: Path, target: Path, size: Tuple[int, int]) -> List[str]:
+        scale = f"scale={size[0]}:{size[1]}:force_original_aspect_ratio=decrease"
+        if target.suffix == ".png":
+            return [self.ffmpeg, "-y", "-i", str(source), "-vf", f"{scale},format=rgba", "-frames:v", "1", str(target)]
+        return [
+            self.ffmpeg,
+            "-y",
+            "-i",
+            str(source),
+            "-vf",
+            f"{scale},format=argb",
+            "-an",
+            "-c:v",
+            "qtrle",
+            str(target),
+        ]
+
+    def get(self, source: Path, size: Tuple[int, int]) -> Path:
+        """Return the conformed overlay for ``source``, building it now if needed."""
+        path = self.path_for(source, size)
+        if path.exists():
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp{path.suffix}")
+        result = self.runner.run(self._cmd(source, staging, size), label=f"overlay {source.name}")
+        if result.returncode != 0 or not staging.exists():
+            staging.unlink(missing_ok=True)
+            raise RuntimeError(f"Overlay failed for {source}: {result.stderr.strip()[-500:]}")
+        os.replace(staging, path)
+        return path
+
+    def _try_get(self, source: Path, size: Tuple[int, int]):
+        try:
+            return self.get(source, size)
+        except (OSError, RuntimeError, ValueError) as exc:
+            return str(exc)
+
+    def build_all(
+        self, sources: Iterable[Path], size: Tuple[int, int], workers: Optional[int] = None
+    ) -> Dict[Path, Path]:
+        """Conform every image and GIF in ``sources`` in parallel; failures are kept in ``errors``."""
+        sources = list(dict.fromkeys(Path(source) for source in sources if asset_kind(str(source)) in RASTER_KINDS))
+        built: Dict[Path, Path] = {}
+        if not sources:
+            return built
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or os.cpu_count() or 1, len(sources)))) as pool:
+            for source, outcome in zip(sources, pool.map(lambda source: self._try_get(source, size), sources)):
+                if isinstance(outcome, Path):
+                    built[source] = outcome
+                else:
+                    self.errors[str(source)] = outcome
+        return built
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .FFmpegRunner import FFmpegRunner
+from .RenderCache import RenderCache, file_identity
+from .Utilities import ENCODER_PROFILES, EncoderProfile
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+class ProxyManager:
+    """Low-resolution proxy copies of sources for previews and draft renders.
+
+    Proxies are scaled to ``scale`` of the project size, encoded with the
+    ``proxy`` profile, keyed by source identity, target size and profile,
+    and stored in ``<temp>/cache/proxies``. They
+    keep the source timing, so trim points planned against the original
+    apply unchanged. Builds run through ``runner``, so cancelling it stops
+    them and its ``on_exit`` hook sees each one.
+    """
+
+    def __init__(
+        self,
+        proxy_dir: Path,
+        ffmpeg: str,
+        width: int,
+        height: int,
+        scale: float,
+        workers: int = 0,
+        runner: Optional[FFmpegRunner] = None,
+        profile: EncoderProfile = ENCODER_PROFILES["proxy"],
+    ) -> None:
+        self.proxy_dir = proxy_dir
+        self.ffmpeg = ffmpeg
+        self.profile = profile
+        self.runner = runner or FFmpegRunner()
+        self.width = _even(width * scale)
+        self.height = _even(height * scale)
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.errors: Dict[str, str] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Path, Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_job(cls, job, runner: Optional[FFmpegRunner] = None) -> "ProxyManager":
+        settings = job.settings
+        return cls(
+            Path(settings.temp_dir) / "cache" / "proxies",
+            job.tool_paths.ffmpeg,
+            settings.width,
+            settings.height,
+            settings.proxy_scale,
+            settings.render_workers,
+            runner,
+        )
+
+    def proxy_path(self, source: Path) -> Path:
+        key = RenderCache.key("proxy", file_identity(source), self.width, self.height, self.profile.args())
+        return self.proxy_dir / f"{key}.mp4"
+
+    def get(self, source: Path) -> Optional[Path]:
+        """Return the finished proxy for ``source``, or None if it is not ready."""
+        try:
+            path = self.proxy_path(source)
+        except OSError:
+            return None
+        return path if path.exists() else None
+
+    def resolve(self, source: Path) -> Path:
+        return self.get(source) or source
+
+    def _cmd(self, source: Path, target: Path) -> List[str]:
+        scale = (
+            f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+            "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+        )
+        return [self.ffmpeg, "-y", "-i", str(source), "-vf", scale, *self.profile.args(), str(target)]
+
+    def build(self, source: Path) -> Path:
+        """Create the proxy for ``source`` now (no-op if it already exists)."""
+        path = self.proxy_path(source)
+        if path.exists():
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.mp4")
+        result = self.runner.run(self._cmd(source, staging), label=f"proxy {source.name}")
+        if result.returncode != 0 or not staging.exists():
+            staging.unlink(missing_ok=True)
+            raise RuntimeError(f"Proxy failed for {source}: {result.stderr.strip()[-500:]}")
+        os.replace(staging, path)
+        return path
+
+    def _build_quietly(self, source: Path) -> Optional[Path]:
+        try:
+            return self.build(source)
+        except (OSError, RuntimeError) as exc:
+            self.errors[str(source)] = str(exc)
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(source, None)
+
+    def build_async(self, sources: Iterable[Path]) -> List[Future]:
+        """Queue proxies for every source that has none yet; returns the futures."""
+        futures: List[Future] = []
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="proxy")
+            for source in sources:
+                source = Path(source)
+                if source in self._pending or self.get(source) is not None:
+                    continue
+                future = self._pool.submit(self._build_quietly, source)
+                self._pending[source] = future
+                futures.append(future)
+        return futures
+
+    def build_all(self, sources: Iterable[Path]) -> Dict[Path, Optional[Path]]:
+        """Build proxies for ``sources`` in parallel and wait for them."""
+        sources = [Path(source) for source in sources]
+        for future in self.build_async(sources):
+            future.result()
+        return {source: self.get(source) for source in sources}
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+
+def file_identity(path: Path) -> list:
+    """Identify a source file by resolved path, size and mtime."""
+    stat = os.stat(path)
+    return [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Content-addressed store for intermediate render outputs.
+
+    Files live under ``<cache_dir>/<hash[:2]>/<hash><suffix>``. A hit refreshes
+    the file's mtime, and ``evict`` removes least-recently-used files until
+    the cache fits in ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, temp_dir: str, max_mb: int) -> "RenderCache":
+        return cls(Path(temp_dir) / "cache" / "segments", max(0, max_mb) * 1024 * 1024)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(*parts: object) -> str:
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    def staging_path(self, key: str, suffix: str) -> Path:
+        """Return a unique path to render into before ``store`` moves it in place."""
+        path = self.cache_dir / key[:2] / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def lookup(self, key: str, suffix: str) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        path = self.path_for(key, suffix)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, key: str, produced: Path) -> Path:
+        path = self.path_for(key, produced.suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(produced, path)
+        return path
+
+    def _entries(self) -> List[os.DirEntry]:
+        entries: List[os.DirEntry] = []
+        if not self.cache_dir.is_dir():
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                entries.extend(entry for entry in os.scandir(shard.path) if entry.is_file())
+        return entries
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self, keep: Iterable[Path] = ()) -> List[Path]:
+        """Remove least-recently-used files until the cache fits its budget."""
+        keep_paths = {str(Path(path).resolve()) for path in keep}
+        removed: List[Path] = []
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if str(Path(entry.path).resolve()) in keep_paths or ".tmp" in entry.name:
+                    continue
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                total -= size
+                removed.append(Path(entry.path))
+        return removed
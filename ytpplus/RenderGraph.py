@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .RenderCache import RenderCache, file_identity
+
+
+@dataclass
+class RenderNode:
+    """One render step; ``fingerprint`` hashes its own parameters and its inputs' fingerprints."""
+
+    name: str
+    kind: str
+    params: object
+    inputs: List[str] = field(default_factory=list)
+    fingerprint: str = ""
+
+
+class RenderGraph:
+    """Dependency graph of render steps (segments, transitions, bookends, output).
+
+    Nodes are added inputs-first, so a change anywhere upstream changes the
+    fingerprint of every node that depends on it.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, RenderNode] = {}
+
+    def add(self, name: str, kind: str, params: object, inputs: Iterable[str] = ()) -> RenderNode:
+        inputs = list(inputs)
+        unknown = [item for item in inputs if item not in self.nodes]
+        if unknown:
+            raise ValueError(f"Render node {name} depends on unknown nodes: {', '.join(unknown)}")
+        node = RenderNode(name, kind, params, inputs)
+        node.fingerprint = RenderCache.key(kind, params, [self.nodes[item].fingerprint for item in inputs])
+        self.nodes[name] = node
+        return node
+
+    def fingerprints(self) -> Dict[str, str]:
+        return {name: node.fingerprint for name, node in self.nodes.items()}
+
+    def dirty(self, previous: Dict[str, str]) -> List[RenderNode]:
+        """Nodes whose fingerprint is not among ``previous``'s.
+
+        Matching is by content, not name, so a clip that only moved in the
+        timeline is still clean.
+        """
+        known = set(previous.values())
+        return [node for node in self.nodes.values() if node.fingerprint not in known]
+
+
+class GraphState:
+    """Node fingerprints and output identity from the last successful render of one output.
+
+    Stored as ``<temp>/cache/graphs/<hash>.json``, keyed by the output's resolved path.
+    """
+
+    def __init__(self, state_file: Path) -> None:
+        self.state_file = state_file
+
+    @classmethod
+    def for_output(cls, temp_dir: str, output_path: Path) -> "GraphState":
+        key = RenderCache.key("graph", str(Path(output_path).resolve()))
+        return cls(Path(temp_dir) / "cache" / "graphs" / f"{key}.json")
+
+    def load(self) -> dict:
+        try:
+            return json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def stale(self, graph: RenderGraph, output_path: Path) -> List[RenderNode]:
+        """Dirty nodes, plus the output node when the file on disk is not the one recorded."""
+        state = self.load()
+        dirty = graph.dirty(state.get("nodes", {}))
+        output = graph.nodes.get("output")
+        if output is not None and output not in dirty and self._identity(output_path) != state.get("output"):
+            # Output deleted or overwritten since it was recorded.
+            dirty.append(output)
+        return dirty
+
+    def save(self, graph: RenderGraph, output_path: Path) -> None:
+        state = {"nodes": graph.fingerprints(), "output": self._identity(output_path)}
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.state_file.with_name(f"{self.state_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        staging.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(staging, self.state_file)
+
+    def clear(self) -> None:
+        self.state_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _identity(path: Path) -> Optional[list]:
+        try:
+            return file_identity(path)
+        except OSError:
+            return None
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence
+
+from .FFmpegRunner import FFmpegRunner, kill_process_tree
+
+CHUNK_BYTES = 1 << 16
+# Chunks buffered per producer before its ffmpeg blocks on the pipe (4 MiB).
+QUEUE_CHUNKS = 64
+
+Feed = Callable[[BinaryIO], None]
+
+
+class _Producer:
+    """One segment ffmpeg writing a stream to stdout, drained into a bounded queue."""
+
+    def __init__(self, runner: FFmpegRunner, cmd: List[str], feed: Optional[Feed] = None) -> None:
+        self.runner = runner
+        self.proc = runner.spawn(cmd, feed)
+        self.chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(QUEUE_CHUNKS)
+        self.bytes_read = 0
+        self._stderr: List[bytes] = []
+        self._threads = [
+            threading.Thread(target=self._read_stdout, daemon=True),
+            threading.Thread(target=lambda: self._stderr.append(self.proc.stderr.read()), daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _read_stdout(self) -> None:
+        try:
+            for chunk in iter(lambda: self.proc.stdout.read1(CHUNK_BYTES), b""):
+                self.bytes_read += len(chunk)
+                self.chunks.put(chunk)
+        finally:
+            self.chunks.put(None)
+
+    def finish(self) -> int:
+        self.proc.wait()
+        for thread in self._threads:
+            thread.join()
+        self.runner.release(self.proc, "stream segment")
+        return self.proc.returncode
+
+    @property
+    def stderr(self) -> str:
+        return b"".join(self._stderr).decode("utf-8", "replace")
+
+    def abort(self) -> None:
+        kill_process_tree(self.proc)
+        while self.chunks.get() is not None:
+            pass
+        self.finish()
+
+
+def feed_in_order(
+    runner: FFmpegRunner,
+    commands: Sequence[List[str]],
+    workers: int,
+    on_done: Callable[[int, int, str], None],
+    feeds: Optional[Sequence[Optional[Feed]]] = None,
+) -> Feed:
+    """Return a ``feed`` for ``FFmpegRunner.run`` that pipes ``commands``' output in order.
+
+    Up to ``workers`` producers run at once; producers ahead of the one
+    being written are held back by their bounded queues, so memory stays
+    at ``workers * QUEUE_CHUNKS * CHUNK_BYTES``. ``on_done(index,
+    returncode, stderr)`` is called as each producer finishes. ``feeds[i]``,
+    if set, writes the stdin of producer ``i``.
+    """
+
+    def feed(sink: BinaryIO) -> None:
+        producers: Dict[int, _Producer] = {}
+        launched = 0
+        try:
+            for index in range(len(commands)):
+                while launched < min(index + max(1, workers), len(commands)) and not runner.cancelled:
+                    producers[launched] = _Producer(runner, commands[launched], feeds[launched] if feeds else None)
+                    launched += 1
+                producer = producers.get(index)
+                if producer is None:
+                    on_done(index, -1, "Cancelled.")
+                    continue
+                for chunk in iter(producer.chunks.get, None):
+                    sink.write(chunk)
+                code = producers.pop(index).finish()
+                on_done(index, code, producer.stderr)
+        finally:
+            for producer in producers.values():
+                producer.abort()
+
+    return feed
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .FFmpegRunner import FFmpegRunner
+from .FilterGraph import AUDIO_SAMPLE_RATE
+from .MediaStreams import iter_pcm
+from .RenderCache import RenderCache, file_identity
+
+# Bump when decoding or normalization changes so cached PCM is rebuilt.
+PCM_VERSION = 1
+PCM_CHANNELS = 2
+# Every sound is scaled so its peak sits at -3 dBFS.
+PCM_PEAK = 10 ** (-3 / 20)
+# Longer files are cut here; overlays are stingers, not music beds.
+MAX_SOUND_SECONDS = 20.0
+
+
+def pcm_input_args(sample_rate: int = AUDIO_SAMPLE_RATE, source: str = "pipe:0") -> List[str]:
+    """FFmpeg input options for the raw PCM that ``mix_sounds`` produces."""
+    return ["-f", "f32le", "-ar", str(sample_rate), "-ac", str(PCM_CHANNELS), "-i", source]
+
+
+def mix_sounds(
+    sounds: Sequence[Tuple[np.ndarray, float]], duration: float, sample_rate: int = AUDIO_SAMPLE_RATE
+) -> np.ndarray:
+    """Sum ``(pcm, offset)`` pairs into one ``duration``-long stereo track, clipped to [-1, 1].
+
+    Sounds running past the end are cut off.
+    """
+    frames = max(0, int(round(duration * sample_rate)))
+    track = np.zeros((frames, PCM_CHANNELS), dtype=np.float32)
+    for pcm, offset in sounds:
+        start = min(frames, max(0, int(round(offset * sample_rate))))
+        length = min(len(pcm), frames - start)
+        track[start : start + length] += pcm[:length]
+    np.clip(track, -1.0, 1.0, out=track)
+    return track
+
+
+def write_pcm(sink: BinaryIO, track: np.ndarray) -> None:
+    sink.write(np.ascontiguousarray(track, dtype="<f4").tobytes())
+
+
+class SoundCache:
+    """Sound effects decoded once to normalized stereo float32 PCM.
+
+    Files live in ``<temp>/cache/sounds/<hash>.f32``, keyed by the source's
+    path, size and mtime, and are read back as read-only memory maps, so
+    mixing a stinger into a clip touches only the pages it uses and many
+    workers share one copy through the page cache. Decoders run through
+    ``runner``, so cancelling a render stops them.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ffmpeg: str = "ffmpeg",
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+        runner: Optional[FFmpegRunner] = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ffmpeg = ffmpeg
+        self.runner = runner
+        self.sample_rate = sample_rate
+        self.errors: Dict[str, str] = {}
+        self._maps: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, temp_dir: str, ffmpeg: str, runner: Optional[FFmpegRunner] = None) -> "SoundCache":
+        return cls(Path(temp_dir) / "cache" / "sounds", ffmpeg, runner=runner)
+
+    def path_for(self, source: Path) -> Path:
+        key = RenderCache.key("pcm", PCM_VERSION, self.sample_rate, PCM_CHANNELS, file_identity(source))
+        return self.cache_dir / f"{key}.f32"
+
+    def get(self, source: Path) -> np.ndarray:
+        """Return ``source`` as an ``(n, 2)`` float32 array, decoding it on first use."""
+        target = self.path_for(source)
+        with self._lock:
+            cached = self._maps.get(str(target))
+        if cached is not None:
+            return cached
+        if not target.exists():
+            self._decode(Path(source), target)
+        if target.stat().st_size == 0:
+            pcm = np.zeros((0, PCM_CHANNELS), dtype=np.float32)
+        else:
+            pcm = np.memmap(target, dtype="<f4", mode="r").reshape(-1, PCM_CHANNELS)
+        with self._lock:
+            self._maps[str(target)] = pcm
+        return pcm
+
+    def _decode(self, source: Path, target: Path) -> None:
+        chunks = list(
+            iter_pcm(
+                self.ffmpeg,
+                source,
+                self.sample_rate,
+                channels=PCM_CHANNELS,
+                max_seconds=MAX_SOUND_SECONDS,
+                runner=self.runner,
+            )
+        )
+        pcm = np.concatenate(chunks) if chunks else np.zeros((0, PCM_CHANNELS), dtype=np.float32)
+        peak = float(np.max(np.abs(pcm))) if pcm.size else 0.0
+        if peak > 0:
+            pcm = pcm * np.float32(PCM_PEAK / peak)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        staging = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        staging.write_bytes(np.ascontiguousarray(pcm, dtype="<f4").tobytes())
+        os.replace(staging, target)
+
+    def build_all(self, paths: Iterable[Path], workers: Optional[int] = None) -> Dict[Path, np.ndarray]:
+        """Decode every uncached sound concurrently; failures are kept in ``errors``."""
+        paths = list(dict.fromkeys(Path(path) for path in paths))
+        results: Dict[Path, np.ndarray] = {}
+        if not paths:
+            return results
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or os.cpu_count() or 1, len(paths)))) as pool:
+            for path, outcome in zip(paths, pool.map(self._try_get, paths)):
+                if isinstance(outcome, np.ndarray):
+                    results[path] = outcome
+                else:
+                    self.errors[str(path)] = outcome
+        return results
+
+    def _try_get(self, path: Path):
+        try:
+            return self.get(path)
+        except (OSError, RuntimeError, ValueError) as exc:
+            return str(exc)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .FFmpegRunner import FFmpegProgress
+from .Workspace import tree_size
+
+# Seconds between scratch-folder size samples while a render runs.
+SAMPLE_INTERVAL = 0.5
+
+Collector = Callable[[str, dict], None]
+
+
+@dataclass
+class ProcessStats:
+    label: str
+    seconds: float
+    returncode: int
+    fps: float = 0.0
+    speed: float = 0.0
+    bytes: int = 0
+    ended: float = 0.0
+
+
+class RenderTelemetry:
+    """Wall time per stage, ffmpeg process stats and scratch usage for one render.
+
+    Stage times are exclusive: time spent in a nested stage (``probe``
+    inside ``plan``) is not counted for its parent. Collectors added with
+    ``add_collector`` are called as ``collector(event, data)`` for every
+    ``"stage"``, ``"process"`` and final ``"report"`` event; a collector
+    that raises is dropped.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.processes: List[ProcessStats] = []
+        self.peak_temp_bytes = 0
+        self.collectors: List[Collector] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def add_collector(self, collector: Collector) -> None:
+        self.collectors.append(collector)
+
+    def _emit(self, event: str, data: dict) -> None:
+        for collector in list(self.collectors):
+            try:
+                collector(event, data)
+            except Exception:
+                # A broken collector must not fail the render.
+                self.collectors.remove(collector)
+
+    def _add_time(self, name: str, seconds: float, count: int = 0) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += seconds
+            entry["count"] += count
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as stage ``name``, pausing the enclosing stage on this thread."""
+        stack = self._local.__dict__.setdefault("stack", [])
+        now = time.perf_counter()
+        if stack:
+            parent, since = stack[-1]
+            self._add_time(parent, now - since)
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            name, since = stack.pop()
+            now = time.perf_counter()
+            self._add_time(name, now - since, 1)
+            if stack:
+                stack[-1][1] = now
+            self._emit("stage", {"stage": name, "seconds": self.stages[name]["seconds"]})
+
+    def record_process(self, progress: FFmpegProgress, result: subprocess.CompletedProcess, elapsed: float) -> None:
+        """``FFmpegRunner.on_exit`` hook."""
+        stats = ProcessStats(
+            progress.label or "ffmpeg",
+            elapsed,
+            result.returncode,
+            progress.fps,
+            progress.speed,
+            progress.total_size,
+            time.perf_counter(),
+        )
+        with self._lock:
+            self.processes.append(stats)
+        self._emit("process", asdict(stats))
+
+    def start(self, watch: Callable[[], List[Path]]) -> None:
+        """Begin a render: reset counters and sample the size of ``watch()`` folders."""
+        self.stages.clear()
+        self.processes.clear()
+        self.peak_temp_bytes = 0
+        self._started = time.perf_counter()
+        self._stop.clear()
+
+        def sample() -> None:
+            while True:
+                size = sum(tree_size(path) for path in watch() if path.exists())
+                self.peak_temp_bytes = max(self.peak_temp_bytes, size)
+                if self._stop.wait(SAMPLE_INTERVAL):
+                    return
+
+        self._sampler = threading.Thread(target=sample, daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> float:
+        """Stop sampling and return the render's wall time."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        return time.perf_counter() - self._started
+
+    def peak_processes(self) -> int:
+        """Most ffmpeg processes that were running at the same time."""
+        events = sorted(
+            [(stats.ended - stats.seconds, 1) for stats in self.processes]
+            + [(stats.ended, -1) for stats in self.processes]
+        )
+        running = peak = 0
+        for _, step in events:
+            running += step
+            peak = max(peak, running)
+        return peak
+
+    def report(self, label: str, output_path: Path, returncode: int, wall_seconds: float) -> dict:
+        encoders = [stats for stats in self.processes if stats.speed > 0]
+        try:
+            output_bytes = os.path.getsize(output_path)
+        except OSError:
+            output_bytes = 0
+        report = {
+            "label": label,
+            "output": str(output_path),
+            "returncode": returncode,
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "wall_seconds": round(wall_seconds, 3),
+            "stages": {
+                name: {"seconds": round(entry["seconds"], 3), "count": int(entry["count"])}
+                for name, entry in self.stages.items()
+            },
+            "ffmpeg": {
+                "processes": len(self.processes),
+                "failed": sum(1 for stats in self.processes if stats.returncode != 0),
+                "peak_concurrent": self.peak_processes(),
+                "mean_fps": round(sum(stats.fps for stats in encoders) / len(encoders), 2) if encoders else 0.0,
+                "mean_speed": round(sum(stats.speed for stats in encoders) / len(encoders), 3) if encoders else 0.0,
+                "runs": [asdict(stats) for stats in self.processes],
+            },
+            "bytes_written": sum(stats.bytes for stats in self.processes),
+            "output_bytes": output_bytes,
+            "peak_temp_bytes": self.peak_temp_bytes,
+        }
+        for run in report["ffmpeg"]["runs"]:
+            run.pop("ended")
+            run["seconds"] = round(run["seconds"], 3)
+        self._emit("report", report)
+        return report
+
+
+def summary(report: dict) -> str:
+    """One-line digest of a report for the render log."""
+    stages = ", ".join(f"{name} {entry['seconds']:.1f}s" for name, entry in report["stages"].items())
+    ffmpeg = report["ffmpeg"]
+    return (
+        f"Telemetry: {report['wall_seconds']:.1f}s ({stages}); {ffmpeg['processes']} ffmpeg runs, "
+        f"peak {ffmpeg['peak_concurrent']}, {ffmpeg['mean_speed']:.2f}x; "
+        f"peak temp {report['peak_temp_bytes'] / 1e6:.1f} MB"
+    )
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    staging.write_text(text, encoding="utf-8")
+    os.replace(staging, path)
+
+
+def write_json(report: dict, path: Path) -> None:
+    _write_atomic(path, json.dumps(report, indent=2))
+
+
+def prometheus_text(report: dict) -> str:
+    """Render ``report`` in the Prometheus text exposition format (for a textfile collector)."""
+    label = report["label"].replace("\\", "\\\\").replace('"', '\\"')
+    ffmpeg = report["ffmpeg"]
+    metrics = [
+        ("ytpplus_render_seconds", "Wall time of the last render.", [("", report["wall_seconds"])]),
+        ("ytpplus_render_exit_code", "Exit code of the last render.", [("", report["returncode"])]),
+        (
+            "ytpplus_stage_seconds",
+            "Exclusive wall time per render stage.",
+            [(f',stage="{name}"', entry["seconds"]) for name, entry in report["stages"].items()],
+        ),
+        ("ytpplus_ffmpeg_processes", "FFmpeg processes run.", [("", ffmpeg["processes"])]),
+        ("ytpplus_ffmpeg_failed", "FFmpeg processes that exited non-zero.", [("", ffmpeg["failed"])]),
+        ("ytpplus_ffmpeg_peak_concurrent", "Most FFmpeg processes running at once.", [("", ffmpeg["peak_concurrent"])]),
+        ("ytpplus_ffmpeg_mean_fps", "Mean final fps reported by FFmpeg encoders.", [("", ffmpeg["mean_fps"])]),
+        ("ytpplus_ffmpeg_mean_speed", "Mean final speed reported by FFmpeg encoders.", [("", ffmpeg["mean_speed"])]),
+        ("ytpplus_bytes_written", "Bytes written by FFmpeg processes.", [("", report["bytes_written"])]),
+        ("ytpplus_output_bytes", "Size of the render output.", [("", report["output_bytes"])]),
+        ("ytpplus_peak_temp_bytes", "Peak size of the job's scratch folders.", [("", report["peak_temp_bytes"])]),
+    ]
+    lines: List[str] = []
+    for name, help_text, samples in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{label="{label}"{extra}}} {value}' for extra, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(report: dict, path: Path) -> None:
+    _write_atomic(path, prometheus_text(report))
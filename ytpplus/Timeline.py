@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+from .EffectsFactory import EFFECT_BITS, OVERLAY_SLOTS
+from .Utilities import ProjectSettings
+
+# Chance of a transition clip after each planned clip (YTP+ used 1 in 16).
+TRANSITION_CHANCE = 1 / 16
+MAX_OVERLAYS = 3
+
+COLUMNS: Dict[str, tuple] = {
+    "source": (np.int32, ()),
+    "in_point": (np.float64, ()),
+    "duration": (np.float32, ()),
+    "slice_duration": (np.float32, ()),
+    "effects": (np.uint64, ()),
+    "level": (np.uint8, ()),
+    "overlays": (np.int32, (MAX_OVERLAYS,)),
+    "transition": (np.int32, ()),
+    "seed": (np.uint32, ()),
+}
+
+
+class Timeline:
+    """Columnar clip plan: one row per clip, one typed NumPy array per column.
+
+    ``source`` indexes the video list, ``overlays`` and ``transition`` index
+    the overlay and transition pools (``-1`` means none), ``effects`` is a
+    bitmask over ``EFFECT_BITS`` applied at intensity ``level``, and
+    ``slice_duration`` is the short stream slice (min/max_stream_duration)
+    used by stutter-style effects.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]) -> None:
+        sizes = {len(array) for array in columns.values()}
+        if len(sizes) > 1:
+            raise ValueError("Timeline columns must have the same length.")
+        self.columns = columns
+
+    @classmethod
+    def empty(cls, size: int) -> "Timeline":
+        return cls({name: np.zeros((size, *shape), dtype=dtype) for name, (dtype, shape) in COLUMNS.items()})
+
+    def __len__(self) -> int:
+        return len(self.columns["source"])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.columns.values())
+
+    @classmethod
+    def generate(
+        cls,
+        settings: ProjectSettings,
+        source_durations: Sequence[float],
+        transition_count: int = 0,
+        overlay_count: int = 0,
+        effect_masks: Union[int, np.ndarray] = 0,
+        effect_levels: Union[int, np.ndarray] = 1,
+        seed=None,
+    ) -> "Timeline":
+        """Generate ``settings.clip_count`` rows in one vectorized pass.
+
+        Sources with an unknown (zero) duration are trimmed from the start.
+        """
+        if not len(source_durations):
+            raise ValueError("At least one source is required to generate a timeline.")
+        rng = np.random.default_rng(seed)
+        size = max(0, settings.clip_count)
+        timeline = cls.empty(size)
+        columns = timeline.columns
+        durations = np.asarray(source_durations, dtype=np.float64)
+
+        clip_low, clip_high = sorted((settings.min_clip_duration, settings.max_clip_duration))
+        slice_low, slice_high = sorted((settings.min_stream_duration, settings.max_stream_duration))
+        columns["source"][:] = rng.integers(0, len(durations), size)
+        columns["duration"][:] = np.round(rng.uniform(clip_low, clip_high, size), 3)
+        headroom = np.maximum(durations[columns["source"]] - columns["duration"], 0.0)
+        columns["in_point"][:] = np.round(rng.random(size) * headroom, 3)
+        columns["slice_duration"][:] = np.round(rng.uniform(slice_low, slice_high, size), 3)
+        columns["effects"][:] = effect_masks
+        columns["level"][:] = effect_levels
+        columns["seed"][:] = rng.integers(0, 2**32, size, dtype=np.uint32)
+
+        columns["transition"][:] = -1
+        if transition_count and size > 1:
+            chosen = rng.random(size) < TRANSITION_CHANCE
+            chosen[-1] = False
+            picks = rng.integers(0, transition_count, size)
+            columns["transition"][chosen] = picks[chosen]
+
+        columns["overlays"][:] = -1
+        if overlay_count:
+            slots = np.zeros(size, dtype=np.int32)
+            for key, count in OVERLAY_SLOTS.items():
+                has_effect = (columns["effects"] & np.uint64(EFFECT_BITS[key])) != 0
+                slots = np.maximum(slots, np.where(has_effect, count, 0))
+            picks = rng.integers(0, overlay_count, (size, MAX_OVERLAYS))
+            used = np.arange(MAX_OVERLAYS) < slots[:, None]
+            columns["overlays"][used] = picks[used]
+        return timeline
+
+    def fit_durations(self, durations, source_durations: Sequence[float]) -> None:
+        """Replace clip durations and pull in points back so clips end inside known sources."""
+        columns = self.columns
+        columns["duration"][:] = np.round(durations, 3)
+        lengths = np.asarray(source_durations, dtype=np.float64)[columns["source"]]
+        latest = np.where(lengths > 0, np.maximum(lengths - columns["duration"], 0.0), np.inf)
+        columns["in_point"][:] = np.round(np.minimum(columns["in_point"], latest), 3)
+
+    def row(self, index: int) -> dict:
+        record = {}
+        for name, array in self.columns.items():
+            value = array[index].tolist()
+            record[name] = round(value, 6) if array.dtype.kind == "f" else value
+        return record
+
+    def to_records(self, videos: Sequence[Path]) -> List[dict]:
+        """Return JSON-friendly rows with source paths resolved."""
+        records = []
+        for index in range(len(self)):
+            record = self.row(index)
+            record["source"] = str(videos[record["source"]])
+            records.append(record)
+        return records
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as handle:
+            np.savez(handle, **self.columns)
+
+    @classmethod
+    def load(cls, path: Path) -> "Timeline":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in COLUMNS})
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import configparser
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -39,6 +40,8 @@ class ProjectSettings:
     clip_count: int = 20
     width: int = 640
     height: int = 480
+    fps: float = 30.0
+    sample_rate: int = 48000
     min_stream_duration: float = 0.2
     max_stream_duration: float = 0.4
     min_clip_duration: float = 0.5
@@ -68,6 +71,15 @@ class ProjectSettings:
     resources_dir: str = "resources"
     theme: str = "Dark"
     project_type: str = "Generic"
+    render_workers: int = 0
+    render_cache_mb: int = 2048
+    render_engine: str = "segments"
+    use_proxies: bool = True
+    proxy_scale: float = 0.25
+    normalize_sources: bool = True
+    workspace_dir: str = ""
+    workspace_mb: int = 4096
+    metrics_path: str = ""
 
 
 DEFAULT_EFFECTS: Dict[str, EffectConfig] = {
@@ -109,7 +121,7 @@ DEFAULT_EFFECTS: Dict[str, EffectConfig] = {
     ),
     "temporal_scramble": EffectConfig(
         name="Temporal Scramble",
-        description="Scramble clip timing for chaotic edits.",
+        description="Play short chunks of a clip out of order.",
     ),
     "high_harmony": EffectConfig(
         name="High Harmony",
@@ -125,7 +137,7 @@ DEFAULT_EFFECTS: Dict[str, EffectConfig] = {
     ),
     "half_reversed": EffectConfig(
         name="Half Reversed",
-        description="Reverse mid-section of a clip.",
+        description="Play the second half of a clip backwards.",
     ),
     "pitch_shift": EffectConfig(
         name="Pitch Shift",
@@ -195,7 +207,7 @@ DEFAULT_EFFECTS: Dict[str, EffectConfig] = {
     "frame_shuffle": EffectConfig(
         name="Frame Shuffle",
         enabled=False,
-        description="Placeholder; sample shuffle implementation.",
+        description="Shuffle frames within short slices.",
     ),
     "meme_injection": EffectConfig(
         name="Meme Injection",
@@ -226,6 +238,7 @@ ASSET_FOLDERS = {
     "errors": "errors",
     "spadinner": "spadinner",
     "spadinner_sounds": "spadinner_sounds",
+    "rainbow": "rainbow",
 }
 
 
@@ -237,10 +250,43 @@ PROJECT_TYPES = [
 ]
 
 
+RENDER_ENGINES = [
+    "segments",
+    "filtergraph",
+    "stream",
+]
+
+
+VIDEO_EXTENSIONS = (".mp4", ".wmv", ".avi", ".mkv")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+
+def list_media(directory: str, extensions: Tuple[str, ...]) -> List[Path]:
+    """Return the files in ``directory`` with one of ``extensions``, sorted by name."""
+    folder = Path(directory)
+    if not folder.is_dir():
+        return []
+    return sorted(path for path in folder.iterdir() if path.suffix.lower() in extensions)
+
+
+# App.config keys that do not match a ProjectSettings field name.
+CONFIG_ALIASES = {
+    "sources": "source_dir",
+    "temp": "temp_dir",
+    "sounds": "sounds_dir",
+    "music": "music_dir",
+    "resources": "resources_dir",
+    "intro": "intro_path",
+    "outro": "outro_path",
+}
+
+
 def ensure_directories(settings: ProjectSettings) -> None:
     base = Path(settings.resources_dir)
     base.mkdir(parents=True, exist_ok=True)
     Path(settings.temp_dir).mkdir(parents=True, exist_ok=True)
+    if settings.workspace_dir:
+        Path(settings.workspace_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.sounds_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.music_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.source_dir).mkdir(parents=True, exist_ok=True)
@@ -252,10 +298,76 @@ def load_default_settings() -> ProjectSettings:
     return ProjectSettings()
 
 
+def load_app_config(path: Path) -> Tuple[ProjectSettings, ToolPaths]:
+    """Read an App.config file into settings and tool paths; unknown keys are ignored."""
+    parser = configparser.ConfigParser()
+    if not parser.read(path, encoding="utf-8"):
+        raise FileNotFoundError(f"Config file not found: {path}")
+    section = parser["ytpplus"] if parser.has_section("ytpplus") else {}
+    settings = ProjectSettings()
+    tools = ToolPaths()
+    setting_types = {item.name: type(getattr(settings, item.name)) for item in fields(ProjectSettings)}
+    for key, raw in section.items():
+        if key in ToolPaths.__dataclass_fields__:
+            setattr(tools, key, raw)
+            continue
+        name = CONFIG_ALIASES.get(key, key)
+        kind = setting_types.get(name)
+        if kind is None:
+            continue
+        if kind is bool:
+            value = parser.getboolean("ytpplus", key)
+        else:
+            value = kind(raw)
+        setattr(settings, name, value)
+    return settings, tools
+
+
 def load_default_effects() -> Dict[str, EffectConfig]:
     return {key: EffectConfig(**vars(value)) for key, value in DEFAULT_EFFECTS.items()}
 
 
+@dataclass
+class EncoderProfile:
+    """Codec settings for one kind of render; ``threads=0`` lets the generator split the CPU."""
+
+    name: str
+    video_codec: str = "libx264"
+    preset: str = "medium"
+    crf: int = 23
+    pix_fmt: str = "yuv420p"
+    gop: int = 0
+    audio_codec: str = "aac"
+    audio_bitrate: str = "192k"
+    threads: int = 0
+
+    def video_args(self, threads: int = 0) -> List[str]:
+        args = ["-c:v", self.video_codec, "-preset", self.preset, "-crf", str(self.crf), "-pix_fmt", self.pix_fmt]
+        if self.gop:
+            args += ["-g", str(self.gop)]
+        threads = self.threads or threads
+        if threads:
+            args += ["-threads", str(threads)]
+        return args
+
+    def audio_args(self) -> List[str]:
+        return ["-c:a", self.audio_codec, "-b:a", self.audio_bitrate]
+
+    def args(self, threads: int = 0) -> List[str]:
+        return self.video_args(threads) + self.audio_args()
+
+
+ENCODER_PROFILES: Dict[str, EncoderProfile] = {
+    "draft": EncoderProfile("draft", preset="ultrafast", crf=32, audio_bitrate="96k"),
+    "preview": EncoderProfile("preview", preset="veryfast", crf=28, audio_bitrate="128k"),
+    "final": EncoderProfile("final", preset="slow", crf=18, audio_bitrate="192k"),
+    # Per-clip segments that are joined later: fast, near-lossless, short GOP for clean cuts.
+    "intermediate": EncoderProfile("intermediate", preset="veryfast", crf=16, gop=12, audio_bitrate="256k"),
+    # Low-resolution stand-ins for previews and draft renders: cheap to build, short GOP for seeking.
+    "proxy": EncoderProfile("proxy", preset="ultrafast", crf=30, gop=15, audio_bitrate="96k"),
+}
+
+
 @dataclass
 class RenderJob:
     output_path: Path
@@ -264,3 +376,25 @@ class RenderJob:
     effects: Dict[str, EffectConfig]
     tool_paths: ToolPaths
     notes: Optional[str] = None
+    seed: Optional[int] = None
+    draft: bool = False
+    profile: str = "final"
+    # Re-render even when the render graph says the output is up to date.
+    force: bool = False
+
+
+@dataclass
+class ClipSegment:
+    index: int
+    source: Path
+    start: float
+    duration: float
+    kind: str = "clip"
+    effects: Optional[int] = None
+    level: int = 1
+    # Overlay images, clips and sounds picked for the clip's overlay effects.
+    assets: List[Path] = field(default_factory=list)
+    # Timeline row seed; places the clip's overlays and seeds its frame effects.
+    seed: int = 0
+    # Stutter loop / shuffle window length in seconds (the timeline's slice_duration).
+    slice_duration: float = 0.0
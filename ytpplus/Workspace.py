@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+OWNER_FILE = "owner.json"
+
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x100000, False, pid)  # SYNCHRONIZE
+        if not handle:
+            return False
+        try:
+            return kernel32.WaitForSingleObject(handle, 0) == 0x102  # WAIT_TIMEOUT
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as handle:
+            # A zombie has exited but was not reaped yet (common for killed children in containers).
+            return handle.read().rpartition(b")")[2].split()[0] != b"Z"
+    except (OSError, IndexError):
+        return True
+
+
+def tree_size(path: Path) -> int:
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(folder, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+@dataclass
+class Workspace:
+    """Scratch directory owned by one job: ``<root>/<temp_number>-<job_id>``."""
+
+    path: Path
+    job_id: str
+
+    def file(self, name: str) -> Path:
+        return self.path / name
+
+    def folder(self, name: str) -> Path:
+        path = self.path / name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def owner(self) -> dict:
+        try:
+            return json.loads((self.path / OWNER_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write_owner(self, **values) -> None:
+        owner = {**self.owner(), **values}
+        (self.path / OWNER_FILE).write_text(json.dumps(owner), encoding="utf-8")
+
+    @property
+    def last_used(self) -> float:
+        try:
+            return (self.path / OWNER_FILE).stat().st_mtime
+        except OSError:
+            return 0.0
+
+    @property
+    def active(self) -> bool:
+        """True while the owning process is alive and has not released it."""
+        owner = self.owner()
+        if not owner:
+            # Owner file not written yet (or lost): treat fresh folders as in use.
+            try:
+                return time.time() - self.path.stat().st_mtime < 60
+            except OSError:
+                return False
+        if owner.get("closed"):
+            return False
+        if owner.get("host") not in (None, socket.gethostname()):
+            return True
+        return pid_alive(int(owner.get("pid", 0)))
+
+
+class WorkspaceManager:
+    """Per-job scratch namespaces under one root with a shared byte budget.
+
+    Released workspaces are kept until the total exceeds ``max_bytes``;
+    then the least recently used ones are deleted. Workspaces left behind
+    by processes that died are removed by ``cleanup_orphans``. Active
+    workspaces are never evicted.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, settings) -> "WorkspaceManager":
+        base = Path(settings.workspace_dir or settings.temp_dir)
+        return cls(base / "jobs", max(0, settings.workspace_mb) * 1024 * 1024)
+
+    def workspaces(self) -> List[Workspace]:
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return []
+        return [
+            Workspace(Path(entry.path), entry.name.partition("-")[2])
+            for entry in entries
+            if entry.is_dir(follow_symlinks=False)
+        ]
+
+    def create(self, temp_number: int, job_id: Optional[str] = None) -> Workspace:
+        job_id = job_id or uuid.uuid4().hex[:8]
+        workspace = Workspace(self.root / f"{temp_number}-{job_id}", job_id)
+        workspace.path.mkdir(parents=True, exist_ok=True)
+        workspace._write_owner(pid=os.getpid(), host=socket.gethostname(), created=time.time(), closed=False)
+        return workspace
+
+    def release(self, workspace: Workspace) -> None:
+        """Mark ``workspace`` finished and trim released workspaces to the budget."""
+        if not workspace.path.exists():
+            return
+        workspace._write_owner(closed=True)
+        self.enforce_budget()
+
+    def remove(self, workspace: Workspace) -> None:
+        shutil.rmtree(workspace.path, ignore_errors=True)
+
+    def cleanup_orphans(self) -> int:
+        """Delete workspaces whose owning process on this host is gone."""
+        removed = 0
+        for workspace in self.workspaces():
+            if workspace.owner().get("closed") or workspace.active:
+                continue
+            self.remove(workspace)
+            removed += 1
+        return removed
+
+    def usage(self) -> int:
+        return sum(tree_size(workspace.path) for workspace in self.workspaces())
+
+    def enforce_budget(self) -> int:
+        """Evict released workspaces, oldest first, until usage fits ``max_bytes``."""
+        with self._lock:
+            sized = [(workspace, tree_size(workspace.path)) for workspace in self.workspaces()]
+            total = sum(size for _, size in sized)
+            freed = 0
+            idle = sorted((item for item in sized if not item[0].active), key=lambda item: item[0].last_used)
+            for workspace, size in idle:
+                if total <= self.max_bytes and self.max_bytes > 0:
+                    break
+                self.remove(workspace)
+                total -= size
+                freed += size
+            return freed
@@ -1,25 +1,193 @@
 from __future__ import annotations
 
+import functools
+import inspect
 import json
+import os
 import shutil
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence
 
-from .EffectsFactory import EffectsFactory
-from .Utilities import RenderJob
+import numpy as np
+
+from .AssetIndex import EFFECT_ASSETS, AssetIndex, asset_kind
+from .BatchVariants import Variant, VariantResult
+from .BeatAnalysis import BeatCache, BeatGrid
+from .CutIndex import CutIndexCache
+from .EffectsFactory import EFFECT_BITS, OVERLAY_SLOTS, EffectResult, EffectsFactory, mask_keys
+from .FFmpegRunner import FFmpegRunner, kill_process_tree
+from .FilterGraph import AUDIO_SAMPLE_RATE, OverlayInput, compile_timeline, overlay_chains
+from .FrameEngine import (
+    FRAME_VERSION,
+    RAW_PIX_FMT,
+    frame_bytes,
+    frame_order,
+    raw_input_args,
+    reorder_frames,
+    reorder_samples,
+)
+from .MediaProbe import MetadataCache, concat_copy_blockers
+from .MediaStreams import iter_pcm
+from .Normalizer import Normalizer
+from .OverlayCache import RASTER_KINDS, OverlayCache, overlay_box
+from .ProxyMedia import ProxyManager
+from .RenderCache import RenderCache, file_identity
+from .RenderGraph import GraphState, RenderGraph
+from .SegmentStream import feed_in_order
+from .SoundCache import PCM_CHANNELS, PCM_VERSION, SoundCache, mix_sounds, pcm_input_args, write_pcm
+from .Telemetry import RenderTelemetry, summary, write_json, write_prometheus
+from .Timeline import Timeline
+from .Utilities import AUDIO_EXTENSIONS, ENCODER_PROFILES, ClipSegment, EncoderProfile, RenderJob, list_media
+from .Workspace import Workspace, WorkspaceManager
+
+
+@dataclass
+class SegmentResult:
+    segment: ClipSegment
+    output_path: Path
+    returncode: int
+    stderr: str = ""
+    elapsed: float = 0.0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and self.output_path.exists()
+
+
+@dataclass
+class SegmentedRender:
+    output_path: Path
+    segments: List[SegmentResult]
+    concat: Optional[subprocess.CompletedProcess] = None
+
+    @property
+    def failed(self) -> List[SegmentResult]:
+        return [result for result in self.segments if not result.ok]
+
+    @property
+    def returncode(self) -> int:
+        if self.concat is None:
+            return 1
+        return self.concat.returncode
+
+
+def _measured(label: str):
+    """Render entry point: the outermost call collects telemetry and writes its report."""
+
+    def decorate(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def measured(self, *args, **kwargs):
+            if self._measuring:
+                return method(self, *args, **kwargs)
+            output_path = signature.bind(self, *args, **kwargs).arguments.get("output_path")
+            self._measuring = True
+            self.telemetry.start(self._scratch_paths)
+            result = None
+            try:
+                result = method(self, *args, **kwargs)
+                return result
+            finally:
+                self._measuring = False
+                self._write_report(label, output_path, result, self.telemetry.stop())
+
+        return measured
+
+    return decorate
+
+
+def _timed(stage: str):
+    """Count a method's wall time as telemetry stage ``stage``."""
+
+    def decorate(method):
+        @functools.wraps(method)
+        def timed(self, *args, **kwargs):
+            with self.telemetry.stage(stage):
+                return method(self, *args, **kwargs)
+
+        return timed
+
+    return decorate
 
 
 class YTPGenerator:
     """FFmpeg-based generator scaffold for YTP+ Deluxe."""
 
-    def __init__(self, job: RenderJob) -> None:
+    def __init__(self, job: RenderJob, runner: Optional[FFmpegRunner] = None) -> None:
         self.job = job
+        self.runner = runner or FFmpegRunner()
         self.effects_factory = EffectsFactory(job.effects)
+        self.render_notes: List[str] = []
+        self.metadata = MetadataCache.for_settings(job.settings.temp_dir, job.tool_paths.ffprobe)
+        self.render_cache = RenderCache.for_settings(job.settings.temp_dir, job.settings.render_cache_mb)
+        self.proxies = ProxyManager.for_job(job, self.runner)
+        self.normalizer = Normalizer.for_job(job, self.metadata, self.runner)
+        self.cuts = CutIndexCache.for_settings(
+            job.settings.temp_dir, job.tool_paths.ffmpeg, self.metadata, self.runner
+        )
+        self.beats = BeatCache.for_settings(job.settings.temp_dir, job.tool_paths.ffmpeg, self.runner)
+        self.assets = AssetIndex.for_settings(job.settings, job.tool_paths.ffprobe)
+        self.sounds = SoundCache.for_settings(job.settings.temp_dir, job.tool_paths.ffmpeg, self.runner)
+        self.overlays = OverlayCache.for_settings(job.settings.temp_dir, job.tool_paths.ffmpeg, self.runner)
+        self._assets_scanned = False
+        self.workspaces = WorkspaceManager.for_settings(job.settings)
+        self._workspace: Optional[Workspace] = None
+        self.telemetry = RenderTelemetry()
+        self.runner.on_exit = self.telemetry.record_process
+        self._measuring = False
+
+    @property
+    def workspace(self) -> Workspace:
+        """This job's scratch folder, created on first use."""
+        if self._workspace is None:
+            self._workspace = self.workspaces.create(self.job.settings.temp_number)
+        return self._workspace
+
+    def close(self) -> None:
+        """Release the scratch folder; it is kept until the workspace budget evicts it."""
+        if self._workspace is not None:
+            self.workspaces.release(self._workspace)
+            self._workspace = None
+
+    def _scratch_paths(self) -> List[Path]:
+        return [self._workspace.path] if self._workspace is not None else []
+
+    def _write_report(self, label: str, output_path: Optional[Path], result, wall_seconds: float) -> None:
+        """Write ``<output>.render.json`` (and the Prometheus file, if set) for a finished render."""
+        if result is None:
+            returncode = -1
+        elif isinstance(result, list):
+            returncode = 0 if all(item.ok for item in result) else 1
+        else:
+            returncode = result.returncode
+        output_path = Path(output_path) if output_path else Path(self.job.settings.temp_dir) / label
+        report = self.telemetry.report(label, output_path, returncode, wall_seconds)
+        try:
+            write_json(report, output_path.with_name(f"{output_path.stem}.render.json"))
+            if self.job.settings.metrics_path:
+                write_prometheus(report, Path(self.job.settings.metrics_path))
+        except OSError as exc:
+            self.render_notes.append(f"Telemetry report not written: {exc}")
+            return
+        self.render_notes.append(summary(report))
+
+    def _probe_all(self, paths: Iterable[Path]) -> dict:
+        with self.telemetry.stage("probe"):
+            infos = self.metadata.probe_all(paths)
+            self.metadata.save()
+        return infos
 
     def _write_concat_file(self, file_list: Iterable[Path], output_file: Path) -> None:
         output_file.parent.mkdir(parents=True, exist_ok=True)
-        lines = [f"file '{path.as_posix()}'" for path in file_list]
+        # Concat resolves relative entries against the list's folder, not the cwd.
+        lines = [f"file '{Path(path).resolve().as_posix()}'" for path in file_list]
         output_file.write_text("\n".join(lines), encoding="utf-8")
 
     def _build_filters(self) -> str:
@@ -36,11 +204,47 @@ class YTPGenerator:
         cmd = [self.job.tool_paths.ffmpeg, "-y", "-i", str(input_path)]
         if filters:
             cmd += ["-filter_complex", filters]
+        cmd += self._profile().args(self._threads())
         cmd += [str(output_path)]
         return cmd
 
-    def _concat_cmd(self, concat_file: Path, output_path: Path) -> List[str]:
-        filters = self._build_filters()
+    def _concat_codec_args(self, inputs: List[Path], apply_filters: bool) -> List[str]:
+        """Stream-copy whatever the inputs allow and note why anything is re-encoded."""
+        profile = self._profile()
+        if apply_filters and self._build_filters():
+            self.render_notes.append("Concat re-encodes: effect filters are active.")
+            return profile.args(self._threads())
+        probed = self._probe_all(inputs)
+        missing = [path for path in inputs if path not in probed]
+        if missing:
+            reason = self.metadata.errors.get(str(missing[0]), "unknown error")
+            self.render_notes.append(f"Concat re-encodes: inputs could not be probed ({reason}).")
+            return profile.args(self._threads())
+        blockers = concat_copy_blockers([probed[path] for path in inputs])
+        if not any(blockers.values()):
+            self.render_notes.append("Concat uses stream copy: inputs are compatible.")
+            return ["-c", "copy"]
+        args: List[str] = []
+        if blockers["video"]:
+            self.render_notes.append(f"Concat re-encodes video: {blockers['video']}.")
+            args += profile.video_args(self._threads())
+        else:
+            args += ["-c:v", "copy"]
+        if blockers["audio"]:
+            self.render_notes.append(f"Concat re-encodes audio: {blockers['audio']}.")
+            args += profile.audio_args()
+        else:
+            args += ["-c:a", "copy"]
+        return args
+
+    def _concat_cmd(
+        self,
+        concat_file: Path,
+        output_path: Path,
+        apply_filters: bool = True,
+        codec_args: Optional[List[str]] = None,
+    ) -> List[str]:
+        filters = self._build_filters() if apply_filters else ""
         cmd = [
             self.job.tool_paths.ffmpeg,
             "-y",
@@ -53,10 +257,346 @@ class YTPGenerator:
         ]
         if filters:
             cmd += ["-filter_complex", filters]
+        cmd += codec_args or []
         cmd += [str(output_path)]
         return cmd
 
+    def _segment_cmd(
+        self,
+        segment: ClipSegment,
+        output_path: Path,
+        effects: EffectResult,
+        threads: int = 0,
+        silence: bool = False,
+        frames: bool = True,
+        sound_source: str = "pipe:0",
+        audio_source: str = "pipe:0",
+    ) -> List[str]:
+        """Encode one segment: trim, conform, effects, then its visual and sound overlays.
+
+        ``silence`` adds a silent track for sources without audio. With
+        ``frames``, clips that have frame effects read their video as raw
+        frames on stdin and their audio, reordered to match, as raw PCM from
+        ``audio_source`` (see ``_render_frames``); the overlay track is then
+        read from ``sound_source``.
+        """
+        effects = self._clip_effects(segment, effects)
+        settings = self.job.settings
+        width, height = self._frame_size()
+        trim = ["-ss", f"{segment.start:.3f}", "-t", f"{segment.duration:.3f}", "-i", str(segment.source)]
+        reorder = frames and bool(effects.frames)
+        # Every segment leaves at the project rate, whatever its effects did to the timing.
+        conform = f"fps={settings.fps:g}"
+        if reorder:
+            # The frame order already reverses both streams where the clip plays backwards.
+            video_filters = ["setsar=1", *(name for name in effects.video_filters if name != "reverse"), conform]
+            audio_filters = [name for name in effects.audio_filters if name != "areverse"]
+            cmd = [
+                self.job.tool_paths.ffmpeg,
+                "-y",
+                *raw_input_args(width, height, settings.fps),
+                *pcm_input_args(source=audio_source),
+            ]
+        else:
+            video_filters = [f"scale={width}:{height}", "setsar=1", *effects.video_filters, conform]
+            audio_filters = effects.audio_filters
+            cmd = [self.job.tool_paths.ffmpeg, "-y", *trim]
+        audio = int(reorder)
+        overlays = self._visual_overlays(segment)
+        sounds = bool(self._sound_overlays(segment))
+        for overlay in overlays:
+            cmd += overlay.input_args
+        inputs = 1 + audio + len(overlays)
+        if sounds:
+            cmd += pcm_input_args(source=sound_source if reorder else "pipe:0")
+        elif silence:
+            cmd += ["-f", "lavfi", "-t", f"{segment.duration:.3f}", "-i", f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo"]
+        if overlays or sounds:
+            chains = [f"[0:v]{','.join(video_filters)}[{'base' if overlays else 'v'}]"]
+            chains += overlay_chains("[base]", list(enumerate(overlays, 1 + audio)), "[v]")
+            if sounds:
+                chains += self._sound_mix_chains(segment, audio_filters, inputs, audio)
+            cmd += ["-filter_complex", ";".join(chains), "-map", "[v]"]
+        else:
+            cmd += ["-vf", ",".join(video_filters)]
+        if sounds:
+            cmd += ["-map", "[a]"]
+        else:
+            if not overlays and (silence or reorder):
+                cmd += ["-map", "0:v:0"]
+            if silence:
+                cmd += ["-map", f"{inputs}:a:0"]
+            elif overlays or reorder:
+                cmd += ["-map", f"{audio}:a?"]
+            if audio_filters:
+                cmd += ["-af", ",".join(audio_filters)]
+        cmd += ["-ar", str(settings.sample_rate), "-ac", "2"]
+        # Segments are encoded once, in the delivery profile, so the stitch can stream-copy them.
+        cmd += self._profile().args(threads)
+        # Audio effects with a tail (echo) must not outlast the picture, or every later clip drifts.
+        cmd += ["-t", f"{segment.duration:.3f}", str(output_path)]
+        return cmd
+
+    def _stream_segment_cmd(
+        self, segment: ClipSegment, effects: EffectResult, offset: float, has_audio: bool, threads: int = 0
+    ) -> List[str]:
+        """Segment command that writes MPEG-TS to stdout, timestamped at ``offset`` in the timeline.
+
+        Every segment is encoded with the same codec settings so the muxer
+        can stream-copy the joined transport stream. Stdin may carry only
+        the overlay track here, so frame effects other than ``reverse``
+        (an ffmpeg filter) are left out.
+        """
+        cmd = self._segment_cmd(segment, Path("pipe:1"), effects, threads, silence=not has_audio, frames=False)[:-1]
+        cmd += [
+            "-output_ts_offset",
+            f"{offset:.3f}",
+            "-f",
+            "mpegts",
+            "pipe:1",
+        ]
+        return cmd
+
+    def _profile(self, stage: str = "final") -> EncoderProfile:
+        """Encoder profile for a render stage: "final" (the job's profile), "preview" or "intermediate".
+
+        Draft jobs use the draft profile for every stage.
+        """
+        if self.job.draft or self.job.profile == "draft":
+            name = "draft"
+        else:
+            name = self.job.profile if stage == "final" else stage
+        if name not in ENCODER_PROFILES:
+            raise ValueError(f"Unknown encoder profile: {name}")
+        return ENCODER_PROFILES[name]
+
+    def _threads(self, concurrent: int = 1) -> int:
+        """Encoder threads per ffmpeg process when ``concurrent`` processes share the CPU."""
+        return max(1, (os.cpu_count() or 1) // max(1, concurrent))
+
+    def _frame_size(self) -> tuple:
+        """Project size for final renders; proxy size for draft renders."""
+        if self.job.draft:
+            return self.proxies.width, self.proxies.height
+        return self.job.settings.width, self.job.settings.height
+
+    def _normalizes(self) -> bool:
+        return self.job.settings.normalize_sources and not self.job.draft
+
+    def _normalize(self, sources: Iterable[Path], normalizer: Optional[Normalizer] = None) -> Dict[Path, Path]:
+        """Conformed copies of ``sources`` (see ``Normalizer``); empty when normalization is off.
+
+        Sources that fail to conform are left out and used as they are.
+        """
+        if not self._normalizes():
+            return {}
+        sources = list(dict.fromkeys(sources))
+        if not sources:
+            return {}
+        normalizer = normalizer or self.normalizer
+        with self.telemetry.stage("normalize"):
+            conformed = normalizer.build_all(sources, self.job.settings.render_workers or None)
+        for source in sources:
+            if str(source) in normalizer.errors:
+                self.render_notes.append(f"Using {source.name} as is: {normalizer.errors[str(source)]}")
+        return conformed
+
+    def _preview_source(self, input_path: Path) -> Path:
+        if self.job.settings.use_proxies:
+            return self.proxies.resolve(input_path)
+        return input_path
+
+    def _clip_effects(self, segment: ClipSegment, default: EffectResult) -> EffectResult:
+        """Per-clip chain from the segment's effect mask; bookends get none."""
+        if segment.kind != "clip":
+            return EffectResult(audio_filters=[], video_filters=[], overlays=[], notes=[])
+        if segment.effects is not None:
+            return self.effects_factory.build_clip(segment.effects, segment.level)
+        return default
+
+    def _segment_key(self, segment: ClipSegment, effects: EffectResult, suffix: str) -> str:
+        """Hash the source identity and the full segment command (trim, filters, format)."""
+        cmd = self._segment_cmd(segment, Path(f"segment{suffix}"), effects)
+        args = ["<source>" if arg == str(segment.source) else arg for arg in cmd[1:]]
+        parts = ["segment", file_identity(segment.source), args]
+        overlays = self._sound_overlays(segment)
+        if overlays:
+            # The mixed sounds arrive on a pipe, so hash what goes into them.
+            parts.append([PCM_VERSION, *([file_identity(path), offset] for path, offset in overlays)])
+        frames = self._clip_effects(segment, effects).frames
+        if frames:
+            # The frame order is drawn from the row seed, and the trim moves to the decoders.
+            parts.append([FRAME_VERSION, frames, segment.seed, segment.slice_duration, segment.start, segment.duration])
+        clips = [file_identity(path) for path in segment.assets if asset_kind(str(path)) == "video"]
+        if clips:
+            # Overlay clips are read in place; rasterized overlays are content-addressed already.
+            parts.append(clips)
+        return RenderCache.key(*parts)
+
+    def _visual_overlays(self, segment: ClipSegment) -> List[OverlayInput]:
+        """Image, GIF and clip overlays for ``segment``, fitted inside ``overlay_box`` at seeded positions.
+
+        Images and GIFs come from the overlay cache; overlays that failed to
+        conform are left out.
+        """
+        if segment.kind != "clip":
+            return []
+        box = overlay_box(*self._frame_size())
+        rng = np.random.default_rng([segment.seed, 2])
+        duration = f"{segment.duration:.3f}"
+        overlays: List[OverlayInput] = []
+        for path in segment.assets:
+            kind = asset_kind(str(path))
+            if kind not in (*RASTER_KINDS, "video") or str(path) in self.overlays.errors:
+                continue
+            x, y = rng.random(2).tolist()
+            try:
+                source = str(self.overlays.path_for(path, box)) if kind in RASTER_KINDS else str(path)
+            except OSError:
+                continue
+            if kind == "image":
+                args = ["-loop", "1", "-t", duration, "-i", source]
+            else:
+                args = ["-stream_loop", "-1", "-t", duration, "-i", source]
+            scale = f"scale={box[0]}:{box[1]}:force_original_aspect_ratio=decrease" if kind == "video" else ""
+            overlays.append(OverlayInput(args, round(x, 3), round(y, 3), scale))
+        return overlays
+
+    def _prepare_overlays(self, segments: Iterable[ClipSegment]) -> None:
+        """Rasterize the image and GIF overlays of ``segments`` into the overlay cache."""
+        paths = list(dict.fromkeys(path for segment in segments if segment.kind == "clip" for path in segment.assets))
+        paths = [path for path in paths if asset_kind(str(path)) in RASTER_KINDS]
+        if not paths:
+            return
+        with self.telemetry.stage("overlays"):
+            self.overlays.build_all(paths, overlay_box(*self._frame_size()), self.job.settings.render_workers or None)
+        for path in paths:
+            if str(path) in self.overlays.errors:
+                self.render_notes.append(f"Overlay skipped: {self.overlays.errors[str(path)]}")
+
+    def _sound_overlays(self, segment: ClipSegment) -> List[tuple]:
+        """``(path, offset)`` of every sound asset mixed into ``segment``.
+
+        Each picked sound is placed with probability ``sound_frequency``, on
+        the cut in ``sound_sync_mode`` and at a seeded offset otherwise.
+        Sounds that failed to decode are left out.
+        """
+        if segment.kind != "clip":
+            return []
+        settings = self.job.settings
+        rng = np.random.default_rng([segment.seed, 1])
+        placed = []
+        for path in segment.assets:
+            if asset_kind(str(path)) != "audio":
+                continue
+            chance, position = rng.random(2).tolist()
+            if chance >= settings.sound_frequency or str(path) in self.sounds.errors:
+                continue
+            offset = 0.0 if settings.sound_sync_mode else round(position * segment.duration * 0.75, 3)
+            placed.append((Path(path), offset))
+        return placed
+
+    def _keeps_original_audio(self) -> bool:
+        return self.job.settings.preserve_original_audio and not self.job.settings.cut_audio
+
+    def _source_audio(self, source: Path):
+        try:
+            return self.metadata.get(source).audio
+        except (OSError, RuntimeError, ValueError):
+            return None
+
+    def _sound_mix_chains(
+        self, segment: ClipSegment, audio_filters: List[str], track: int, source: int = 0
+    ) -> List[str]:
+        """Chains that mix the overlay track on input ``track`` into input ``source``'s audio as ``[a]``."""
+        chains: List[str] = []
+        if self._keeps_original_audio() and self._source_audio(segment.source) is not None:
+            original = [f"aresample={AUDIO_SAMPLE_RATE}", "aformat=sample_fmts=fltp:channel_layouts=stereo"]
+            chains.append(f"[{source}:a]{','.join(original + audio_filters)}[orig]")
+            mix = "amix=inputs=2:duration=first:dropout_transition=0:normalize=0"
+            chains.append(f"[orig][{track}:a]{mix}[a]")
+        else:
+            chains.append(f"[{track}:a]anull[a]")
+        return chains
+
+    def _prepare_sounds(self, segments: Iterable[ClipSegment]) -> None:
+        """Decode the sound overlays of ``segments`` into the PCM cache."""
+        paths = list(dict.fromkeys(path for segment in segments for path, _ in self._sound_overlays(segment)))
+        if not paths:
+            return
+        with self.telemetry.stage("sounds"):
+            self.sounds.build_all(paths, self.job.settings.render_workers or None)
+        for path in paths:
+            if str(path) in self.sounds.errors:
+                self.render_notes.append(f"Sound overlay skipped: {self.sounds.errors[str(path)]}")
+
+    def _sound_feed(self, segments: Sequence[ClipSegment]) -> Optional[Callable[[BinaryIO], None]]:
+        """Feed writing the mixed overlay track of each of ``segments`` (silence where it has none), or None."""
+        if not any(self._sound_overlays(segment) for segment in segments):
+            return None
+
+        def feed(sink: BinaryIO) -> None:
+            for segment in segments:
+                sounds = [(self.sounds.get(path), offset) for path, offset in self._sound_overlays(segment)]
+                write_pcm(sink, mix_sounds(sounds, segment.duration))
+
+        return feed
+
+    def timeline_graph(self, segments: List[ClipSegment], engine: str) -> RenderGraph:
+        """Graph with one node per segment (fingerprinted by its render command) feeding the output."""
+        graph = RenderGraph()
+        default = self.effects_factory.build()
+        for segment in segments:
+            overlays = self._clip_effects(segment, default).overlays
+            key = self._segment_key(segment, default, ".mp4")
+            graph.add(f"{segment.kind}:{segment.index}", segment.kind, [key, overlays])
+        graph.add("output", engine, [list(self._frame_size()), self._profile().args()], list(graph.nodes))
+        return graph
+
+    def sources_graph(self, inputs: List[Path]) -> RenderGraph:
+        """Graph with one node per whole input file feeding a filtered concat/render output."""
+        graph = RenderGraph()
+        for index, path in enumerate(inputs):
+            try:
+                identity = file_identity(path)
+            except OSError:
+                identity = [str(path), None]
+            graph.add(f"input:{index}", "input", identity)
+        settings = [self._build_filters(), self._profile().args()]
+        if self._normalizes():
+            settings.append(self.normalizer.target())
+        graph.add("output", "concat", settings, list(graph.nodes))
+        return graph
+
+    def _needs_render(self, graph: RenderGraph, state: GraphState, output_path: Path) -> bool:
+        """Compare ``graph`` with the last render of ``output_path`` and note what changed."""
+        if self.job.force:
+            return True
+        stale = state.stale(graph, output_path)
+        if not stale:
+            self.render_notes.append(f"{output_path.name} is up to date: nothing changed since the last render.")
+            return False
+        steps = [node for node in stale if node.name != "output"]
+        self.render_notes.append(f"Incremental render: {len(steps)} of {len(graph.nodes) - 1} inputs changed.")
+        return True
+
+    def _run(
+        self, cmd: List[str], duration: Optional[float] = None, label: str = "", feed=None
+    ) -> subprocess.CompletedProcess:
+        return self.runner.run(cmd, duration=duration, label=label, feed=feed)
+
+    def _known_duration(self, inputs: Iterable[Path]) -> Optional[float]:
+        infos = [self.metadata.cached(path) for path in inputs]
+        if not infos or any(info is None for info in infos):
+            return None
+        return sum(info.duration for info in infos)
+
+    def _worker_count(self, workers: Optional[int], jobs: int) -> int:
+        count = workers or self.job.settings.render_workers or os.cpu_count() or 1
+        return max(1, min(count, jobs))
+
     def preview(self, input_path: Path) -> None:
+        input_path = self._preview_source(input_path)
         ffplay = shutil.which(self.job.tool_paths.ffplay) or shutil.which("ffplay")
         ffmpeg = shutil.which(self.job.tool_paths.ffmpeg) or shutil.which("ffmpeg")
         if ffplay:
@@ -84,6 +624,7 @@ class YTPGenerator:
                 "audio": effects.audio_filters,
                 "video": effects.video_filters,
                 "overlays": effects.overlays,
+                "frames": effects.frames,
                 "notes": effects.notes,
             },
             "spadinner": {
@@ -91,25 +632,185 @@ class YTPGenerator:
                 "videos": [str(p) for p in self.job.sources.spadinner_videos],
             },
         }
+        if self.job.sources.videos:
+            timeline = self.plan_timeline()
+            plan["clips"] = timeline.to_records(self.job.sources.videos)
+            for record, assets in zip(plan["clips"], self.clip_assets(timeline)):
+                record["assets"] = [str(path) for path in assets]
+        grid = self.beat_grid()
+        if grid is not None:
+            plan["music"] = {"track": str(self.music_tracks()[0]), **grid.summary()}
         return plan
 
+    def _timeline_sources(self) -> tuple:
+        videos = list(self.job.sources.videos)
+        if not videos:
+            raise ValueError("No video sources available for segment planning.")
+        transitions = list(self.job.sources.transitions) if self.job.settings.insert_transitions else []
+        return videos, transitions
+
+    def music_tracks(self) -> List[Path]:
+        """Audio sources followed by the files in the music folder."""
+        tracks = [*self.job.sources.audio, *list_media(self.job.settings.music_dir, AUDIO_EXTENSIONS)]
+        return list(dict.fromkeys(Path(track) for track in tracks))
+
+    def _beat_synced(self) -> bool:
+        effects = self.job.effects
+        return self.job.settings.project_type == "YTPMV" or any(
+            key in effects and effects[key].enabled for key in ("ytpmv_auto", "get_down")
+        )
+
+    def beat_grid(self) -> Optional[BeatGrid]:
+        """Beat grid of the first music track for YTPMV-style jobs, or None."""
+        tracks = self.music_tracks()
+        if not tracks or not self._beat_synced():
+            return None
+        try:
+            with self.telemetry.stage("analyze"):
+                grid = self.beats.get(tracks[0])
+        except (OSError, RuntimeError) as exc:
+            self.render_notes.append(f"Beat analysis skipped: {exc}")
+            return None
+        return grid if grid.bpm else None
+
+    @_timed("plan")
+    def plan_timeline(self, seed=None) -> Timeline:
+        """Generate the columnar clip plan for the current job (or for ``seed`` instead of the job's)."""
+        videos, transitions = self._timeline_sources()
+        infos = self._probe_all([*videos, *transitions])
+        durations = [infos[path].duration if path in infos else 0.0 for path in videos]
+        settings = self.job.settings
+        seed = self.job.seed if seed is None else seed
+        effect_seed, timeline_seed = np.random.SeedSequence(seed).spawn(2)
+        selection = self.effects_factory.select_batch(
+            settings.clip_count, seed=effect_seed, effects_per_clip=settings.effects_per_clip
+        )
+        timeline = Timeline.generate(
+            settings,
+            durations,
+            transition_count=len(transitions),
+            overlay_count=len(self.job.sources.images) + len(self.job.sources.gifs),
+            effect_masks=selection.masks,
+            effect_levels=selection.levels,
+            seed=timeline_seed,
+        )
+        grid = self.beat_grid()
+        if grid is not None:
+            timeline.fit_durations(grid.quantize(timeline.duration), durations)
+        return timeline
+
+    def clip_assets(self, timeline: Timeline) -> List[List[Path]]:
+        """Pick overlay assets for every clip from the asset index.
+
+        Picks use each row's ``seed``, so a clip keeps its assets when the
+        plan is reordered. The resource folders are only scanned when some
+        clip has an effect that needs assets.
+        """
+        picked: List[List[Path]] = [[] for _ in range(len(timeline))]
+        wanted = np.uint64(sum(EFFECT_BITS[key] for key in EFFECT_ASSETS))
+        if not np.any(timeline.effects & wanted):
+            return picked
+        if not self._assets_scanned:
+            with self.telemetry.stage("assets"):
+                self.assets.refresh(self.job.settings.render_workers or None)
+            self._assets_scanned = True
+        for row, (mask, seed) in enumerate(zip(timeline.effects.tolist(), timeline.seed.tolist())):
+            rng = np.random.default_rng(seed)
+            for key in mask_keys(mask):
+                if key in EFFECT_ASSETS:
+                    picked[row] += [asset.path for asset in self.assets.pick(key, rng, OVERLAY_SLOTS.get(key, 1))]
+        return picked
+
+    @_timed("plan")
+    def plan_segments(self, timeline: Optional[Timeline] = None) -> List[ClipSegment]:
+        """Expand a timeline into render segments with intro, outro and transitions."""
+        videos, transitions = self._timeline_sources()
+        if timeline is None:
+            timeline = self.plan_timeline()
+        settings = self.job.settings
+        bookends = {
+            kind: Path(path)
+            for kind, enabled, path in (
+                ("intro", settings.insert_intro, settings.intro_path),
+                ("outro", settings.insert_outro, settings.outro_path),
+            )
+            if enabled and Path(path).is_file()
+        }
+        infos = self._probe_all([*transitions, *bookends.values()])
+        fallback = max(settings.min_clip_duration, settings.max_clip_duration)
+
+        def whole(kind: str, source: Path) -> ClipSegment:
+            info = infos.get(source)
+            return ClipSegment(0, source, 0.0, round(info.duration if info and info.duration else fallback, 3), kind)
+
+        planned: List[ClipSegment] = []
+        if "intro" in bookends:
+            planned.append(whole("intro", bookends["intro"]))
+        rows = zip(
+            self.clip_assets(timeline),
+            timeline.source.tolist(),
+            timeline.in_point.tolist(),
+            timeline.duration.tolist(),
+            timeline.effects.tolist(),
+            timeline.level.tolist(),
+            timeline.transition.tolist(),
+            timeline.seed.tolist(),
+            timeline.slice_duration.tolist(),
+        )
+        for assets, source, start, duration, mask, level, transition, seed, slice_duration in rows:
+            planned.append(
+                ClipSegment(
+                    0, videos[source], round(start, 3), round(duration, 3), "clip", mask, level, assets, seed,
+                    round(slice_duration, 3),
+                )
+            )
+            if transition >= 0:
+                planned.append(whole("transition", transitions[transition]))
+        if "outro" in bookends:
+            planned.append(whole("outro", bookends["outro"]))
+        conformed = self._normalize(segment.source for segment in planned)
+        for index, segment in enumerate(planned):
+            segment.index = index
+            if self.job.draft:
+                # Draft renders read finished proxies; sources without one use the original.
+                segment.source = self.proxies.resolve(segment.source)
+            else:
+                segment.source = conformed.get(segment.source, segment.source)
+        self._prepare_sounds(planned)
+        self._prepare_overlays(planned)
+        return planned
+
     def export_plan(self, output_path: Path) -> None:
         plan = self.generate_plan()
         output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(json.dumps(plan, indent=2), encoding="utf-8")
 
+    @_measured("render")
+    @_timed("encode")
     def render(self, input_path: Path, output_path: Path) -> subprocess.CompletedProcess:
         cmd = self._ffmpeg_cmd(input_path, output_path)
-        return subprocess.run(cmd, check=False, capture_output=True, text=True)
+        return self._run(cmd, self._known_duration([input_path]), "render")
 
-    def render_concat(self, inputs: Iterable[Path], output_path: Path) -> subprocess.CompletedProcess:
-        concat_file = Path(self.job.settings.temp_dir) / "concat.txt"
+    @_timed("concat")
+    def _stitch(
+        self, inputs: List[Path], output_path: Path, concat_file: Path, apply_filters: bool = True
+    ) -> subprocess.CompletedProcess:
         self._write_concat_file(inputs, concat_file)
-        cmd = self._concat_cmd(concat_file, output_path)
-        return subprocess.run(cmd, check=False, capture_output=True, text=True)
+        codec_args = self._concat_codec_args(inputs, apply_filters)
+        cmd = self._concat_cmd(concat_file, output_path, apply_filters, codec_args)
+        return self._run(cmd, self._known_duration(inputs), "concat")
 
-    def render_preview(self, input_path: Path, seconds: int = 15) -> subprocess.CompletedProcess:
-        output_path = Path(self.job.settings.temp_dir) / "preview.mp4"
+    def render_concat(self, inputs: Iterable[Path], output_path: Path) -> subprocess.CompletedProcess:
+        return self._stitch(list(inputs), output_path, self.workspace.file("concat.txt"))
+
+    @_measured("preview")
+    @_timed("encode")
+    def render_preview(
+        self, input_path: Path, seconds: int = 15, output_path: Optional[Path] = None
+    ) -> subprocess.CompletedProcess:
+        """Encode the first ``seconds`` of ``input_path``, by default into this job's workspace."""
+        output_path = output_path or self.workspace.file("preview.mp4")
+        input_path = self._preview_source(input_path)
         cmd = [
             self.job.tool_paths.ffmpeg,
             "-y",
@@ -117,14 +818,497 @@ class YTPGenerator:
             str(seconds),
             "-i",
             str(input_path),
+            *self._profile("preview").args(self._threads()),
             str(output_path),
         ]
-        return subprocess.run(cmd, check=False, capture_output=True, text=True)
+        return self._run(cmd, float(seconds), "preview")
 
+    @_measured("render_v2")
     def render_v2(self, inputs: Iterable[Path], output_path: Path) -> subprocess.CompletedProcess:
+        """Concat (or render a single) input, skipped when neither inputs nor settings changed."""
         inputs_list = list(inputs)
-        if len(inputs_list) > 1:
-            return self.render_concat(inputs_list, output_path)
         if not inputs_list:
             raise ValueError("No inputs provided for render_v2.")
-        return self.render(inputs_list[0], output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        graph = self.sources_graph(inputs_list)
+        state = GraphState.for_output(self.job.settings.temp_dir, output_path)
+        if not self._needs_render(graph, state, output_path):
+            return subprocess.CompletedProcess([], 0, "", "")
+        inputs_list = self._concat_sources(inputs_list)
+        if len(inputs_list) > 1:
+            result = self.render_concat(inputs_list, output_path)
+        else:
+            result = self.render(inputs_list[0], output_path)
+        if result.returncode == 0:
+            state.save(graph, output_path)
+        return result
+
+    def _concat_sources(self, inputs: List[Path]) -> List[Path]:
+        """``render_v2`` inputs, normalized only when the originals cannot be joined by stream copy.
+
+        A single input is re-encoded anyway. With effect filters the join
+        re-encodes too, so the fast intermediate copies are used; otherwise
+        the copies are encoded in the job's profile and joined as delivered.
+        """
+        if len(inputs) < 2 or not self._normalizes():
+            return inputs
+        filtered = bool(self._build_filters())
+        if not filtered:
+            probed = self._probe_all(inputs)
+            compatible = all(path in probed for path in inputs) and not any(
+                concat_copy_blockers([probed[path] for path in inputs]).values()
+            )
+            if compatible:
+                return inputs
+            normalizer = Normalizer.for_job(self.job, self.metadata, self.runner, self._profile())
+        else:
+            normalizer = self.normalizer
+        conformed = self._normalize(inputs, normalizer)
+        return [conformed.get(path, path) for path in inputs]
+
+    def _render_segment(
+        self, segment: ClipSegment, output_path: Path, effects: EffectResult, threads: int = 0
+    ) -> SegmentResult:
+        started = time.perf_counter()
+        key: Optional[str] = None
+        target = output_path
+        if self.runner.cancelled:
+            return SegmentResult(segment, target, -1, "Cancelled.", 0.0)
+        try:
+            if self.render_cache.enabled:
+                key = self._segment_key(segment, effects, output_path.suffix)
+                cached = self.render_cache.lookup(key, output_path.suffix)
+                if cached is not None:
+                    return SegmentResult(segment, cached, 0, "", time.perf_counter() - started, cached=True)
+                target = self.render_cache.staging_path(key, output_path.suffix)
+            clip_effects = self._clip_effects(segment, effects)
+            if clip_effects.frames:
+                result = self._render_frames(segment, target, clip_effects, threads)
+            else:
+                cmd = self._segment_cmd(segment, target, effects, threads)
+                result = self._run(cmd, segment.duration, f"segment {segment.index}", feed=self._sound_feed([segment]))
+        except OSError as exc:
+            return SegmentResult(segment, target, -1, str(exc), time.perf_counter() - started)
+        if key is not None:
+            if result.returncode == 0 and target.exists():
+                target = self.render_cache.store(key, target)
+            else:
+                target.unlink(missing_ok=True)
+        return SegmentResult(segment, target, result.returncode, result.stderr or "", time.perf_counter() - started)
+
+    def _clip_pcm(self, segment: ClipSegment) -> np.ndarray:
+        """The trimmed clip's audio as stereo float32 PCM; empty when the source has none."""
+        if self._source_audio(segment.source) is None:
+            return np.zeros((0, PCM_CHANNELS), dtype=np.float32)
+        chunks = list(
+            iter_pcm(
+                self.job.tool_paths.ffmpeg,
+                segment.source,
+                AUDIO_SAMPLE_RATE,
+                channels=PCM_CHANNELS,
+                max_seconds=segment.duration,
+                runner=self.runner,
+                start=segment.start,
+            )
+        )
+        return np.concatenate(chunks) if chunks else np.zeros((0, PCM_CHANNELS), dtype=np.float32)
+
+    def _render_frames(
+        self, segment: ClipSegment, output_path: Path, effects: EffectResult, threads: int = 0
+    ) -> subprocess.CompletedProcess:
+        """Encode a clip with frame effects from frames reordered in NumPy.
+
+        A second ffmpeg decodes the trimmed clip to raw frames at the output
+        size; ``reorder_frames`` pipes them to the encoder in the order the
+        clip's frame effects draw from its seed, holding only as many frames
+        as that order looks back. The clip's audio is reordered with the same
+        order, one frame's worth of samples at a time, so sound stays in sync
+        with the picture (a stutter repeats its syllable, a reversal plays
+        backwards). It and the overlay track, if any, go through scratch files
+        because stdin carries the frames.
+        """
+        width, height = self._frame_size()
+        rate = self.job.settings.fps
+        slice_seconds = segment.slice_duration or self.job.settings.min_stream_duration
+        order = frame_order(
+            effects.frames,
+            max(1, round(segment.duration * rate)),
+            round(slice_seconds * rate),
+            np.random.default_rng([segment.seed, 3]),
+        )
+        decode = [
+            self.job.tool_paths.ffmpeg, "-v", "error",
+            "-ss", f"{segment.start:.3f}", "-t", f"{segment.duration:.3f}", "-i", str(segment.source),
+            "-map", "0:v:0", "-an", "-vf", f"fps={rate:g},scale={width}:{height},format={RAW_PIX_FMT}",
+            "-f", "rawvideo", "pipe:1",
+        ]
+        # Batch variants share one pool and restart their indexes, so the worker thread keeps names apart.
+        tag = f"{segment.index:05d}.{threading.get_ident()}"
+        spill = self.workspace.file(f"frames_{tag}.raw")
+        audio_file = self.workspace.file(f"audio_{tag}.f32")
+        sound_file = self.workspace.file(f"sounds_{tag}.f32")
+        try:
+            with open(audio_file, "wb") as handle:
+                write_pcm(handle, reorder_samples(self._clip_pcm(segment), order, AUDIO_SAMPLE_RATE / rate))
+        except RuntimeError as exc:
+            audio_file.unlink(missing_ok=True)
+            return subprocess.CompletedProcess(decode, -1, "", str(exc))
+        sound_feed = self._sound_feed([segment])
+        if sound_feed is not None:
+            with open(sound_file, "wb") as handle:
+                sound_feed(handle)
+        cmd = self._segment_cmd(
+            segment, output_path, effects, threads, sound_source=str(sound_file), audio_source=str(audio_file)
+        )
+        decoder = self.runner.spawn(decode)
+        errors: List[bytes] = []
+        drain = threading.Thread(target=lambda: errors.append(decoder.stderr.read()), daemon=True)
+        drain.start()
+        size = frame_bytes(width, height)
+        try:
+            result = self._run(
+                cmd,
+                segment.duration,
+                f"segment {segment.index}",
+                feed=lambda sink: reorder_frames(decoder.stdout, sink, order, size, spill),
+            )
+        finally:
+            # The decoder may still hold frames the order never reached.
+            stopped = decoder.poll() is None
+            if stopped:
+                kill_process_tree(decoder)
+            decoder.wait()
+            drain.join()
+            decoder.stdout.close()
+            decoder.stderr.close()
+            self.runner.release(decoder, f"frames {segment.index}")
+            audio_file.unlink(missing_ok=True)
+            sound_file.unlink(missing_ok=True)
+        if result.returncode == 0 and decoder.returncode != 0 and not stopped:
+            stderr = b"".join(errors).decode("utf-8", "replace")
+            return subprocess.CompletedProcess(cmd, decoder.returncode, result.stdout, stderr)
+        return result
+
+    def _render_segment_retrying(
+        self,
+        segment: ClipSegment,
+        output_path: Path,
+        effects: EffectResult,
+        threads: int,
+        retries: int,
+        backoff: float,
+    ) -> SegmentResult:
+        """``_render_segment`` retried ``retries`` times, waiting ``backoff * 2**attempt`` between tries."""
+        for attempt in range(retries + 1):
+            result = self._render_segment(segment, output_path, effects, threads)
+            if result.ok or attempt == retries or self.runner.wait_cancelled(backoff * 2**attempt):
+                return result
+        return result
+
+    @_measured("segments")
+    def render_segments(
+        self,
+        output_path: Path,
+        segments: Optional[List[ClipSegment]] = None,
+        workers: Optional[int] = None,
+        on_segment: Optional[Callable[[SegmentResult], None]] = None,
+        segment_dir: Optional[Path] = None,
+        completed: Optional[Dict[int, Path]] = None,
+        retries: int = 0,
+        backoff: float = 1.0,
+    ) -> SegmentedRender:
+        """Render each clip as its own ffmpeg job on a worker pool, then stitch.
+
+        Failed segments are retried up to ``retries`` times, then reported
+        through ``on_segment`` and left out of the final concat instead of
+        aborting the whole render. Segments whose index is in ``completed``
+        are not rendered again; the given files are stitched in their place.
+        """
+        if segments is None:
+            segments = self.plan_segments()
+        if not segments:
+            raise ValueError("No segments provided for render_segments.")
+        segment_dir = segment_dir or self.workspace.folder("segments")
+        segment_dir.mkdir(parents=True, exist_ok=True)
+        effects = self.effects_factory.build()
+        completed = completed or {}
+
+        results: List[SegmentResult] = [
+            SegmentResult(segment, completed[segment.index], 0, cached=True)
+            for segment in segments
+            if segment.index in completed
+        ]
+        todo = [segment for segment in segments if segment.index not in completed]
+        workers = self._worker_count(workers, max(1, len(todo)))
+        threads = self._threads(workers)
+        with self.telemetry.stage("segments"), ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    self._render_segment_retrying,
+                    segment,
+                    segment_dir / f"segment_{segment.index:05d}.mp4",
+                    effects,
+                    threads,
+                    retries,
+                    backoff,
+                )
+                for segment in todo
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_segment:
+                    on_segment(result)
+        results.sort(key=lambda result: result.segment.index)
+
+        rendered = [result.output_path for result in results if result.ok]
+        if not rendered or self.runner.cancelled:
+            return SegmentedRender(output_path, results)
+        concat = self._stitch(rendered, output_path, segment_dir / "concat.txt", apply_filters=False)
+        if self.render_cache.enabled:
+            self.render_cache.evict(keep=rendered)
+        return SegmentedRender(output_path, results, concat)
+
+    @_measured("batch")
+    def render_variants(
+        self,
+        variants: List[Variant],
+        workers: Optional[int] = None,
+        on_segment: Optional[Callable[[SegmentResult], None]] = None,
+        on_variant: Optional[Callable[[VariantResult], None]] = None,
+    ) -> List[VariantResult]:
+        """Render a batch of variants with one worker pool shared by all their segments.
+
+        Segments are de-duplicated by render key, so a clip planned by
+        several variants (every clip of a remix) is encoded once. Variants
+        whose outputs are already up to date are skipped; the rest are
+        stitched as soon as all their segments are done.
+        """
+        effects = self.effects_factory.build()
+        jobs: List[tuple] = []
+        for variant in variants:
+            graph = self.timeline_graph(variant.segments, "segments")
+            state = GraphState.for_output(self.job.settings.temp_dir, variant.output_path)
+            if not self.job.force and not state.stale(graph, variant.output_path):
+                skipped = VariantResult(variant, skipped=True)
+                if on_variant:
+                    on_variant(skipped)
+                continue
+            keys = [self._segment_key(segment, effects, ".mp4") for segment in variant.segments]
+            jobs.append((variant, graph, state, keys))
+        results: List[VariantResult] = []
+        if not jobs:
+            return results
+
+        unique: Dict[str, ClipSegment] = {}
+        for variant, _, _, keys in jobs:
+            for segment, key in zip(variant.segments, keys):
+                unique.setdefault(key, segment)
+        planned = sum(len(keys) for _, _, _, keys in jobs)
+        self.render_notes.append(f"Batch: {len(jobs)} variants, {len(unique)} unique of {planned} planned segments.")
+        segment_dir = self.workspace.folder("segments")
+        workers = self._worker_count(workers, len(unique))
+        threads = self._threads(workers)
+        done: Dict[str, SegmentResult] = {}
+        waiting = {position: set(keys) for position, (_, _, _, keys) in enumerate(jobs)}
+        with self.telemetry.stage("segments"), ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._render_segment, segment, segment_dir / f"{key[:20]}.mp4", effects, threads): key
+                for key, segment in unique.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                done[key] = future.result()
+                if on_segment:
+                    on_segment(done[key])
+                # Stitch each variant as soon as its last segment is in.
+                for position, keys in list(waiting.items()):
+                    keys.discard(key)
+                    if not keys:
+                        del waiting[position]
+                        results.append(self._stitch_variant(*jobs[position], done, on_variant))
+        if self.render_cache.enabled:
+            self.render_cache.evict(keep=[result.output_path for result in done.values() if result.ok])
+        return results
+
+    def _stitch_variant(
+        self,
+        variant: Variant,
+        graph: RenderGraph,
+        state: GraphState,
+        keys: List[str],
+        done: Dict[str, SegmentResult],
+        on_variant: Optional[Callable[[VariantResult], None]],
+    ) -> VariantResult:
+        result = VariantResult(
+            variant, failed=[segment.index for segment, key in zip(variant.segments, keys) if not done[key].ok]
+        )
+        rendered = [done[key].output_path for key in keys if done[key].ok]
+        if rendered and not self.runner.cancelled:
+            concat_file = self.workspace.file(f"concat_{variant.kind}_{variant.number:03d}.txt")
+            variant.output_path.parent.mkdir(parents=True, exist_ok=True)
+            result.render = self._stitch(rendered, variant.output_path, concat_file, apply_filters=False)
+            if result.render.returncode == 0 and not result.failed:
+                state.save(graph, variant.output_path)
+        if on_variant:
+            on_variant(result)
+        return result
+
+    @_measured("stream")
+    def render_stream(
+        self,
+        output_path: Path,
+        segments: Optional[List[ClipSegment]] = None,
+        workers: Optional[int] = None,
+        on_segment: Optional[Callable[[SegmentResult], None]] = None,
+    ) -> SegmentedRender:
+        """Render segments into pipes and mux them in timeline order, with no temp files.
+
+        Each segment ffmpeg writes MPEG-TS, offset to its planned start, to
+        stdout; one muxer reads the joined stream from stdin, copies the video
+        into ``output_path`` (which grows while later segments are still
+        encoding) and re-encodes only the audio, trimming the padding AAC adds
+        at every segment end so audio does not drift. A failed segment leaves
+        a gap of its planned length.
+        """
+        if segments is None:
+            segments = self.plan_segments()
+        if not segments:
+            raise ValueError("No segments provided for render_stream.")
+        infos = self._probe_all(segment.source for segment in segments)
+        effects = self.effects_factory.build()
+        starts = np.concatenate(([0.0], np.cumsum([segment.duration for segment in segments])))
+        workers = self._worker_count(workers, len(segments))
+        commands = [
+            self._stream_segment_cmd(
+                segment,
+                effects,
+                float(start),
+                segment.source in infos and infos[segment.source].audio is not None,
+                self._threads(workers),
+            )
+            for segment, start in zip(segments, starts)
+        ]
+        results: List[SegmentResult] = []
+        started = time.perf_counter()
+
+        def on_done(index: int, returncode: int, stderr: str) -> None:
+            nonlocal started
+            now = time.perf_counter()
+            result = SegmentResult(segments[index], output_path, returncode, stderr, now - started)
+            started = now
+            results.append(result)
+            if on_segment:
+                on_segment(result)
+
+        cmd = [
+            self.job.tool_paths.ffmpeg,
+            "-y",
+            "-f",
+            "mpegts",
+            "-i",
+            "pipe:0",
+            "-map",
+            "0:v:0",
+            "-map",
+            "0:a:0",
+            "-c:v",
+            "copy",
+            "-af",
+            "aresample=async=1:min_hard_comp=0.01",
+            *self._profile().audio_args(),
+            str(output_path),
+        ]
+        feeds = [self._sound_feed([segment]) for segment in segments]
+        feed = feed_in_order(self.runner, commands, workers, on_done, feeds)
+        with self.telemetry.stage("mux"):
+            mux = self._run(cmd, float(starts[-1]), "stream", feed=feed)
+        return SegmentedRender(output_path, results, mux)
+
+    @_measured("filtergraph")
+    def render_filtergraph(
+        self, output_path: Path, segments: Optional[List[ClipSegment]] = None
+    ) -> subprocess.CompletedProcess:
+        """Render the whole timeline with one ffmpeg process and one filter graph."""
+        if segments is None:
+            segments = self.plan_segments()
+        if not segments:
+            raise ValueError("No segments provided for render_filtergraph.")
+        infos = self._probe_all(segment.source for segment in segments)
+        audio_sources = {path for path, info in infos.items() if info.audio is not None}
+        default = self.effects_factory.build()
+        width, height = self._frame_size()
+        overlaid = {position for position, segment in enumerate(segments) if self._sound_overlays(segment)}
+        graph = compile_timeline(
+            segments,
+            lambda segment: self._clip_effects(segment, default),
+            width,
+            height,
+            audio_sources,
+            sound_input=pcm_input_args() if overlaid else (),
+            muted=set() if self._keeps_original_audio() else overlaid,
+            overlays_for=self._visual_overlays,
+        )
+        script_file = self.workspace.file("timeline.txt")
+        script_file.write_text(graph.script, encoding="utf-8")
+        cmd = [
+            self.job.tool_paths.ffmpeg,
+            "-y",
+            *graph.input_args,
+            "-filter_complex_script",
+            str(script_file),
+            "-map",
+            graph.video_label,
+            "-map",
+            graph.audio_label,
+            "-r",
+            f"{self.job.settings.fps:g}",
+            "-ar",
+            str(self.job.settings.sample_rate),
+            *self._profile().args(self._threads()),
+            str(output_path),
+        ]
+        with self.telemetry.stage("encode"):
+            duration = sum(segment.duration for segment in segments)
+            return self._run(cmd, duration, "filtergraph", feed=self._sound_feed(segments))
+
+    @_measured("timeline")
+    def render_timeline(
+        self,
+        output_path: Path,
+        engine: Optional[str] = None,
+        segments: Optional[List[ClipSegment]] = None,
+        on_segment: Optional[Callable[[SegmentResult], None]] = None,
+    ) -> subprocess.CompletedProcess:
+        """Render a planned timeline with the selected engine (see ``RENDER_ENGINES``).
+
+        The timeline's render graph is compared with the last render of
+        ``output_path``: an unchanged timeline is not rendered again, and the
+        segments engine re-encodes only changed segments (unchanged ones come
+        from the render cache) before stitching the output.
+        """
+        engine = engine or self.job.settings.render_engine
+        if engine not in ("filtergraph", "segments", "stream"):
+            raise ValueError(f"Unknown render engine: {engine}")
+        if segments is None:
+            segments = self.plan_segments()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        graph = self.timeline_graph(segments, engine)
+        state = GraphState.for_output(self.job.settings.temp_dir, output_path)
+        if not self._needs_render(graph, state, output_path):
+            return subprocess.CompletedProcess([], 0, "", "")
+        if engine != "segments":
+            self.render_notes.append(f"The {engine} engine re-renders every segment; segments reuses unchanged ones.")
+        elif not self.render_cache.enabled:
+            self.render_notes.append("Render cache is disabled: every segment is re-encoded.")
+        if engine == "filtergraph":
+            result = self.render_filtergraph(output_path, segments)
+            failed = []
+        else:
+            render = self.render_stream if engine == "stream" else self.render_segments
+            rendered = render(output_path, segments, on_segment=on_segment)
+            result = rendered.concat or subprocess.CompletedProcess([], 1, "", "No segments were rendered.")
+            failed = rendered.failed
+        if result.returncode == 0 and not failed and not self.runner.cancelled:
+            state.save(graph, output_path)
+        return result